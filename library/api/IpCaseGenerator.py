@@ -0,0 +1,392 @@
+"""
+Seeded, vectorized generator of IP lookup test cases.
+
+Cases come in batches; batch ``i`` depends only on ``(seed, i, batch_size, mix)``, so any batch
+can be regenerated on its own and nothing has to be materialized up front. Addresses are drawn
+with NumPy:
+
+* ``public_v4`` - stratified over the globally routable ``/8`` blocks (equal share per block),
+  random host part, reserved ranges rejected and redrawn;
+* ``public_v6`` - stratified over the ``/12`` blocks of ``2000::/3``, documentation, Teredo/IETF
+  and 6to4 prefixes rejected;
+* ``special`` - first, last and a random address of private, loopback, link-local, shared,
+  documentation, multicast and other reserved ranges;
+* ``malformed`` - valid addresses broken by one mutation (octet out of range, extra part,
+  bad character, repeated ``::`` ...). Only forms that lenient parsers reject as well are used.
+
+:func:`run_cases` streams cases through an ``IpStackPage`` with a bounded number of requests in
+flight and keeps only counters and the first failures.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import socket
+import time
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from library.api.ValidatorsPage import IsJSON, JsonFieldEquals, JsonHasKeys, StatusCodeIs
+
+DEFAULT_MIX = {"public_v4": 0.6, "public_v6": 0.2, "special": 0.1, "malformed": 0.1}
+
+RESERVED_V4 = [
+    "0.0.0.0/8",
+    "10.0.0.0/8",
+    "100.64.0.0/10",
+    "127.0.0.0/8",
+    "169.254.0.0/16",
+    "172.16.0.0/12",
+    "192.0.0.0/24",
+    "192.0.2.0/24",
+    "192.88.99.0/24",
+    "192.168.0.0/16",
+    "198.18.0.0/15",
+    "198.51.100.0/24",
+    "203.0.113.0/24",
+    "224.0.0.0/4",
+    "240.0.0.0/4",
+]
+RESERVED_V6 = [
+    "::/128",
+    "::1/128",
+    "::ffff:0:0/96",
+    "64:ff9b::/96",
+    "100::/64",
+    "2001::/23",
+    "2001:db8::/32",
+    "2002::/16",
+    "3fff::/20",
+    "fc00::/7",
+    "fe80::/10",
+    "ff00::/8",
+]
+# Reserved blocks inside 2000::/3, excluded from the public IPv6 draw
+EXCLUDED_PUBLIC_V6 = [
+    ipaddress.IPv6Network(n) for n in ("2001::/23", "2001:db8::/32", "2002::/16", "3fff::/20")
+]
+
+_V4_NETS = [ipaddress.IPv4Network(n) for n in RESERVED_V4]
+_V4_STARTS = np.array([int(n.network_address) for n in _V4_NETS], dtype=np.uint32)
+_V4_ENDS = np.array([int(n.broadcast_address) for n in _V4_NETS], dtype=np.uint32)
+# First octets of the unicast /8 blocks that are not reserved as a whole
+PUBLIC_V4_STRATA = np.array([o for o in range(1, 224) if o not in (10, 127)], dtype=np.uint32)
+PUBLIC_V6_STRATA = np.arange(0x200, 0x400, dtype=np.uint64)  # /12 blocks of 2000::/3
+
+
+def format_v4(values: np.ndarray) -> list[str]:
+    """
+    Format uint32 addresses as dotted quads.
+
+    :param values: Array of IPv4 addresses as integers.
+    """
+    raw = values.astype(">u4").tobytes()
+    return [socket.inet_ntoa(raw[i : i + 4]) for i in range(0, len(raw), 4)]
+
+
+def format_v6(high: np.ndarray, low: np.ndarray) -> list[str]:
+    """
+    Format 128-bit addresses given as high/low uint64 halves in canonical compressed form.
+
+    :param high: Upper 64 bits.
+    :param low: Lower 64 bits.
+    """
+    raw = np.stack([high, low], axis=1).astype(">u8").tobytes()
+    return [socket.inet_ntop(socket.AF_INET6, raw[i : i + 16]) for i in range(0, len(raw), 16)]
+
+
+def reserved_v4_mask(values: np.ndarray) -> np.ndarray:
+    """Boolean mask of addresses inside any reserved IPv4 range."""
+    return ((values[:, None] >= _V4_STARTS) & (values[:, None] <= _V4_ENDS)).any(axis=1)
+
+
+class IpCase:
+    """
+    One generated lookup input.
+
+    :param index: Position in the generated sequence.
+    :param ip: Address string sent to the API.
+    :param kind: ``public_v4``, ``public_v6``, ``special`` or ``malformed``.
+    :param stratum: Block or range the address was drawn from, or the mutation applied.
+    """
+
+    def __init__(self, index: int, ip: str, kind: str, stratum: str):
+        self.index = index
+        self.ip = ip
+        self.kind = kind
+        self.stratum = stratum
+
+    @property
+    def expected(self) -> str:
+        """``lookup`` for public addresses, ``reserved`` for special ones, ``invalid`` otherwise."""
+        if self.kind == "malformed":
+            return "invalid"
+        return "reserved" if self.kind == "special" else "lookup"
+
+    @property
+    def id(self) -> str:
+        return f"{self.kind}-{self.index}"
+
+    def validators(self) -> list:
+        """Validators matching the expected outcome, for ``IpStackPage.checked_lookup``."""
+        if self.expected == "invalid":
+            return [StatusCodeIs(200), IsJSON(), JsonFieldEquals("success", False)]
+        if self.expected == "reserved":
+            return [StatusCodeIs(200), IsJSON()]
+        return [
+            StatusCodeIs(200),
+            IsJSON(),
+            JsonFieldEquals("ip", self.ip),
+            JsonHasKeys(["country_code"]),
+        ]
+
+    def __repr__(self) -> str:
+        return f"IpCase({self.index}, {self.ip!r}, {self.kind!r}, {self.stratum!r})"
+
+
+class IpCaseGenerator:
+    """
+    Reproducible, lazily batched IP test-case source.
+
+    :param seed: Seed of the whole sequence.
+    :param batch_size: Cases per batch.
+    :param mix: Share of each case kind; normalized.
+    """
+
+    def __init__(self, seed: int = 0, *, batch_size: int = 10_000, mix: dict | None = None):
+        self.seed = seed
+        self.batch_size = batch_size
+        mix = mix or DEFAULT_MIX
+        self.kinds = list(mix)
+        weights = np.array([mix[k] for k in self.kinds], dtype=float)
+        self.weights = weights / weights.sum()
+
+    def batch_count(self, total: int) -> int:
+        """Number of batches covering ``total`` cases."""
+        return -(-total // self.batch_size)
+
+    def batch(self, index: int, total: int | None = None) -> list[IpCase]:
+        """
+        Generate one batch.
+
+        :param index: Batch number.
+        :param total: Overall case count; the last batch is cut to it.
+        :return: Cases ``index * batch_size`` onwards, kinds interleaved.
+        """
+        size = self.batch_size
+        if total is not None:
+            size = max(0, min(size, total - index * self.batch_size))
+        rng = np.random.default_rng([self.seed, index])
+        counts = rng.multinomial(size, self.weights)
+        drawn: list[tuple[str, str, str]] = []
+        for kind, count in zip(self.kinds, counts, strict=True):
+            if count:
+                drawn.extend(getattr(self, f"_draw_{kind}")(rng, int(count)))
+        start = index * self.batch_size
+        return [
+            IpCase(start + i, *drawn[j]) for i, j in enumerate(rng.permutation(len(drawn)).tolist())
+        ]
+
+    def batches(self, total: int) -> Iterator[list[IpCase]]:
+        """Yield the batches of ``total`` cases one at a time."""
+        for index in range(self.batch_count(total)):
+            yield self.batch(index, total)
+
+    def cases(self, total: int) -> Iterator[IpCase]:
+        """Yield ``total`` cases, generating a batch only when the previous one is used up."""
+        for batch in self.batches(total):
+            yield from batch
+
+    ####################
+    # Internal methods #
+    ####################
+
+    @staticmethod
+    def _public_v4_values(rng: np.random.Generator, n: int) -> tuple[np.ndarray, np.ndarray]:
+        offset = rng.integers(len(PUBLIC_V4_STRATA))
+        strata = PUBLIC_V4_STRATA[(offset + np.arange(n)) % len(PUBLIC_V4_STRATA)]
+        values = (strata << 24) | rng.integers(0, 1 << 24, n, dtype=np.uint32)
+        bad = reserved_v4_mask(values)
+        while bad.any():
+            values[bad] = (strata[bad] << 24) | rng.integers(
+                0, 1 << 24, int(bad.sum()), dtype=np.uint32
+            )
+            bad = reserved_v4_mask(values)
+        return values, strata
+
+    def _draw_public_v4(self, rng: np.random.Generator, n: int) -> list[tuple[str, str, str]]:
+        values, strata = self._public_v4_values(rng, n)
+        return [
+            (ip, "public_v4", f"{s}.0.0.0/8")
+            for ip, s in zip(format_v4(values), strata.tolist(), strict=True)
+        ]
+
+    @staticmethod
+    def _draw_public_v6(rng: np.random.Generator, n: int) -> list[tuple[str, str, str]]:
+        offset = rng.integers(len(PUBLIC_V6_STRATA))
+        strata = PUBLIC_V6_STRATA[(offset + np.arange(n)) % len(PUBLIC_V6_STRATA)]
+
+        def draw_high(count: int, blocks: np.ndarray) -> np.ndarray:
+            rest = rng.integers(0, 1 << 52, count, dtype=np.uint64)
+            return (blocks << np.uint64(52)) | rest
+
+        def excluded(high: np.ndarray) -> np.ndarray:
+            mask = np.zeros(len(high), dtype=bool)
+            for net in EXCLUDED_PUBLIC_V6:
+                shift = np.uint64(64 - net.prefixlen)
+                prefix = np.uint64(int(net.network_address) >> 64) >> shift
+                mask |= (high >> shift) == prefix
+            return mask
+
+        high = draw_high(n, strata)
+        bad = excluded(high)
+        while bad.any():
+            high[bad] = draw_high(int(bad.sum()), strata[bad])
+            bad = excluded(high)
+        low = rng.integers(0, np.iinfo(np.uint64).max, n, dtype=np.uint64, endpoint=True)
+        return [
+            (ip, "public_v6", f"{s << 4:x}::/12")
+            for ip, s in zip(format_v6(high, low), strata.tolist(), strict=True)
+        ]
+
+    @staticmethod
+    def _draw_special(rng: np.random.Generator, n: int) -> list[tuple[str, str, str]]:
+        networks = RESERVED_V4 + RESERVED_V6
+        choice = rng.integers(0, len(networks), n)
+        position = rng.integers(0, 3, n)  # 0 first, 1 last, 2 random inside
+        fraction = rng.random(n)
+        cases = []
+        for net_index, pos, frac in zip(
+            choice.tolist(), position.tolist(), fraction.tolist(), strict=True
+        ):
+            net = ipaddress.ip_network(networks[net_index])
+            if pos == 0:
+                addr = net.network_address
+            elif pos == 1:
+                addr = net.broadcast_address
+            else:
+                addr = net.network_address + int(frac * (net.num_addresses - 1))
+            cases.append((str(addr), "special", str(net)))
+        return cases
+
+    def _draw_malformed(self, rng: np.random.Generator, n: int) -> list[tuple[str, str, str]]:
+        v6_share = int(n * 0.3)
+        v4 = format_v4(self._public_v4_values(rng, n - v6_share)[0])
+        v6 = [ip for ip, _, _ in self._draw_public_v6(rng, v6_share)]
+        v4_mutation = rng.integers(0, len(V4_MUTATIONS), len(v4))
+        v6_mutation = rng.integers(0, len(V6_MUTATIONS), len(v6))
+        numbers = rng.integers(256, 1000, n).tolist()
+        cases = []
+        for ip, m, number in zip(v4, v4_mutation.tolist(), numbers, strict=False):
+            name, mutate = V4_MUTATIONS[m]
+            cases.append((mutate(ip, number), "malformed", name))
+        for ip, m, number in zip(v6, v6_mutation.tolist(), numbers[len(v4) :], strict=True):
+            name, mutate = V6_MUTATIONS[m]
+            cases.append((mutate(ip, number), "malformed", name))
+        return cases
+
+
+def _replace_octet(ip: str, number: int) -> str:
+    parts = ip.split(".")
+    parts[number % 4] = str(number)
+    return ".".join(parts)
+
+
+def _full_groups(ip: str) -> list[str]:
+    return ipaddress.IPv6Address(ip).exploded.split(":")
+
+
+# No missing-octet or leading-zero forms: inet_aton-style parsers read "1.2.3" as 1.2.0.3 and
+# "010.1.1.1" as octal, so the API may legitimately answer them
+V4_MUTATIONS = [
+    ("v4-octet-out-of-range", _replace_octet),
+    ("v4-extra-octet", lambda ip, n: f"{ip}.{n % 256}"),
+    ("v4-trailing-dot", lambda ip, n: ip + "."),
+    ("v4-negative-octet", lambda ip, n: "-" + ip),
+    ("v4-letter", lambda ip, n: ip[:-1] + "x"),
+    ("v4-empty-octet", lambda ip, n: ip.replace(".", "..", 1)),
+]
+V6_MUTATIONS = [
+    ("v6-double-compression", lambda ip, n: ":".join(_full_groups(ip)[:3]) + "::1::2"),
+    ("v6-long-group", lambda ip, n: ":".join([f"{n:05x}", *_full_groups(ip)[1:]])),
+    ("v6-too-many-groups", lambda ip, n: ":".join([*_full_groups(ip), "1"])),
+    ("v6-too-few-groups", lambda ip, n: ":".join(_full_groups(ip)[:7])),
+    ("v6-bad-hex", lambda ip, n: ":".join(["g" + g[1:] for g in _full_groups(ip)])),
+    ("v6-bad-v4-tail", lambda ip, n: f"::ffff:1.2.3.{n}"),
+]
+
+
+class CaseRunReport:
+    """Counters of a :func:`run_cases` run; only the first failures are kept."""
+
+    def __init__(self, max_failures: int):
+        self.max_failures = max_failures
+        self.total = 0
+        self.passed = 0
+        self.failed: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.failures: list[tuple[IpCase, str]] = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.errors
+
+    def add(self, case: IpCase, problem: str | None, error: bool = False) -> None:
+        self.total += 1
+        if problem is None:
+            self.passed += 1
+            return
+        (self.errors if error else self.failed)[case.kind] += 1
+        if len(self.failures) < self.max_failures:
+            self.failures.append((case, problem))
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.total} cases in {self.elapsed:.1f}s: {self.passed} passed, "
+            f"failed {dict(self.failed)}, errors {dict(self.errors)}"
+        ]
+        lines += [f"  {case!r}: {problem[:200]}" for case, problem in self.failures]
+        return "\n".join(lines)
+
+
+def run_cases(
+    client, cases: Iterable[IpCase], *, workers: int = 8, max_failures: int = 20
+) -> CaseRunReport:
+    """
+    Look up every case and check it, keeping at most ``2 * workers`` requests in flight.
+
+    :param client: ``IpStackPage`` (anything with ``checked_lookup``).
+    :param cases: Cases, typically a lazy :meth:`IpCaseGenerator.cases` stream.
+    :param workers: Concurrent requests.
+    :param max_failures: Failures kept with their message.
+    :return: Run report.
+    """
+    report = CaseRunReport(max_failures)
+    start = time.perf_counter()
+
+    def check(case: IpCase) -> None:
+        client.checked_lookup(case.ip, *case.validators())
+
+    def settle(case: IpCase, future: Future) -> None:
+        exc = future.exception()
+        if exc is None:
+            report.add(case, None)
+        elif isinstance(exc, AssertionError):
+            report.add(case, str(exc))
+        else:
+            report.add(case, f"{type(exc).__name__}: {exc}", error=True)
+
+    pending: deque[tuple[IpCase, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for case in cases:
+            if len(pending) >= 2 * workers:
+                settle(*pending.popleft())
+            pending.append((case, pool.submit(check, case)))
+        while pending:
+            settle(*pending.popleft())
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -0,0 +1,419 @@
+"""
+Offline IP-range index for differential validation of ipstack answers.
+
+Ranges are kept as sorted ``start``/``end`` arrays (IPv4 as little-endian uint32, IPv6 as
+16-byte big-endian keys, which sort numerically) searched with binary search. The on-disk file
+is memory-mapped, so opening is instant and pages are shared between processes. Single lookups
+use :mod:`bisect`; batches use ``numpy.searchsorted`` over the mapped arrays.
+
+File layout (all offsets follow the header, no padding)::
+
+    header   "<8sQQQQ"  magic, IPv4 range count, IPv6 range count, record count, records size
+    IPv4     starts (n4 x u4), ends (n4 x u4), record ids (n4 x u4)
+    IPv6     starts (n6 x 16B), ends (n6 x 16B), record ids (n6 x u4)
+    records  JSON list of [country_code, country_name, continent_code, continent_name, lat, lon]
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import ipaddress
+import itertools
+import json
+import math
+import mmap
+import socket
+import struct
+import sys
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"IPRIDX01"
+HEADER = struct.Struct("<8sQQQQ")
+RECORD_FIELDS = (
+    "country_code",
+    "country_name",
+    "continent_code",
+    "continent_name",
+    "latitude",
+    "longitude",
+)
+
+
+def _ip_key(ip: str) -> tuple[int, int | bytes]:
+    """Return ``(version, key)``: an int for IPv4, 16 big-endian bytes for IPv6."""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        pass
+    try:
+        return 6, socket.inet_pton(socket.AF_INET6, ip)
+    except OSError as exc:
+        raise ValueError(f"'{ip}' does not appear to be an IPv4 or IPv6 address") from exc
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(a))
+
+
+class _FixedWidthKeys:
+    """Read-only sequence view of fixed-width byte keys, usable with :mod:`bisect`."""
+
+    def __init__(self, buffer: memoryview, width: int):
+        self._buffer = buffer
+        self._width = width
+
+    def __len__(self) -> int:
+        return len(self._buffer) // self._width
+
+    def __getitem__(self, index: int) -> bytes:
+        start = index * self._width
+        return bytes(self._buffer[start : start + self._width])
+
+
+class IpRangeIndex:
+    """Immutable IP-range to geo-record index backed by a bytes buffer or a memory map."""
+
+    def __init__(self, buffer):
+        self._mmap = buffer if isinstance(buffer, mmap.mmap) else None
+        view = memoryview(buffer)
+        magic, n4, n6, n_records, records_size = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an IP range index file (bad magic)")
+        offset = HEADER.size
+
+        def take(size: int) -> memoryview:
+            nonlocal offset
+            part = view[offset : offset + size]
+            offset += size
+            return part
+
+        v4_starts, v4_ends, v4_ids = take(4 * n4), take(4 * n4), take(4 * n4)
+        v6_starts, v6_ends, v6_ids = take(16 * n6), take(16 * n6), take(4 * n6)
+        self.records = [
+            dict(zip(RECORD_FIELDS, r, strict=True)) for r in json.loads(bytes(take(records_size)))
+        ]
+        if len(self.records) != n_records:
+            raise ValueError("Corrupted IP range index (record count mismatch)")
+
+        self._v4_starts = self._u32(v4_starts)
+        self._v4_ends = self._u32(v4_ends)
+        self._v4_ids = self._u32(v4_ids)
+        self._v6_starts = _FixedWidthKeys(v6_starts, 16)
+        self._v6_ends = _FixedWidthKeys(v6_ends, 16)
+        self._v6_ids = self._u32(v6_ids)
+
+        self._np_v4_starts = np.frombuffer(v4_starts, dtype="<u4")
+        self._np_v4_ends = np.frombuffer(v4_ends, dtype="<u4")
+        self._np_v4_ids = np.frombuffer(v4_ids, dtype="<u4")
+        self._np_v6_starts = np.frombuffer(v6_starts, dtype="S16")
+        self._np_v6_ends = np.frombuffer(v6_ends, dtype="S16")
+        self._np_v6_ids = np.frombuffer(v6_ids, dtype="<u4")
+
+    @classmethod
+    def open(cls, path: str | Path) -> IpRangeIndex:
+        """Memory-map an index file written by :meth:`IpRangeIndexBuilder.write`."""
+        with open(path, "rb") as fh:
+            return cls(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return len(self._v4_starts) + len(self._v6_starts)
+
+    def lookup(self, ip: str) -> dict | None:
+        """
+        Find the record of the range containing ``ip``.
+
+        :param ip: IPv4 or IPv6 address.
+        :return: Record dictionary, or None when no range covers the address.
+        """
+        version, key = _ip_key(ip)
+        if version == 4:
+            starts, ends, ids = self._v4_starts, self._v4_ends, self._v4_ids
+        else:
+            starts, ends, ids = self._v6_starts, self._v6_ends, self._v6_ids
+        i = bisect.bisect_right(starts, key) - 1
+        if i >= 0 and key <= ends[i]:
+            return self.records[ids[i]]
+        return None
+
+    def lookup_ids_v4(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Vectorized IPv4 lookup.
+
+        :param keys: Array of IPv4 addresses as integers.
+        :return: Record ids (int64), -1 where no range matches.
+        """
+        keys = np.asarray(keys, dtype=np.uint32)
+        return self._search(self._np_v4_starts, self._np_v4_ends, self._np_v4_ids, keys)
+
+    def lookup_ids_v6(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Vectorized IPv6 lookup.
+
+        :param keys: Array of 16-byte big-endian addresses (dtype ``S16``).
+        :return: Record ids (int64), -1 where no range matches.
+        """
+        keys = np.asarray(keys, dtype="S16")
+        return self._search(self._np_v6_starts, self._np_v6_ends, self._np_v6_ids, keys)
+
+    def lookup_many(self, ips: Iterable[str]) -> list[dict | None]:
+        """
+        Batch lookup of IP strings (mixed IPv4/IPv6) using vectorized binary search.
+
+        :param ips: IP addresses.
+        :return: One record (or None) per input, in input order.
+        """
+        v4_pos, v4_keys, v6_pos, v6_keys = [], [], [], []
+        for pos, ip in enumerate(ips):
+            version, key = _ip_key(ip)
+            if version == 4:
+                v4_pos.append(pos)
+                v4_keys.append(key)
+            else:
+                v6_pos.append(pos)
+                v6_keys.append(key)
+        result: list[dict | None] = [None] * (len(v4_pos) + len(v6_pos))
+        for positions, ids in (
+            (v4_pos, self.lookup_ids_v4(np.array(v4_keys, dtype=np.uint32))),
+            (v6_pos, self.lookup_ids_v6(np.array(v6_keys, dtype="S16"))),
+        ):
+            for pos, rid in zip(positions, ids.tolist(), strict=True):
+                if rid >= 0:
+                    result[pos] = self.records[rid]
+        return result
+
+    def close(self) -> None:
+        """Release the memory map (the index must not be used afterwards)."""
+        if self._mmap is not None:
+            self._np_v4_starts = self._np_v4_ends = self._np_v4_ids = None
+            self._np_v6_starts = self._np_v6_ends = self._np_v6_ids = None
+            self._v4_starts = self._v4_ends = self._v4_ids = self._v6_ids = None
+            self._v6_starts = self._v6_ends = None
+            self._mmap.close()
+
+    ####################
+    # Internal methods #
+    ####################
+
+    @staticmethod
+    def _u32(buffer: memoryview):
+        """View a little-endian uint32 buffer as a sequence of ints (zero-copy where possible)."""
+        if sys.byteorder == "little":
+            return buffer.cast("B").cast("I")
+        values = array("I", bytes(buffer))
+        values.byteswap()
+        return values
+
+    @staticmethod
+    def _search(starts, ends, ids, keys) -> np.ndarray:
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        if not len(starts):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.searchsorted(starts, keys, side="right") - 1
+        clipped = np.clip(pos, 0, None)
+        hit = (pos >= 0) & (keys <= ends[clipped])
+        return np.where(hit, ids[clipped].astype(np.int64), -1)
+
+
+class IpRangeIndexBuilder:
+    """Collect IP ranges with their geo records and produce an :class:`IpRangeIndex`."""
+
+    def __init__(self) -> None:
+        self._ranges: dict[int, list[tuple]] = {4: [], 6: []}
+        self._records: dict[tuple, int] = {}
+
+    def add_range(self, start_ip: str, end_ip: str, record: dict) -> None:
+        """
+        Add an inclusive range of addresses.
+
+        :param start_ip: First address of the range.
+        :param end_ip: Last address of the range (same IP version as ``start_ip``).
+        :param record: Mapping with any of ``RECORD_FIELDS``.
+        """
+        v_start, start = _ip_key(start_ip)
+        v_end, end = _ip_key(end_ip)
+        if v_start != v_end:
+            raise ValueError(f"Range {start_ip}-{end_ip} mixes IPv4 and IPv6")
+        if start > end:
+            raise ValueError(f"Range {start_ip}-{end_ip} ends before it starts")
+        self._ranges[v_start].append((start, end, self._record_id(record)))
+
+    def add_network(self, network: str, record: dict) -> None:
+        """Add a CIDR network, e.g. ``8.8.8.0/24``."""
+        net = ipaddress.ip_network(network, strict=False)
+        self.add_range(str(net.network_address), str(net.broadcast_address), record)
+
+    def add_response(self, payload: dict) -> None:
+        """Add a recorded ipstack success payload as a single-address range."""
+        if payload.get("success") is False or not payload.get("ip"):
+            return
+        self.add_range(payload["ip"], payload["ip"], payload)
+
+    @classmethod
+    def from_responses(cls, payloads: Iterable[dict]) -> IpRangeIndexBuilder:
+        """Build from recorded ``IpStackPage`` JSON payloads (bulk lists are flattened)."""
+        builder = cls()
+        for payload in payloads:
+            for item in payload if isinstance(payload, list) else [payload]:
+                builder.add_response(item)
+        return builder
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> IpRangeIndexBuilder:
+        """
+        Build from a CSV geo dataset.
+
+        Each row needs either a ``network`` column (CIDR) or ``start_ip``/``end_ip`` columns,
+        plus any of ``RECORD_FIELDS``.
+        """
+        builder = cls()
+        with open(path, newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                record = {k: row.get(k) or None for k in RECORD_FIELDS}
+                for coord in ("latitude", "longitude"):
+                    if record[coord] is not None:
+                        record[coord] = float(record[coord])
+                if row.get("network"):
+                    builder.add_network(row["network"], record)
+                else:
+                    builder.add_range(row["start_ip"], row["end_ip"], record)
+        return builder
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index; overlapping ranges are rejected, duplicates keep the last one."""
+        v4 = self._sorted(4)
+        v6 = self._sorted(6)
+        records = sorted(self._records, key=self._records.get)
+        records_blob = json.dumps(records, separators=(",", ":")).encode()
+        return b"".join(
+            [
+                HEADER.pack(MAGIC, len(v4), len(v6), len(records), len(records_blob)),
+                self._u32_bytes(r[0] for r in v4),
+                self._u32_bytes(r[1] for r in v4),
+                self._u32_bytes(r[2] for r in v4),
+                b"".join(r[0] for r in v6),
+                b"".join(r[1] for r in v6),
+                self._u32_bytes(r[2] for r in v6),
+                records_blob,
+            ]
+        )
+
+    def build(self) -> IpRangeIndex:
+        """Return an in-memory index."""
+        return IpRangeIndex(self.to_bytes())
+
+    def write(self, path: str | Path) -> Path:
+        """Write the index file that :meth:`IpRangeIndex.open` memory-maps."""
+        path = Path(path)
+        path.write_bytes(self.to_bytes())
+        return path
+
+    ####################
+    # Internal methods #
+    ####################
+
+    @staticmethod
+    def _u32_bytes(values: Iterable[int]) -> bytes:
+        packed = array("I", values)
+        if sys.byteorder != "little":
+            packed.byteswap()
+        return packed.tobytes()
+
+    def _record_id(self, record: dict) -> int:
+        key = tuple(record.get(k) for k in RECORD_FIELDS)
+        return self._records.setdefault(key, len(self._records))
+
+    def _sorted(self, version: int) -> list[tuple]:
+        # Same start and end: the later entry wins (newer recording of the same address).
+        unique = {(start, end): rid for start, end, rid in self._ranges[version]}
+        ranges = sorted((start, end, rid) for (start, end), rid in unique.items())
+        for prev, cur in itertools.pairwise(ranges):
+            if cur[0] <= prev[1]:
+                raise ValueError(f"Overlapping IPv{version} ranges: {prev[:2]} and {cur[:2]}")
+        return ranges
+
+
+class DriftReport:
+    """Outcome of comparing a batch of API answers with the offline index."""
+
+    def __init__(self) -> None:
+        self.checked = 0
+        self.not_indexed: list[str] = []
+        self.mismatches: dict[str, list[str]] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def summary(self) -> str:
+        lines = [
+            f"checked={self.checked} not_indexed={len(self.not_indexed)} "
+            f"drifted={len(self.mismatches)}"
+        ]
+        lines += [f"  {ip}: {'; '.join(reasons)}" for ip, reasons in self.mismatches.items()]
+        return "\n".join(lines)
+
+
+class DriftChecker:
+    """
+    Compare ipstack answers with an :class:`IpRangeIndex`.
+
+    :param index: Reference index.
+    :param tolerance_km: Maximum accepted distance between API and reference coordinates.
+    """
+
+    def __init__(self, index: IpRangeIndex, tolerance_km: float = 100.0):
+        self.index = index
+        self.tolerance_km = tolerance_km
+
+    def compare(self, payload: dict, reference: dict) -> list[str]:
+        """
+        Return the list of differences between one API payload and its reference record.
+
+        Country and continent are compared by code when both sides have it, by name otherwise.
+        """
+        reasons = []
+        for code, name in (
+            ("country_code", "country_name"),
+            ("continent_code", "continent_name"),
+        ):
+            field = code if payload.get(code) and reference.get(code) else name
+            actual, expected = payload.get(field), reference.get(field)
+            if actual and expected and actual != expected:
+                reasons.append(f"{field} {actual!r} != {expected!r}")
+        coords = (
+            payload.get("latitude"),
+            payload.get("longitude"),
+            reference.get("latitude"),
+            reference.get("longitude"),
+        )
+        if None not in coords:
+            distance = haversine_km(*coords)
+            if distance > self.tolerance_km:
+                reasons.append(f"location {distance:.0f} km away (> {self.tolerance_km:.0f} km)")
+        return reasons
+
+    def check_batch(self, payloads: Iterable[dict]) -> DriftReport:
+        """Compare many API payloads at once using a vectorized index lookup."""
+        report = DriftReport()
+        items = [p for p in payloads if p.get("success") is not False and p.get("ip")]
+        references = self.index.lookup_many([p["ip"] for p in items])
+        for payload, reference in zip(items, references, strict=True):
+            report.checked += 1
+            if reference is None:
+                report.not_indexed.append(payload["ip"])
+                continue
+            reasons = self.compare(payload, reference)
+            if reasons:
+                report.mismatches[payload["ip"]] = reasons
+        return report
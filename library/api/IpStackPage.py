@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import time
+from collections import deque
+from collections.abc import Iterable
+
 import requests
 from requests.structures import CaseInsensitiveDict
 
+from library.api.RequestCoalescer import RequestCoalescer
+from library.api.TailLatency import TailLatencyGuard
+
 
 class ResponseWrapper:
     """A wrapper around requests.Response to provide additional functionality."""
@@ -35,13 +44,99 @@ class ResponseWrapper:
         return self  # fluent
 
 
+class RequestRecord:
+    """Size and timing of a single HTTP request sent by :class:`IpStackPage`."""
+
+    def __init__(
+        self,
+        url: str,
+        params: dict,
+        status_code: int,
+        elapsed: float,
+        wire_bytes: int,
+        body_bytes: int,
+        encoding: str | None,
+    ):
+        self.url = url
+        self.params = params
+        self.status_code = status_code
+        self.elapsed = elapsed
+        self.wire_bytes = wire_bytes
+        self.body_bytes = body_bytes
+        self.encoding = encoding
+
+    @property
+    def projected(self) -> bool:
+        """Whether the payload was shrunk with the ``fields=`` parameter."""
+        return "fields" in self.params
+
+    def as_dict(self) -> dict:
+        """Return the record as a plain dictionary (JSON serializable)."""
+        return {
+            "url": self.url,
+            "params": dict(self.params),
+            "status_code": self.status_code,
+            "elapsed": self.elapsed,
+            "wire_bytes": self.wire_bytes,
+            "body_bytes": self.body_bytes,
+            "encoding": self.encoding,
+        }
+
+
+def projected_fields(validators: Iterable) -> str | None:
+    """
+    Compute the ``fields=`` value covering everything the validators declared they read.
+
+    :param validators: Validators exposing ``required_fields`` (see ``ValidatorsPage.Validator``).
+    :return: Comma-separated sorted field names, or None when the full payload is required.
+    """
+    needed: set[str] = set()
+    for v in validators:
+        required = getattr(v, "required_fields", None)
+        if required is None:
+            return None
+        needed.update(required)
+    return ",".join(sorted(needed)) or None
+
+
 class IpStackPage:
     """Client for the ipstack API."""
 
-    def __init__(self, base_url: str, access_key: str):
+    REQUEST_LOG_SIZE = 10_000
+
+    def __init__(
+        self,
+        base_url: str,
+        access_key: str,
+        *,
+        coalesce: bool = False,
+        project_fields: bool = False,
+        timeout: float | None = 30.0,
+        tail_latency: TailLatencyGuard | bool = False,
+    ):
+        """
+        Initialize the ipstack client.
+
+        :param base_url: Base URL of the API.
+        :param access_key: Access key for the API.
+        :param coalesce: Share one in-flight request between concurrent identical lookups.
+        :param project_fields: Let :meth:`checked_lookup` request only the fields its
+            validators declare.
+        :param timeout: Fixed per-request timeout in seconds (None waits forever).
+        :param tail_latency: Enable adaptive timeouts and hedged requests; pass True for the
+            default policy or a configured TailLatencyGuard.
+        """
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         self.session.params = {"access_key": access_key}
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        self.coalescer = RequestCoalescer() if coalesce else None
+        self.project_fields = project_fields
+        self.timeout = timeout
+        if tail_latency is True:
+            tail_latency = TailLatencyGuard()
+        self.tail_latency = tail_latency or None
+        self.request_log: deque[RequestRecord] = deque(maxlen=self.REQUEST_LOG_SIZE)
 
     def standard_lookup(
         self,
@@ -62,17 +157,52 @@ class IpStackPage:
         :param output: Output format ('json' or 'xml').
         :return: ResponseWrapper containing the API response.
         """
-        params: dict = {}
-        if hostname:
-            params["hostname"] = hostname
-        if language:
-            params["language"] = language
-        if fields:
-            params["fields"] = fields
-        if output:
-            params["output"] = output
-        r = self.session.get(f"{self.base_url}/{ip}", params=params)
-        return ResponseWrapper(r)
+        params = self._standard_params(hostname, language, fields, output)
+        url = f"{self.base_url}/{ip}"
+        if self.coalescer is None:
+            return self._get(url, params)
+        return self.coalescer.do(self._coalesce_key(ip, params), lambda: self._get(url, params))
+
+    async def standard_lookup_async(
+        self,
+        ip: str,
+        *,
+        hostname: int = 0,
+        language: str | None = None,
+        fields: str | None = None,
+        output: str | None = None,
+    ) -> ResponseWrapper:
+        """
+        Asyncio variant of :meth:`standard_lookup`; the HTTP call runs in a worker thread.
+
+        Concurrent identical lookups are coalesced when the client was created with
+        ``coalesce=True``, both with other coroutines and with threaded callers.
+
+        :return: ResponseWrapper containing the API response.
+        """
+        params = self._standard_params(hostname, language, fields, output)
+        url = f"{self.base_url}/{ip}"
+        if self.coalescer is None:
+            return await asyncio.to_thread(self._get, url, params)
+        return await self.coalescer.do_async(
+            self._coalesce_key(ip, params), lambda: self._get(url, params)
+        )
+
+    def checked_lookup(self, ip: str, *validators, **kwargs) -> ResponseWrapper:
+        """
+        Perform a standard lookup and validate the response.
+
+        With ``project_fields`` enabled and no explicit ``fields`` argument, the request asks only
+        for the union of the fields the validators declare, which shrinks the payload.
+
+        :param ip: IP address to look up.
+        :param validators: Validators to run against the response.
+        :param kwargs: Options forwarded to :meth:`standard_lookup`.
+        :return: ResponseWrapper containing the API response.
+        """
+        if self.project_fields and not kwargs.get("fields"):
+            kwargs["fields"] = projected_fields(validators)
+        return self.standard_lookup(ip, **kwargs).check(*validators)
 
     def bulk_lookup(self, ips: list[str], *, hostname: int = 0) -> ResponseWrapper:
         """
@@ -86,5 +216,67 @@ class IpStackPage:
         if hostname:
             params["hostname"] = hostname
         ip_str = ",".join(ips)
-        r = self.session.get(f"{self.base_url}/{ip_str}", params=params)
+        return self._get(f"{self.base_url}/{ip_str}", params)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    @staticmethod
+    def _standard_params(
+        hostname: int, language: str | None, fields: str | None, output: str | None
+    ) -> dict:
+        """Build the query parameters of a standard lookup, skipping unset options."""
+        params: dict = {}
+        if hostname:
+            params["hostname"] = hostname
+        if language:
+            params["language"] = language
+        if fields:
+            params["fields"] = fields
+        if output:
+            params["output"] = output
+        return params
+
+    @staticmethod
+    def _coalesce_key(ip: str, params: dict) -> tuple:
+        """Key identifying identical lookups: the IP plus every query parameter."""
+        return (
+            ip,
+            params.get("hostname", 0),
+            params.get("language"),
+            params.get("fields"),
+            params.get("output"),
+        )
+
+    def _get(self, url: str, params: dict) -> ResponseWrapper:
+        """Send a GET request, record its size and timing and wrap the response."""
+        start = time.perf_counter()
+        if self.tail_latency is None:
+            r = self.session.get(url, params=params, timeout=self.timeout)
+        else:
+            r = self.tail_latency.call(
+                lambda timeout: self.session.get(url, params=params, timeout=timeout)
+            )
+        elapsed = time.perf_counter() - start
+        self.request_log.append(self._record(url, params, r, elapsed))
         return ResponseWrapper(r)
+
+    @staticmethod
+    def _record(url: str, params: dict, r: requests.Response, elapsed: float) -> RequestRecord:
+        """Build a RequestRecord; wire bytes come from the raw stream before decompression."""
+        body_bytes = len(r.content)
+        wire_bytes = body_bytes
+        raw = getattr(r, "raw", None)
+        if raw is not None and hasattr(raw, "tell"):
+            with contextlib.suppress(OSError, ValueError):
+                wire_bytes = raw.tell() or body_bytes
+        return RequestRecord(
+            url=url,
+            params=params,
+            status_code=r.status_code,
+            elapsed=elapsed,
+            wire_bytes=wire_bytes,
+            body_bytes=body_bytes,
+            encoding=r.headers.get("Content-Encoding"),
+        )
@@ -0,0 +1,394 @@
+"""
+Concurrent load generator for the ipstack endpoints built on :class:`IpStackPage`.
+
+Two load models are supported:
+
+* ``closed``: N virtual users, each sending the next request as soon as the previous answered;
+* ``open``: a fixed arrival rate independent of response times. Latency is measured from the
+  scheduled arrival time, so a saturated server shows up as latency instead of being hidden
+  (no coordinated omission).
+
+Both run on thread or asyncio workers and ramp linearly from ``start`` to the target over
+``ramp_up`` seconds. Example against the local stand-in::
+
+    python -m library.api.LoadGenerator --local --model open --rate 200 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import math
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from library.api.IpStackPage import IpStackPage, ResponseWrapper
+from library.api.LocalIpStack import LocalIpStack
+
+
+def load_ips(path: str | Path) -> list[str]:
+    """
+    Read IP addresses from a file: one per line, or the first column of a CSV file.
+
+    Blank lines, ``#`` comments and a CSV header row are skipped.
+
+    :param path: Path to the input file.
+    :return: List of IP address strings.
+    """
+    ips: list[str] = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.reader(fh):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            value = row[0].strip()
+            if not ips and not any(ch.isdigit() for ch in value):
+                continue  # header
+            ips.append(value)
+    if not ips:
+        raise ValueError(f"No IP addresses found in {path}")
+    return ips
+
+
+def classify(response: ResponseWrapper | None = None, exc: BaseException | None = None) -> str:
+    """
+    Classify an outcome for the error mix.
+
+    :return: ``ok``, ``http_<code>``, the ipstack ``error.type`` of a ``success: false`` body,
+        or the exception class name.
+    """
+    if exc is not None:
+        return type(exc).__name__
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            data = response.json()
+        except ValueError:
+            return "invalid_json"
+        if isinstance(data, dict) and data.get("success") is False:
+            return (data.get("error") or {}).get("type") or "unknown_error"
+    return "ok"
+
+
+class RampProfile:
+    """Linear ramp from ``start`` to ``target`` over ``ramp_up`` seconds, then constant."""
+
+    def __init__(self, target: float, ramp_up: float = 0.0, start: float = 0.0):
+        self.target = target
+        self.ramp_up = ramp_up
+        self.start = start
+
+    def at(self, elapsed: float) -> float:
+        """Return the level (users or requests/s) at ``elapsed`` seconds into the run."""
+        if self.ramp_up <= 0 or elapsed >= self.ramp_up:
+            return self.target
+        return self.start + (self.target - self.start) * elapsed / self.ramp_up
+
+
+class LoadStats:
+    """Thread-safe collector of latencies and outcomes for a load run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.latencies: list[float] = []
+        self.outcomes: Counter[str] = Counter()
+        self._interval_count = 0
+        self._interval_start = self.started
+
+    def add(self, latency: float, outcome: str) -> None:
+        """Record one finished request."""
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes[outcome] += 1
+            self._interval_count += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.outcomes.values())
+
+    @property
+    def errors(self) -> int:
+        return self.total - self.outcomes["ok"]
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank latency percentile over the whole run (seconds)."""
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return None
+        return ordered[max(math.ceil(pct / 100 * len(ordered)), 1) - 1]
+
+    def throughput(self) -> float:
+        """Average completed requests per second since the start of the run."""
+        return self.total / max(time.perf_counter() - self.started, 1e-9)
+
+    def interval_throughput(self) -> float:
+        """Completed requests per second since the previous call."""
+        with self._lock:
+            now = time.perf_counter()
+            rate = self._interval_count / max(now - self._interval_start, 1e-9)
+            self._interval_count = 0
+            self._interval_start = now
+        return rate
+
+    def summary(self) -> dict:
+        """Return the run summary as a plain dictionary."""
+        return {
+            "requests": self.total,
+            "errors": self.errors,
+            "throughput_rps": round(self.throughput(), 2),
+            "latency_ms": {
+                f"p{p}": round((self.percentile(p) or 0) * 1000, 2) for p in (50, 90, 95, 99)
+            },
+            "outcomes": dict(self.outcomes),
+        }
+
+    def format_line(self, interval_rps: float | None = None) -> str:
+        """One-line live report: elapsed, throughput, percentiles and error mix."""
+        elapsed = time.perf_counter() - self.started
+        rps = self.throughput() if interval_rps is None else interval_rps
+        pcts = " ".join(f"p{p}={(self.percentile(p) or 0) * 1000:.1f}ms" for p in (50, 95, 99))
+        mix = ", ".join(f"{k}={v}" for k, v in self.outcomes.most_common() if k != "ok")
+        return (
+            f"[{elapsed:6.1f}s] rps={rps:8.1f} total={self.total} {pcts} "
+            f"errors={self.errors}{f' ({mix})' if mix else ''}"
+        )
+
+
+class LoadGenerator:
+    """
+    Drive ``IpStackPage.standard_lookup`` with a closed- or open-loop load model.
+
+    :param client: Client used for every request (do not enable coalescing for load runs).
+    :param ips: IP addresses to look up, cycled in order.
+    :param model: ``closed`` (virtual users) or ``open`` (arrival rate).
+    :param workers: ``thread`` or ``asyncio``.
+    :param users: Target number of virtual users (closed model).
+    :param rate: Target arrival rate in requests/s (open model).
+    :param duration: Run length in seconds, ramp-up included.
+    :param ramp_up: Seconds to ramp linearly from ``start_level`` to the target.
+    :param start_level: Users or rate at the beginning of the ramp.
+    :param max_concurrency: Upper bound of in-flight requests in the open model.
+    :param report_interval: Seconds between live report lines, 0 disables them.
+    :param reporter: Callable receiving each live report line.
+    :param lookup_kwargs: Extra options forwarded to ``standard_lookup``.
+    """
+
+    def __init__(
+        self,
+        client: IpStackPage,
+        ips: Iterable[str],
+        *,
+        model: str = "closed",
+        workers: str = "thread",
+        users: int = 10,
+        rate: float = 50.0,
+        duration: float = 10.0,
+        ramp_up: float = 0.0,
+        start_level: float = 0.0,
+        max_concurrency: int = 64,
+        report_interval: float = 1.0,
+        reporter: Callable[[str], None] = print,
+        lookup_kwargs: dict | None = None,
+    ):
+        if model not in ("closed", "open"):
+            raise ValueError(f"Unknown load model '{model}', expected 'closed' or 'open'")
+        if workers not in ("thread", "asyncio"):
+            raise ValueError(f"Unknown worker type '{workers}', expected 'thread' or 'asyncio'")
+        self.client = client
+        self.ips = list(ips)
+        if not self.ips:
+            raise ValueError("At least one IP address is required")
+        self.model = model
+        self.workers = workers
+        self.users = users
+        self.duration = duration
+        self.max_concurrency = max_concurrency
+        self.profile = RampProfile(users if model == "closed" else rate, ramp_up, start_level)
+        self.report_interval = report_interval
+        self.reporter = reporter
+        self.lookup_kwargs = lookup_kwargs or {}
+        self._ip_cycle = itertools.cycle(self.ips)
+        self._ip_lock = threading.Lock()
+
+    def run(self) -> LoadStats:
+        """Run the load test and return the collected statistics."""
+        stats = LoadStats()
+        stop = threading.Event()
+        reporter = threading.Thread(target=self._report_loop, args=(stats, stop), daemon=True)
+        if self.report_interval:
+            reporter.start()
+        try:
+            if self.workers == "thread":
+                runner = (
+                    self._run_closed_threads if self.model == "closed" else self._run_open_threads
+                )
+                runner(stats)
+            else:
+                runner = self._run_closed_async if self.model == "closed" else self._run_open_async
+                asyncio.run(runner(stats))
+        finally:
+            stop.set()
+            if reporter.is_alive():
+                reporter.join()
+        return stats
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _next_ip(self) -> str:
+        with self._ip_lock:
+            return next(self._ip_cycle)
+
+    def _one(self, stats: LoadStats, scheduled: float | None = None) -> None:
+        """Send one lookup and record it; open-loop latency counts from the scheduled time."""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = self.client.standard_lookup(self._next_ip(), **self.lookup_kwargs)
+            outcome = classify(response)
+        except Exception as exc:
+            outcome = classify(exc=exc)
+        stats.add(time.perf_counter() - start, outcome)
+
+    async def _one_async(self, stats: LoadStats, scheduled: float | None = None) -> None:
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            response = await self.client.standard_lookup_async(
+                self._next_ip(), **self.lookup_kwargs
+            )
+            outcome = classify(response)
+        except Exception as exc:
+            outcome = classify(exc=exc)
+        stats.add(time.perf_counter() - start, outcome)
+
+    def _active_users(self, stats: LoadStats) -> int:
+        return math.ceil(self.profile.at(time.perf_counter() - stats.started))
+
+    def _run_closed_threads(self, stats: LoadStats) -> None:
+        deadline = stats.started + self.duration
+
+        def user(index: int) -> None:
+            while time.perf_counter() < deadline:
+                if index >= self._active_users(stats):
+                    time.sleep(0.05)
+                    continue
+                self._one(stats)
+
+        threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(self.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _run_open_threads(self, stats: LoadStats) -> None:
+        deadline = stats.started + self.duration
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for scheduled in self._arrivals(stats.started, deadline):
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._one, stats, scheduled)
+
+    async def _run_closed_async(self, stats: LoadStats) -> None:
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max(self.users, 1)))
+        deadline = stats.started + self.duration
+
+        async def user(index: int) -> None:
+            while time.perf_counter() < deadline:
+                if index >= self._active_users(stats):
+                    await asyncio.sleep(0.05)
+                    continue
+                await self._one_async(stats)
+
+        await asyncio.gather(*(user(i) for i in range(self.users)))
+
+    async def _run_open_async(self, stats: LoadStats) -> None:
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_concurrency))
+        deadline = stats.started + self.duration
+        tasks = set()
+        for scheduled in self._arrivals(stats.started, deadline):
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self._one_async(stats, scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    def _arrivals(self, started: float, deadline: float):
+        """Yield scheduled arrival times following the (ramping) rate profile."""
+        scheduled = started
+        while True:
+            rate = self.profile.at(scheduled - started)
+            scheduled += 1.0 / rate if rate > 0 else 0.05
+            if scheduled >= deadline:
+                return
+            if rate > 0:
+                yield scheduled
+
+    def _report_loop(self, stats: LoadStats, stop: threading.Event) -> None:
+        while not stop.wait(self.report_interval):
+            self.reporter(stats.format_line(stats.interval_throughput()))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Load generator for ipstack endpoints")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="ipstack base URL, e.g. http://api.ipstack.com")
+    target.add_argument("--local", action="store_true", help="Start and target the stand-in")
+    parser.add_argument("--access-key", default="local")
+    parser.add_argument("--ips-file", help="File with one IP per line (or CSV, first column)")
+    parser.add_argument("--model", choices=["closed", "open"], default="closed")
+    parser.add_argument("--workers", choices=["thread", "asyncio"], default="thread")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--ramp-up", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--report-interval", type=float, default=1.0)
+    parser.add_argument("--local-latency", type=float, default=0.01)
+    parser.add_argument("--local-rate-limit", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    ips = load_ips(args.ips_file) if args.ips_file else ["8.8.8.8", "1.1.1.1", "134.201.250.155"]
+    stand_in = None
+    base_url = args.base_url
+    if args.local:
+        stand_in = LocalIpStack(latency=args.local_latency, rate_limit=args.local_rate_limit)
+        base_url = stand_in.start().base_url
+    try:
+        generator = LoadGenerator(
+            IpStackPage(base_url, args.access_key),
+            ips,
+            model=args.model,
+            workers=args.workers,
+            users=args.users,
+            rate=args.rate,
+            duration=args.duration,
+            ramp_up=args.ramp_up,
+            max_concurrency=args.max_concurrency,
+            report_interval=args.report_interval,
+        )
+        stats = generator.run()
+    finally:
+        if stand_in is not None:
+            stand_in.stop()
+    print(stats.format_line())
+    print(stats.summary())
+    sys.exit(1 if stats.total == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Local stand-in for the ipstack API.
+
+Serves deterministic ipstack-shaped answers from a background ``ThreadingHTTPServer`` so that
+load and capacity runs are repeatable and do not spend quota. Supports ``fields=``,
+``output=xml``, gzip, the ipstack error format (``success: false``), artificial latency and a
+simple per-second rate limit. Run standalone with ``python -m library.api.LocalIpStack``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import ipaddress
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# (continent_code, continent_name, country_code, country_name, latitude, longitude)
+COUNTRIES = [
+    ("NA", "North America", "US", "United States", 37.751, -97.822),
+    ("EU", "Europe", "DE", "Germany", 51.2993, 9.491),
+    ("EU", "Europe", "FR", "France", 48.8582, 2.3387),
+    ("AS", "Asia", "JP", "Japan", 35.69, 139.69),
+    ("OC", "Oceania", "AU", "Australia", -33.494, 143.2104),
+    ("SA", "South America", "BR", "Brazil", -22.8305, -43.2192),
+    ("AF", "Africa", "ZA", "South Africa", -29.0, 24.0),
+]
+
+ERRORS = {
+    "invalid_access_key": (101, "You have not supplied a valid API Access Key."),
+    "usage_limit_reached": (104, "Your monthly usage limit has been reached."),
+    "invalid_ip_address": (106, "The IP Address supplied is invalid."),
+}
+
+
+def fake_lookup(ip: str) -> dict:
+    """
+    Build a deterministic ipstack-like payload for an IP address.
+
+    :param ip: Valid IPv4 or IPv6 address.
+    :return: Payload with the same top-level keys as a real standard lookup.
+    """
+    addr = ipaddress.ip_address(ip)
+    digest = hashlib.sha256(addr.packed).digest()
+    continent_code, continent_name, country_code, country_name, lat, lon = COUNTRIES[
+        digest[0] % len(COUNTRIES)
+    ]
+    return {
+        "ip": ip,
+        "type": f"ipv{addr.version}",
+        "continent_code": continent_code,
+        "continent_name": continent_name,
+        "country_code": country_code,
+        "country_name": country_name,
+        "region_code": None,
+        "region_name": None,
+        "city": None,
+        "zip": None,
+        "latitude": lat,
+        "longitude": lon,
+        "location": {
+            "geoname_id": None,
+            "capital": None,
+            "languages": [{"code": "en", "name": "English", "native": "English"}],
+            "country_flag": f"https://assets.ipstack.com/flags/{country_code.lower()}.svg",
+            "country_flag_emoji": "",
+            "calling_code": "",
+            "is_eu": continent_code == "EU",
+        },
+    }
+
+
+def error_payload(error_type: str) -> dict:
+    """Build an ipstack error body (see ``IPSTACK_ERROR_SCHEMA``)."""
+    code, info = ERRORS[error_type]
+    return {"success": False, "error": {"code": code, "type": error_type, "info": info}}
+
+
+def to_xml(payload: dict) -> str:
+    """Serialize a flat-ish payload into ipstack's XML layout."""
+
+    def render(value) -> str:
+        if isinstance(value, dict):
+            return "".join(f"<{k}>{render(v)}</{k}>" for k, v in value.items())
+        if isinstance(value, list):
+            return "".join(f"<item>{render(v)}</item>" for v in value)
+        return "" if value is None else str(value)
+
+    return f'<?xml version="1.0" encoding="UTF-8"?><result>{render(payload)}</result>'
+
+
+class LocalIpStack:
+    """
+    Background HTTP server answering like ipstack's standard lookup endpoint.
+
+    :param access_key: The only access key accepted; None accepts any key.
+    :param latency: Fixed delay per request in seconds.
+    :param jitter: Extra uniformly distributed delay in seconds.
+    :param rate_limit: Requests per second above which calls are rejected, None for unlimited.
+    :param rate_limit_status: 429 to reject with HTTP 429, 200 to answer ``usage_limit_reached``.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        access_key: str | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: float | None = None,
+        rate_limit_status: int = 429,
+    ):
+        self.access_key = access_key
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_status = rate_limit_status
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> LocalIpStack:
+        """Start serving in a daemon thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> LocalIpStack:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _rate_limited(self) -> bool:
+        """Fixed one-second window rate limiter."""
+        with self._lock:
+            self.requests_served += 1
+            if self.rate_limit is None:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.rate_limit
+
+    def _answer(self, path: str, query: dict[str, list[str]]) -> tuple[int, dict | list]:
+        """Return the status code and payload for a lookup."""
+        key = query.get("access_key", [None])[0]
+        if not key or (self.access_key is not None and key != self.access_key):
+            return 200, error_payload("invalid_access_key")
+        if self._rate_limited():
+            if self.rate_limit_status == 429:
+                return 429, error_payload("usage_limit_reached")
+            return 200, error_payload("usage_limit_reached")
+
+        payloads = []
+        for ip in unquote(path.strip("/")).split(","):
+            try:
+                payloads.append(fake_lookup(ip))
+            except ValueError:
+                return 200, error_payload("invalid_ip_address")
+        if query.get("hostname", ["0"])[0] == "1":
+            for p in payloads:
+                p["hostname"] = p["ip"]
+        fields = query.get("fields", [None])[0]
+        if fields:
+            wanted = set(fields.split(","))
+            payloads = [{k: v for k, v in p.items() if k in wanted} for p in payloads]
+        return 200, payloads[0] if len(payloads) == 1 else payloads
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                delay = stand_in.latency + random.uniform(0, stand_in.jitter)
+                if delay:
+                    time.sleep(delay)
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                status, payload = stand_in._answer(url.path, query)
+                if query.get("output", ["json"])[0] == "xml":
+                    body = to_xml(payload if isinstance(payload, dict) else {"item": payload})
+                    ctype = "application/xml; charset=utf-8"
+                else:
+                    body = json.dumps(payload)
+                    ctype = "application/json; charset=utf-8"
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Local ipstack stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--access-key", default=None)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args(argv)
+    stand_in = LocalIpStack(
+        host=args.host,
+        port=args.port,
+        access_key=args.access_key,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+    )
+    print(f"Serving ipstack stand-in on {stand_in.base_url}")
+    try:
+        stand_in._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
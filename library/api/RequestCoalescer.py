@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class CoalescerStats:
+    """Counters describing how many calls were served by a shared in-flight request."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dictionary (handy for reports)."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+class _Flight:
+    """A single in-flight call shared by every thread that asked for the same key."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class RequestCoalescer:
+    """
+    Share one in-flight call between concurrent callers asking for the same key (singleflight).
+
+    The first caller for a key becomes the leader and executes the function, every other caller
+    that arrives before it finishes waits and receives the same result (or the same exception).
+    Works for threads via :meth:`do` and for asyncio via :meth:`do_async`; async callers are
+    coalesced per event loop first and then join the thread-level flight, so both worlds share
+    a single request.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._async_flights: dict[tuple[int, Hashable], asyncio.Task] = {}
+        self.stats = CoalescerStats()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Execute ``fn`` once for all concurrent callers with the same key.
+
+        :param key: Hashable identifier of the call (e.g. the request parameters).
+        :param fn: Zero-argument callable performing the actual work.
+        :return: The value returned by ``fn`` for the leader call.
+        :raise: Whatever ``fn`` raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            self.stats.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.stats.executions += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                self.stats.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Async counterpart of :meth:`do`; the blocking ``fn`` runs in a worker thread.
+
+        The flight is a task every caller (the first one included) awaits through
+        :func:`asyncio.shield`, so cancelling one caller never cancels the shared work or the
+        other callers waiting for it.
+
+        :param key: Hashable identifier of the call.
+        :param fn: Zero-argument blocking callable performing the actual work.
+        :return: The value returned by ``fn`` for the leader call.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            task = self._async_flights.get(loop_key)
+            if task is None:
+                task = loop.create_task(asyncio.to_thread(self.do, key, fn))
+                self._async_flights[loop_key] = task
+                task.add_done_callback(lambda done: self._async_done(loop_key, done))
+            else:
+                self.stats.calls += 1
+                self.stats.coalesced += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Return the number of keys currently being executed."""
+        with self._lock:
+            return len(self._flights)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _async_done(self, loop_key: tuple[int, Hashable], task: asyncio.Task) -> None:
+        """Drop a finished async flight; its exception counts as retrieved even if nobody waits."""
+        with self._lock:
+            if self._async_flights.get(loop_key) is task:
+                del self._async_flights[loop_key]
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+
+class LatencyHistogram:
+    """Rolling window of the most recent request latencies (seconds)."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample to the window."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float | None:
+        """
+        Return the nearest-rank percentile of the window.
+
+        :param pct: Percentile between 0 and 100.
+        :return: Latency in seconds, or None when the window is empty.
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+
+class TailLatencyStats:
+    """Counters of the tail-latency mode."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedges_skipped_budget = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters as a plain dictionary (handy for reports)."""
+        return {
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "hedges_skipped_budget": self.hedges_skipped_budget,
+        }
+
+
+class _Flight:
+    """Primary/hedge state of one call, settled by the first success or the last failure."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.in_flight = 1
+        self.primary_done = False
+        self.winner: str | None = None
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+def _close(result: Any) -> None:
+    """Release the connection of a losing response."""
+    close = getattr(result, "close", None)
+    if callable(close):
+        close()
+
+
+class _HedgeScheduler:
+    """One daemon thread firing hedge callbacks at their deadlines (no thread per call)."""
+
+    def __init__(self) -> None:
+        self._heap: list[list] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def schedule(self, delay: float, action: Callable[[], None]) -> list:
+        """Run ``action`` after ``delay`` seconds unless cancelled; returns the cancel handle."""
+        entry = [time.monotonic() + delay, next(self._seq), action]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hedge-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    @staticmethod
+    def cancel(entry: list) -> None:
+        entry[2] = None
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait_for = self._heap[0][0] - time.monotonic()
+                    if wait_for <= 0:
+                        break
+                    self._cond.wait(wait_for)
+                if self._closed:
+                    return
+                action = heapq.heappop(self._heap)[2]
+            if action is not None:
+                action()
+
+
+class TailLatencyGuard:
+    """
+    Adaptive timeouts and hedged requests driven by a rolling latency histogram.
+
+    Every call gets a timeout of ``timeout_multiplier`` x p99 of recent latencies (clamped to
+    ``[min_timeout, max_timeout]``). When the first attempt has not answered by the p95 mark a
+    duplicate attempt is sent and whichever succeeds first is returned at once. Hedges are capped at
+    ``hedge_budget`` x requests so quota use stays bounded. Until ``min_samples`` latencies are
+    known no hedges are sent and ``default_timeout`` is used. The histogram only warms up across
+    many calls, so share one guard between ``IpStackPage`` instances and ``close()`` it at the end.
+    """
+
+    def __init__(
+        self,
+        *,
+        hedge_percentile: float = 95,
+        timeout_percentile: float = 99,
+        timeout_multiplier: float = 3.0,
+        min_timeout: float = 1.0,
+        max_timeout: float = 30.0,
+        default_timeout: float = 10.0,
+        min_samples: int = 20,
+        hedge_budget: float = 0.05,
+        window: int = 1000,
+        max_workers: int = 64,
+    ):
+        self.hedge_percentile = hedge_percentile
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_timeout = default_timeout
+        self.min_samples = min_samples
+        self.hedge_budget = hedge_budget
+        self.histogram = LatencyHistogram(window)
+        self.stats = TailLatencyStats()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._scheduler = _HedgeScheduler()
+
+    def timeout(self) -> float:
+        """Return the adaptive timeout for the next attempt (seconds)."""
+        if len(self.histogram) < self.min_samples:
+            return self.default_timeout
+        tail = self.histogram.percentile(self.timeout_percentile) or self.default_timeout
+        return min(max(tail * self.timeout_multiplier, self.min_timeout), self.max_timeout)
+
+    def hedge_delay(self) -> float | None:
+        """Return how long to wait before hedging, or None while the histogram is warming up."""
+        if len(self.histogram) < self.min_samples:
+            return None
+        return self.histogram.percentile(self.hedge_percentile)
+
+    def call(self, fn: Callable[[float], Any]) -> Any:
+        """
+        Run ``fn`` with an adaptive timeout, hedging it when it is slower than the p95 mark.
+
+        While the histogram warms up no hedge can be sent and the attempt runs on the caller's
+        thread. Afterwards both attempts run in the worker pool and the caller returns as soon
+        as the first one succeeds; the losing response is closed when it arrives.
+
+        :param fn: Callable performing one attempt; receives the timeout in seconds.
+        :return: The result of the first successful attempt.
+        :raise: The exception of the last attempt when every attempt failed.
+        """
+        with self._lock:
+            self.stats.requests += 1
+        timeout = self.timeout()
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._attempt(fn, timeout)
+
+        flight = _Flight()
+        self._pool.submit(self._attempt, fn, timeout).add_done_callback(
+            lambda future: self._settle(flight, "primary", future)
+        )
+        entry = self._scheduler.schedule(delay, lambda: self._hedge(fn, timeout, flight))
+        flight.done.wait()
+        self._scheduler.cancel(entry)
+        if flight.winner is None:
+            raise flight.error
+        if flight.winner == "hedge":
+            with self._lock:
+                self.stats.hedges_won += 1
+        return flight.result
+
+    def close(self) -> None:
+        """Release the worker threads; attempts still in flight finish in the background."""
+        self._scheduler.close()
+        self._pool.shutdown(wait=False)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _attempt(self, fn: Callable[[float], Any], timeout: float) -> Any:
+        """Run one attempt, timed from when it actually starts; record it when it succeeds."""
+        start = time.perf_counter()
+        result = fn(timeout)
+        self.histogram.record(time.perf_counter() - start)
+        return result
+
+    def _hedge(self, fn: Callable[[float], Any], timeout: float, flight: _Flight) -> None:
+        """Scheduler callback: send the hedge unless the primary has answered meanwhile."""
+        with flight.lock:
+            if flight.primary_done or not self._take_hedge_budget():
+                return
+            flight.in_flight += 1
+        self._pool.submit(self._attempt, fn, timeout).add_done_callback(
+            lambda future: self._settle(flight, "hedge", future)
+        )
+
+    @staticmethod
+    def _settle(flight: _Flight, name: str, future: Future) -> None:
+        """Attempt callback: the first success wins, later ones are closed."""
+        error = future.exception()
+        loser = None
+        with flight.lock:
+            flight.in_flight -= 1
+            if name == "primary":
+                flight.primary_done = True
+            if error is None and flight.winner is None:
+                flight.winner, flight.result = name, future.result()
+            elif error is None:
+                loser = future.result()
+            else:
+                flight.error = error
+            if flight.winner is not None or flight.in_flight == 0:
+                flight.done.set()
+        if loser is not None:
+            _close(loser)
+
+    def _take_hedge_budget(self) -> bool:
+        """Reserve one hedge if the budget (fraction of all requests) allows it."""
+        with self._lock:
+            if self.stats.hedges_fired + 1 > self.stats.requests * self.hedge_budget:
+                self.stats.hedges_skipped_budget += 1
+                return False
+            self.stats.hedges_fired += 1
+            return True
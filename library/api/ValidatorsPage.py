@@ -1,12 +1,24 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
 from library.api.IpStackPage import ResponseWrapper
 
+if TYPE_CHECKING:
+    from library.api.IpRangeIndex import IpRangeIndex
+
 
 class Validator:
-    """Base class for all validators."""
+    """
+    Base class for all validators.
+
+    ``required_fields`` declares which top-level JSON fields the validator reads, so the client
+    can project the payload with ipstack's ``fields=`` parameter. An empty set means the body
+    fields are not inspected at all, ``None`` means the whole payload is needed.
+    """
+
+    required_fields: frozenset[str] | None = None
 
     def validate(self, response: ResponseWrapper) -> None:  # pragma: no cover
         """Validate the response. To be implemented by subclasses."""
@@ -16,6 +28,8 @@ class Validator:
 class StatusCodeIs(Validator):
     """Validator to check if the response status code matches the expected value."""
 
+    required_fields = frozenset()
+
     def __init__(self, expected: int):
         self.expected = expected
 
@@ -31,6 +45,8 @@ class StatusCodeIs(Validator):
 class HeaderStartsWith(Validator):
     """Validator to check if a specific header starts with a given prefix."""
 
+    required_fields = frozenset()
+
     def __init__(self, header: str, prefix: str):
         self.header = header
         self.prefix = prefix
@@ -47,6 +63,8 @@ class HeaderStartsWith(Validator):
 class IsJSON(Validator):
     """Validator to check if the response is in JSON format."""
 
+    required_fields = frozenset()
+
     def validate(self, response: ResponseWrapper) -> None:
         """Validate that the response is in JSON format."""
         ctype = response.headers.get("Content-Type", "")
@@ -61,6 +79,7 @@ class JsonFieldEquals(Validator):
     def __init__(self, field: str, expected):
         self.field = field
         self.expected = expected
+        self.required_fields = frozenset([field])
 
     def validate(self, response: ResponseWrapper) -> None:
         """Validate that the specified JSON field equals the expected value."""
@@ -75,6 +94,7 @@ class JsonHasKeys(Validator):
 
     def __init__(self, keys: Iterable[str]):
         self.keys = list(keys)
+        self.required_fields = frozenset(self.keys)
 
     def validate(self, response: ResponseWrapper) -> None:
         """Validate that the JSON response contains the specified keys."""
@@ -87,7 +107,14 @@ class JsonHasKeys(Validator):
 
 
 class JsonExactKeys(Validator):
-    """Validator to check if the JSON response contains exactly the specified keys."""
+    """
+    Validator to check if the JSON response contains exactly the specified keys.
+
+    It needs the full payload: with ``fields=`` the server returns what was asked for, which
+    would make the check pass trivially alone and fail next to other key validators.
+    """
+
+    required_fields = None
 
     def __init__(self, keys: Iterable[str]):
         self.keys = sorted(list(keys))
@@ -103,6 +130,8 @@ class JsonExactKeys(Validator):
 class IsXML(Validator):
     """Validator to check if the response is in XML format."""
 
+    required_fields = frozenset()
+
     def validate(self, response: ResponseWrapper) -> None:
         """Validate that the response is in XML format."""
         ctype = response.headers.get("Content-Type", "")
@@ -122,3 +151,25 @@ class ContentContains(Validator):
         missing = [n for n in self.needles if n not in body]
         if missing:
             raise AssertionError(f"Response content does not contain: {missing}")
+
+
+class MatchesIpRangeIndex(Validator):
+    """Validator to check the geo data of a JSON response against an offline IP-range index."""
+
+    required_fields = frozenset(["ip", "country_code", "continent_code", "latitude", "longitude"])
+
+    def __init__(self, index: IpRangeIndex, tolerance_km: float = 100.0):
+        # Imported here: the index pulls in numpy, which the other validators do not need
+        from library.api.IpRangeIndex import DriftChecker
+
+        self.checker = DriftChecker(index, tolerance_km)
+
+    def validate(self, response: ResponseWrapper) -> None:
+        """Validate that country, continent and coordinates agree with the indexed range."""
+        data = response.json()
+        reference = self.checker.index.lookup(data["ip"])
+        if reference is None:
+            raise AssertionError(f"IP {data['ip']} is not covered by the offline index")
+        reasons = self.checker.compare(data, reference)
+        if reasons:
+            raise AssertionError(f"IP {data['ip']} drifted from the offline index: {reasons}")
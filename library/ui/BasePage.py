@@ -5,9 +5,14 @@ from selenium.common import NoSuchElementException, TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as ec
-from selenium.webdriver.support.wait import WebDriverWait
 
+from library.ui.BrowserEvents import CHANNEL, BrowserEventStream
+from library.ui.HarArchive import HarRecorder
+from library.ui.LocatorRegistry import REGISTRY, ElementCache, Locator
+from library.ui.WaitEngine import WaitEngine
 
+
+@REGISTRY.register_class("BasePage")
 class Locators:
     """Locators for the Base page."""
 
@@ -26,6 +31,9 @@ class BasePage:
         :param driver: Web driver instance
         """
         self.driver = driver
+        self.events = BrowserEventStream.of(driver)
+        self.waits = WaitEngine(driver)
+        self.elements = ElementCache.of(driver)
 
     def menu_click(self, menu_name: str) -> None:
         """
@@ -35,8 +43,11 @@ class BasePage:
         """
         try:
             xpath = self._format_tuple(Locators.ANY_TEXT_OBJECT, menu_name)
-            WebDriverWait(self.driver, 30).until(ec.element_to_be_clickable(xpath)).click()
-            self.wait_dome_to_load()
+            with self.waits.budget(30):
+                element = self.get_clickable_element(xpath)
+                since = self.navigation_mark()
+                element.click()
+                self.wait_dome_to_load(since=since)
         except NoSuchElementException as exc:
             raise NoSuchElementException(f"Menu with name '{menu_name}' not found") from exc
 
@@ -49,7 +60,10 @@ class BasePage:
         :return: WebElement, the clickable element.
         """
         try:
-            element = WebDriverWait(self.driver, timeout).until(ec.element_to_be_clickable(xpath))
+            element = self.waits.until(
+                lambda d: self.elements.use(xpath, lambda e: ec.element_to_be_clickable(e)(d)),
+                timeout,
+            )
             return element
         except NoSuchElementException as exc:
             raise NoSuchElementException(f"Element with name '{xpath}' not found") from exc
@@ -67,8 +81,8 @@ class BasePage:
         :return: WebElement, the clickable element.
         """
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                ec.visibility_of_element_located(xpath)
+            element = self.waits.until(
+                lambda d: self.elements.use(xpath, lambda e: ec.visibility_of(e)(d)), timeout
             )
             return element
         except NoSuchElementException as exc:
@@ -78,44 +92,78 @@ class BasePage:
                 f"Element with name '{xpath}' not clickable after {timeout} seconds"
             ) from exc
 
-    def find_elements_by_xpath(self, xpath: tuple) -> list[WebElement]:
+    def find_elements_by_xpath(self, xpath: tuple, timeout: float = 0) -> list[WebElement]:
         """
         Find an elements by its XPath.
 
+        Returns the current matches right away; pass a timeout to wait for at least one.
+
         :param xpath: tuple, the locator of the elements to find.
-        :return: List of WebElements, the found elements.
+        :param timeout: float, the maximum time to wait for a non-empty result.
+        :return: List of WebElements, the found elements (empty after the timeout).
         """
+        if timeout <= 0:
+            return self.elements.find_all(xpath)
         try:
-            elements = self.driver.find_elements(*xpath)
+            elements = self.waits.until(lambda d: self.elements.find_all(xpath), timeout)
             return elements
-        except NoSuchElementException as exc:
-            raise NoSuchElementException(f"Element with name '{xpath}' not found") from exc
+        except TimeoutException:
+            return []
 
-    def find_element_by_xpath(self, xpath: tuple) -> WebElement:
+    def find_element_by_xpath(self, xpath: tuple, timeout: float = 10) -> WebElement:
         """
         Find an element by its XPath.
 
         :param xpath: tuple, the locator of the element to find.
+        :param timeout: float, the maximum time to wait for the element.
         :return: WebElement, the found element.
         """
         try:
-            elements = self.driver.find_element(*xpath)
+            # The handle is returned to the caller, so a cached one is checked before reuse
+            elements = self.waits.until(
+                lambda d: self.elements.find(xpath, revalidate=True), timeout
+            )
             return elements
-        except NoSuchElementException as exc:
+        except TimeoutException as exc:
             raise NoSuchElementException(f"Element with name '{xpath}' not found") from exc
 
-    def wait_dome_to_load(self, timeout: int = 30) -> None:
+    def navigation_mark(self) -> int | None:
+        """
+        Mark to take right before an action that may navigate, for :meth:`wait_dome_to_load`.
+
+        :return: Event stream mark, None when browser events are off.
+        """
+        return self.events.mark() if self.events is not None else None
+
+    def wait_dome_to_load(self, timeout: int = 30, since: int | None = None) -> None:
         """
         Wait for the DOM to load completely.
 
+        Under the ``eager``/``none`` page-load strategies an ``interactive`` document is enough.
+
         :param timeout: int, the maximum time to wait for the DOM to load.
+        :param since: :meth:`navigation_mark` taken before the triggering action, so a
+            navigation that has not been reported yet is still waited for.
         """
+        # Called after every page-changing action, so cached element handles start over here
+        self.elements.invalidate()
+        eager = self.driver.capabilities.get("pageLoadStrategy", "normal") != "normal"
         try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+            if self.events is not None:
+                event = "browsingContext.domContentLoaded" if eager else "browsingContext.load"
+                self.events.wait_for_load(self.waits.remaining(timeout), event=event, since=since)
+            else:
+                ready_states = ("interactive", "complete") if eager else ("complete",)
+                self.waits.until(
+                    lambda d: d.execute_script("return document.readyState") in ready_states,
+                    timeout,
+                )
         except TimeoutException as exc:
             raise TimeoutException(f"DOM did not load after {timeout} seconds") from exc
+        # Response bodies are only retrievable while their document is alive
+        recorder = HarRecorder.of(self.driver)
+        if recorder is not None:
+            recorder.collect()
 
     @staticmethod
     def explicit_wait(seconds: int) -> None:
@@ -132,12 +180,16 @@ class BasePage:
 
         :param timeout: int, the maximum time to wait for the stream to load.
         """
+        if self.events is not None:
+            self._wait_for_stream_event(timeout)
+            return
         try:
-            WebDriverWait(self.driver, timeout).until(
+            self.waits.until(
                 lambda d: d.execute_script(
                     "return document.querySelector('video') !== null && "
                     "document.querySelector('video').readyState === 4"
-                )
+                ),
+                timeout,
             )
         except TimeoutException as exc:
             raise TimeoutException(f"Stream did not load after {timeout} seconds") from exc
@@ -150,6 +202,38 @@ class BasePage:
         """
         self.driver.save_screenshot(file_path)
 
+    def _wait_for_stream_event(self, timeout: int) -> None:
+        """
+        Event-driven variant of wait_for_stream_to_load: one readyState check for a video that is
+        already loaded, then wait for the preload script to report ``canplaythrough``.
+
+        :param timeout: int, the maximum time to wait for the stream to load.
+        """
+        since = self.events.mark()
+        if self.driver.execute_script(
+            "const v = document.querySelector('video'); return v !== null && v.readyState === 4"
+        ):
+            return
+        try:
+            self.events.wait_for(
+                "script.message",
+                self._is_video_ready,
+                since=since,
+                timeout=self.waits.remaining(timeout),
+            )
+        except TimeoutException as exc:
+            raise TimeoutException(f"Stream did not load after {timeout} seconds") from exc
+
+    @staticmethod
+    def _is_video_ready(event) -> bool:
+        """Whether a ``script.message`` is our preload script reporting a playable video."""
+        if event.params.get("channel") != CHANNEL:
+            return False
+        data = event.data
+        if not isinstance(data, dict):
+            return False
+        return data.get("tag") == "VIDEO" and data.get("kind") == "canplaythrough"
+
     @staticmethod
     def _format_tuple(tpl: tuple, format_value: str) -> tuple[str, str]:
         """
@@ -158,6 +242,8 @@ class BasePage:
         :param tpl: tuple to format
         :param format_value: value to insert into the string
         """
+        if isinstance(tpl, Locator):
+            return tpl.format(format_value)
         lst = list(tpl)
         lst[1] = lst[1].format(format_value)
         tuple_from_list = cast(tuple[str, str], tuple(lst))
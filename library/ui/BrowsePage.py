@@ -4,8 +4,10 @@ from selenium.common import NoSuchElementException
 from selenium.webdriver.common.by import By
 
 from library.ui.BasePage import BasePage
+from library.ui.LocatorRegistry import REGISTRY
 
 
+@REGISTRY.register_class("BrowsePage")
 class Locators:
     """Locators for the Browse page."""
 
@@ -30,10 +32,12 @@ class BrowsePage(BasePage):
         :param category_name: str, the name of the category to search for.
         :raise: NoSuchElementException
         """
-        search_field = self.get_clickable_element(Locators.SEARCH_INPUT)
-        search_field.clear()
-        search_field.send_keys(category_name)
-        self.wait_dome_to_load()
+        with self.waits.budget(30):
+            search_field = self.get_clickable_element(Locators.SEARCH_INPUT)
+            search_field.clear()
+            since = self.navigation_mark()
+            search_field.send_keys(category_name)
+            self.wait_dome_to_load(since=since)
 
     def select_category_from_search_results(self, category_name: str) -> None:
         """
@@ -43,8 +47,11 @@ class BrowsePage(BasePage):
         :raise: NoSuchElementException
         """
         xpath = self._format_tuple(Locators.CATEGORY_LINK, category_name)
-        self.get_clickable_element(xpath).click()
-        self.wait_dome_to_load()
+        with self.waits.budget(30):
+            link = self.get_clickable_element(xpath)
+            since = self.navigation_mark()
+            link.click()
+            self.wait_dome_to_load(since=since)
 
     def verify_category_present(self, category_name: str) -> None:
         """
@@ -54,7 +61,7 @@ class BrowsePage(BasePage):
         :return: bool, True if the category is present, False otherwise.
         """
         xpath = self._format_tuple(Locators.CATEGORY_LINK, category_name)
-        elements = self.find_elements_by_xpath(xpath)
+        elements = self.find_elements_by_xpath(xpath, timeout=10)
         assert len(elements) > 0, (
             f"Category with name '{category_name}' not found in search results"
         )
@@ -65,11 +72,13 @@ class BrowsePage(BasePage):
 
         :return: None
         """
-        streams = self._get_all_available_streams()
-        if not streams:
-            raise NoSuchElementException("No streams available to open")
-        random.choice(streams).click()
-        self.wait_dome_to_load()
+        with self.waits.budget(30):
+            streams = self._get_all_available_streams()
+            if not streams:
+                raise NoSuchElementException("No streams available to open")
+            since = self.navigation_mark()
+            random.choice(streams).click()
+            self.wait_dome_to_load(since=since)
 
     ####################
     # Internal methods #
@@ -81,5 +90,5 @@ class BrowsePage(BasePage):
 
         :return: list of WebElement, all available streams.
         """
-        streams = self.find_elements_by_xpath(Locators.STREAM_LIST)
+        streams = self.find_elements_by_xpath(Locators.STREAM_LIST, timeout=10)
         return streams
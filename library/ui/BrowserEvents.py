@@ -0,0 +1,384 @@
+"""
+Push-based browser events over WebDriver BiDi.
+
+A :class:`BrowserEventStream` subscribes to console/JS log entries, network requests and
+navigation events of the test's top-level browsing context and keeps them in a bounded ring
+buffer. Page objects can wait on those events instead of polling with ``execute_script``, and
+the buffer is dumped next to failure screenshots. A preload script reports media element state
+changes (``loadeddata``, ``canplaythrough``, ``playing``, ``error``) as ``script.message``
+events, so stream readiness is pushed as well.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.bidi.common import command_builder
+
+EVENTS = (
+    "log.entryAdded",
+    "network.beforeRequestSent",
+    "network.responseCompleted",
+    "network.fetchError",
+    "browsingContext.navigationStarted",
+    "browsingContext.fragmentNavigated",
+    "browsingContext.historyUpdated",
+    "browsingContext.domContentLoaded",
+    "browsingContext.load",
+    "script.message",
+)
+# Navigations that stay in the same document and therefore complete without a load event
+SAME_DOCUMENT = ("browsingContext.fragmentNavigated", "browsingContext.historyUpdated")
+CHANNEL = "aqa-page-events"
+# Media events do not bubble, so they are caught in the capture phase on the document.
+MEDIA_PRELOAD_SCRIPT = """(send) => {
+  for (const kind of ['loadeddata', 'canplaythrough', 'playing', 'error']) {
+    document.addEventListener(kind, (e) => {
+      if (e.target instanceof HTMLMediaElement) {
+        send({kind, tag: e.target.tagName, src: e.target.currentSrc || '',
+              readyState: e.target.readyState});
+      }
+    }, true);
+  }
+}"""
+
+_STREAMS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def remote_value(value: dict):
+    """
+    Convert a serialized BiDi remote value into plain Python data.
+
+    :param value: ``{"type": ..., "value": ...}`` as sent by the browser.
+    """
+    kind = value.get("type")
+    if kind in ("object", "map"):
+        return {
+            key if isinstance(key, str) else str(remote_value(key)): remote_value(item)
+            for key, item in value.get("value", [])
+        }
+    if kind in ("array", "set"):
+        return [remote_value(item) for item in value.get("value", [])]
+    return value.get("value")
+
+
+class BrowserEvent:
+    """
+    One BiDi event as received.
+
+    :param seq: Position in the stream, increasing by one per event.
+    :param method: BiDi event name, e.g. ``browsingContext.load``.
+    :param params: Event parameters.
+    :param received: ``time.monotonic()`` at arrival.
+    """
+
+    def __init__(self, seq: int, method: str, params: dict, received: float):
+        self.seq = seq
+        self.method = method
+        self.params = params
+        self.received = received
+
+    @property
+    def context(self) -> str | None:
+        """Browsing context the event belongs to, if it names one."""
+        if "context" in self.params:
+            return self.params["context"]
+        return self.params.get("source", {}).get("context")
+
+    @property
+    def data(self):
+        """Payload of a ``script.message`` event as plain data."""
+        return remote_value(self.params.get("data", {}))
+
+    def as_dict(self, started: float = 0.0) -> dict:
+        return {
+            "seq": self.seq,
+            "t_ms": round((self.received - started) * 1000, 1),
+            "method": self.method,
+            "params": self.params,
+        }
+
+
+class _RawEvent:
+    """Lets ``WebSocketConnection.add_callback`` hand over the untouched params dict."""
+
+    def __init__(self, method: str):
+        self.event_class = method
+
+    @staticmethod
+    def from_json(params: dict) -> dict:
+        return params
+
+
+class BrowserEventStream:
+    """
+    Bounded, thread-safe buffer of BiDi events for one browsing context.
+
+    The driver must have been created with ``options.enable_bidi = True``.
+
+    :param driver: Web driver instance
+    :param capacity: Ring buffer size; the oldest events are dropped first.
+    :param events: BiDi event names to subscribe to.
+    """
+
+    def __init__(self, driver, *, capacity: int = 5000, events: Iterable[str] = EVENTS):
+        self.driver = driver
+        self.capacity = capacity
+        self.event_names = tuple(events)
+        self.dropped = 0
+        self.started = time.monotonic()
+        self._buffer: deque[BrowserEvent] = deque(maxlen=capacity)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._conn = None
+        self._contexts: list[str] = []
+        self._callback_ids: list[tuple[_RawEvent, int]] = []
+        self._preload_script: str | None = None
+
+    @classmethod
+    def of(cls, driver) -> BrowserEventStream | None:
+        """
+        Return the running stream of a driver, or None when events are not enabled.
+
+        :param driver: Web driver instance
+        """
+        return _STREAMS.get(driver)
+
+    def start(self) -> BrowserEventStream:
+        """Subscribe to the current top-level browsing context and register the stream."""
+        self._conn = self.driver.script.conn
+        self._contexts = [self.driver.current_window_handle]
+        for name in self.event_names:
+            event = _RawEvent(name)
+            callback_id = self._conn.add_callback(event, self._callback(name))
+            self._callback_ids.append((event, callback_id))
+        self._conn.execute(
+            command_builder(
+                "session.subscribe",
+                {"events": list(self.event_names), "contexts": self._contexts},
+            )
+        )
+        if "script.message" in self.event_names:
+            result = self._conn.execute(
+                command_builder(
+                    "script.addPreloadScript",
+                    {
+                        "functionDeclaration": MEDIA_PRELOAD_SCRIPT,
+                        "arguments": [{"type": "channel", "value": {"channel": CHANNEL}}],
+                        "contexts": self._contexts,
+                    },
+                )
+            )
+            self._preload_script = result.get("script")
+        _STREAMS[self.driver] = self
+        return self
+
+    def stop(self) -> None:
+        """Unsubscribe and unregister; buffered events stay readable."""
+        if _STREAMS.get(self.driver) is self:
+            del _STREAMS[self.driver]
+        if self._conn is None:
+            return
+        for event, callback_id in self._callback_ids:
+            self._conn.remove_callback(event, callback_id)
+        self._callback_ids.clear()
+        # The browsing context may already be gone at teardown
+        with contextlib.suppress(WebDriverException):
+            if self._preload_script:
+                self._conn.execute(
+                    command_builder("script.removePreloadScript", {"script": self._preload_script})
+                )
+            self._conn.execute(
+                command_builder(
+                    "session.unsubscribe",
+                    {"events": list(self.event_names), "contexts": self._contexts},
+                )
+            )
+        self._conn = None
+
+    def mark(self) -> int:
+        """Sequence number the next event will get; pass it as ``since`` to ignore older ones."""
+        with self._condition:
+            return self._seq
+
+    def events(self, method: str | None = None, *, since: int = 0) -> list[BrowserEvent]:
+        """
+        Snapshot of buffered events.
+
+        :param method: Only events with this name.
+        :param since: Only events at or after this mark.
+        """
+        with self._condition:
+            return [
+                e for e in self._buffer if e.seq >= since and (method is None or e.method == method)
+            ]
+
+    def wait_for(
+        self,
+        method: str | tuple[str, ...],
+        predicate: Callable[[BrowserEvent], bool] | None = None,
+        *,
+        since: int = 0,
+        timeout: float = 30,
+    ) -> BrowserEvent:
+        """
+        Block until a matching event is (or was, after ``since``) received.
+
+        :param method: BiDi event name, or a tuple of names any of which matches.
+        :param predicate: Extra condition on the event.
+        :param since: Mark from :meth:`mark`; earlier events do not count.
+        :param timeout: Seconds to wait.
+        :return: The first matching event.
+        :raise: TimeoutException
+        """
+        methods = (method,) if isinstance(method, str) else method
+        deadline = time.monotonic() + timeout
+        checked = since
+        with self._condition:
+            while True:
+                for event in self._buffer:
+                    if event.seq < checked or event.method not in methods:
+                        continue
+                    if predicate is None or predicate(event):
+                        return event
+                checked = self._seq
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutException(f"No {method} event after {timeout} seconds")
+                self._condition.wait(remaining)
+
+    def pending_navigation(self, event: str = "browsingContext.load") -> BrowserEvent | None:
+        """
+        The latest ``navigationStarted`` of the top-level context not followed by ``event`` yet.
+
+        :param event: Event that completes a navigation (``load`` or ``domContentLoaded``).
+        """
+        context = self._contexts[0] if self._contexts else None
+        pending = None
+        for received in self.events():
+            if received.context != context:
+                continue
+            if received.method == "browsingContext.navigationStarted":
+                pending = received
+            elif (
+                received.method == event
+                and pending is not None
+                and received.params.get("navigation") in (None, pending.params.get("navigation"))
+            ):
+                pending = None
+        return pending
+
+    def wait_for_load(
+        self,
+        timeout: float = 30,
+        event: str = "browsingContext.load",
+        *,
+        since: int | None = None,
+        start_timeout: float = 0.5,
+    ) -> None:
+        """
+        Return once no top-level navigation is in flight.
+
+        Right after a click the navigation it triggers may not have been reported yet. Pass the
+        :meth:`mark` taken before the action as ``since`` and the wait first gives a
+        ``navigationStarted`` after that mark up to ``start_timeout`` seconds to arrive. A
+        same-document route change (``fragmentNavigated``/``historyUpdated``) completes the wait
+        as soon as it is reported; only actions that do not navigate at all pay the grace period.
+
+        :param timeout: Seconds to wait for the pending navigation's ``event``.
+        :param event: Event that completes a navigation (``load`` or ``domContentLoaded``).
+        :param since: Mark taken before the action expected to navigate.
+        :param start_timeout: Seconds to wait for that navigation to start.
+        :raise: TimeoutException
+        """
+        deadline = time.monotonic() + timeout
+        if since is not None:
+            context = self._contexts[0] if self._contexts else None
+            with contextlib.suppress(TimeoutException):
+                self.wait_for(
+                    ("browsingContext.navigationStarted", *SAME_DOCUMENT),
+                    lambda e: e.context == context,
+                    since=since,
+                    timeout=min(start_timeout, timeout),
+                )
+        pending = self.pending_navigation(event)
+        if pending is None:
+            return
+        navigation = pending.params.get("navigation")
+        self.wait_for(
+            event,
+            lambda e: e.context == pending.context
+            and e.params.get("navigation") in (None, navigation),
+            since=pending.seq,
+            timeout=max(deadline - time.monotonic(), 0),
+        )
+
+    def errors(self) -> list[BrowserEvent]:
+        """JavaScript errors, error-level console entries and failed requests."""
+        return [
+            e
+            for e in self.events()
+            if e.method == "network.fetchError"
+            or (
+                e.method == "log.entryAdded"
+                and (e.params.get("type") == "javascript" or e.params.get("level") == "error")
+            )
+        ]
+
+    def slowest_requests(self, limit: int = 10) -> list[tuple[float, str]]:
+        """
+        Completed requests ranked by duration from the browser's own timings.
+
+        :param limit: Number of requests to return.
+        :return: ``(milliseconds, url)`` pairs, slowest first.
+        """
+        durations = []
+        for event in self.events("network.responseCompleted"):
+            request = event.params.get("request", {})
+            timings = request.get("timings", {})
+            start, end = timings.get("requestTime"), timings.get("responseEnd")
+            if start and end:
+                durations.append((round(end - start, 1), request.get("url", "")))
+        return sorted(durations, reverse=True)[:limit]
+
+    def dump(self, path: str | Path) -> Path:
+        """
+        Write the buffer as JSON lines.
+
+        :param path: Target file.
+        :return: The written path.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as fh:
+            if self.dropped:
+                fh.write(json.dumps({"dropped": self.dropped}) + "\n")
+            for event in self.events():
+                fh.write(json.dumps(event.as_dict(self.started), default=str) + "\n")
+        return path
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _callback(self, method: str) -> Callable[[dict], None]:
+        def on_event(params: dict) -> None:
+            self._append(method, params)
+
+        return on_event
+
+    def _append(self, method: str, params: dict) -> None:
+        with self._condition:
+            if len(self._buffer) == self.capacity:
+                self.dropped += 1
+            self._buffer.append(BrowserEvent(self._seq, method, params, time.monotonic()))
+            self._seq += 1
+            self._condition.notify_all()
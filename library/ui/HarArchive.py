@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import base64
+import contextlib
+import datetime as dt
+import json
+import threading
+import weakref
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import trio
+from selenium.common import WebDriverException
+
+# Query parameters commonly used only to defeat caches; they are ignored when matching requests.
+CACHE_BUSTING_PARAMS = frozenset(
+    ["_", "cb", "cachebust", "cache_buster", "t", "ts", "timestamp", "rand", "random", "nonce"]
+)
+# Headers that must not be replayed: the stored body is already decoded and re-measured.
+HOP_BY_HOP_HEADERS = frozenset(["content-encoding", "content-length", "transfer-encoding"])
+
+
+def normalize_url(url: str, *, keep_query: bool = True) -> str:
+    """
+    Normalize a URL for replay matching.
+
+    Drops the fragment and the known cache-busting query parameters and sorts the remaining ones.
+    Other parameters are kept whatever their value: ``?v=<hash>`` names a distinct asset version.
+
+    :param url: Request URL.
+    :param keep_query: False drops the whole query string (loose fallback match).
+    :return: Normalized URL.
+    """
+    parts = urlsplit(url)
+    query = ""
+    if keep_query:
+        pairs = [
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if k.lower() not in CACHE_BUSTING_PARAMS
+        ]
+        query = urlencode(sorted(pairs))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+_RECORDERS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class HarArchive:
+    """
+    HAR 1.2 archive with tolerant request matching.
+
+    Requests are matched on method plus normalized URL (see :func:`normalize_url`). Repeated
+    requests are answered with the recorded responses in order, the last one repeating. When no
+    exact match exists the query string is ignored altogether.
+    """
+
+    def __init__(self, entries: list[dict] | None = None, pages: list[dict] | None = None):
+        self.entries = entries or []
+        self.pages = pages or []
+        self._exact: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._loose: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._served: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        for entry in self.entries:
+            self._index(entry)
+
+    @classmethod
+    def load(cls, path: str | Path) -> HarArchive:
+        """Load a ``.har`` file."""
+        log = json.loads(Path(path).read_text(encoding="utf-8"))["log"]
+        return cls(log.get("entries", []), log.get("pages", []))
+
+    def save(self, path: str | Path) -> Path:
+        """Write the archive as a ``.har`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        har = {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "Home_test_AQA", "version": "1.0"},
+                "pages": self.pages,
+                "entries": self.entries,
+            }
+        }
+        path.write_text(json.dumps(har, indent=1), encoding="utf-8")
+        return path
+
+    def add(self, entry: dict) -> None:
+        """Append a HAR entry."""
+        self.entries.append(entry)
+        self._index(entry)
+
+    def match(self, method: str, url: str) -> dict | None:
+        """
+        Return the recorded entry answering a request, or None.
+
+        :param method: HTTP method.
+        :param url: Full request URL.
+        """
+        method = method.upper()
+        with self._lock:
+            for table, key in (
+                (self._exact, (method, normalize_url(url))),
+                (self._loose, (method, normalize_url(url, keep_query=False))),
+            ):
+                candidates = table.get(key)
+                if candidates:
+                    served = self._served[key]
+                    self._served[key] = served + 1
+                    return candidates[min(served, len(candidates) - 1)]
+        return None
+
+    def _index(self, entry: dict) -> None:
+        if entry.get("_bodyMissing"):
+            return
+        method = entry["request"]["method"].upper()
+        url = entry["request"]["url"]
+        self._exact[(method, normalize_url(url))].append(entry)
+        self._loose[(method, normalize_url(url, keep_query=False))].append(entry)
+
+
+class HarRecorder:
+    """
+    Capture the network traffic of a Chrome session into a :class:`HarArchive`.
+
+    Traffic is read from Chrome's performance log (enable it with :meth:`enable_logging` before
+    the driver is created) and response bodies are fetched with ``Network.getResponseBody``.
+    Bodies of a document are gone once the page navigates away, so page objects call
+    :meth:`collect` after every DOM load (see :meth:`of`); :meth:`save` collects one last time.
+    """
+
+    def __init__(self, driver, *, max_buffer_mb: int = 200):
+        self.driver = driver
+        self.archive = HarArchive()
+        self._pending: dict[str, dict] = {}
+        self.driver.execute_cdp_cmd(
+            "Network.enable",
+            {
+                "maxTotalBufferSize": max_buffer_mb * 1024 * 1024,
+                "maxResourceBufferSize": max_buffer_mb * 1024 * 1024 // 4,
+            },
+        )
+        _RECORDERS[driver] = self
+
+    @classmethod
+    def of(cls, driver) -> HarRecorder | None:
+        """
+        Return the recorder of a driver, or None when the test is not recording.
+
+        :param driver: Web driver instance
+        """
+        return _RECORDERS.get(driver)
+
+    @staticmethod
+    def enable_logging(options) -> None:
+        """Turn on the Chrome performance log the recorder reads from."""
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    def collect(self) -> None:
+        """Drain the performance log and turn finished requests into HAR entries."""
+        for record in self.driver.get_log("performance"):
+            message = json.loads(record["message"])["message"]
+            handler = getattr(self, "_on_" + message["method"].replace(".", "_"), None)
+            if handler is not None:
+                handler(message.get("params", {}))
+
+    def save(self, path: str | Path, page_title: str = "") -> Path:
+        """Collect outstanding traffic and write the HAR file."""
+        self.collect()
+        if page_title and self.archive.entries:
+            self.archive.pages.append(
+                {
+                    "id": "page_1",
+                    "title": page_title,
+                    "startedDateTime": self.archive.entries[0]["startedDateTime"],
+                    "pageTimings": {},
+                }
+            )
+            for entry in self.archive.entries:
+                entry["pageref"] = "page_1"
+        return self.archive.save(path)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _on_Network_requestWillBeSent(self, params: dict) -> None:
+        request_id = params["requestId"]
+        if "redirectResponse" in params and request_id in self._pending:
+            pending = self._pending.pop(request_id)
+            pending["response"] = params["redirectResponse"]
+            self._finish(pending, params["timestamp"], body=None)
+        if params["request"]["url"].startswith("data:"):
+            return
+        self._pending[request_id] = {
+            "id": request_id,
+            "request": params["request"],
+            "wallTime": params.get("wallTime"),
+            "timestamp": params["timestamp"],
+        }
+
+    def _on_Network_responseReceived(self, params: dict) -> None:
+        pending = self._pending.get(params["requestId"])
+        if pending is not None:
+            pending["response"] = params["response"]
+
+    def _on_Network_loadingFinished(self, params: dict) -> None:
+        pending = self._pending.pop(params["requestId"], None)
+        if pending is None or "response" not in pending:
+            return
+        try:
+            body = self.driver.execute_cdp_cmd(
+                "Network.getResponseBody", {"requestId": params["requestId"]}
+            )
+        except WebDriverException:
+            body = None
+        self._finish(pending, params["timestamp"], body, params.get("encodedDataLength", -1))
+
+    def _on_Network_loadingFailed(self, params: dict) -> None:
+        self._pending.pop(params["requestId"], None)
+
+    @staticmethod
+    def _header_list(headers: dict[str, str]) -> list[dict]:
+        """Convert CDP headers (repeated values joined by newlines) into HAR name/value pairs."""
+        return [
+            {"name": name, "value": value}
+            for name, values in headers.items()
+            for value in str(values).split("\n")
+        ]
+
+    def _finish(
+        self, pending: dict, end_timestamp: float, body: dict | None, encoded_size: int = -1
+    ) -> None:
+        request, response = pending["request"], pending["response"]
+        total_ms = max((end_timestamp - pending["timestamp"]) * 1000, 0)
+        timing = response.get("timing") or {}
+        wait_ms = max(timing.get("receiveHeadersEnd", 0) - timing.get("sendEnd", 0), 0)
+        started = dt.datetime.fromtimestamp(pending["wallTime"] or 0, tz=dt.timezone.utc)
+        content: dict = {"size": -1, "mimeType": response.get("mimeType", "")}
+        if body is not None:
+            content["text"] = body.get("body", "")
+            content["size"] = len(content["text"])
+            if body.get("base64Encoded"):
+                content["encoding"] = "base64"
+        headers = response.get("headers", {})
+        entry = {
+            "startedDateTime": started.isoformat().replace("+00:00", "Z"),
+            "time": total_ms,
+            "request": {
+                "method": request["method"],
+                "url": request["url"],
+                "httpVersion": response.get("protocol", ""),
+                "headers": self._header_list(request["headers"]),
+                "queryString": [
+                    {"name": k, "value": v}
+                    for k, v in parse_qsl(urlsplit(request["url"]).query, keep_blank_values=True)
+                ],
+                "cookies": [],
+                "headersSize": -1,
+                "bodySize": len(request.get("postData", "")),
+            },
+            "response": {
+                "status": response.get("status", 0),
+                "statusText": response.get("statusText", ""),
+                "httpVersion": response.get("protocol", ""),
+                "headers": self._header_list(headers),
+                "cookies": [],
+                "content": content,
+                "redirectURL": headers.get("location", headers.get("Location", "")),
+                "headersSize": -1,
+                "bodySize": encoded_size,
+            },
+            "cache": {},
+            "timings": {
+                "send": 0,
+                "wait": min(wait_ms, total_ms),
+                "receive": max(total_ms - wait_ms, 0),
+            },
+        }
+        if body is None and not 300 <= entry["response"]["status"] < 400:
+            entry["_bodyMissing"] = True
+        self.archive.add(entry)
+
+
+class HarReplayer:
+    """
+    Serve a Chrome session's requests from a HAR archive instead of the network.
+
+    Requests of the current page target are intercepted with the CDP ``Fetch`` domain over
+    Selenium's DevTools connection, running on a trio loop in a background thread, and
+    fulfilled with the recorded responses.
+
+    :param archive: Archive to serve from.
+    :param latency_scale: Delay each response by this fraction of its recorded time
+        (0 serves immediately, 1 mimics the recording).
+    :param extra_latency: Fixed delay added to every response, in seconds.
+    :param passthrough: Let unmatched requests hit the network instead of failing them.
+    """
+
+    def __init__(
+        self,
+        archive: HarArchive,
+        *,
+        latency_scale: float = 0.0,
+        extra_latency: float = 0.0,
+        passthrough: bool = False,
+    ):
+        self.archive = archive
+        self.latency_scale = latency_scale
+        self.extra_latency = extra_latency
+        self.passthrough = passthrough
+        self.served = 0
+        self.misses: list[str] = []
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._token: trio.lowlevel.TrioToken | None = None
+        self._scope: trio.CancelScope | None = None
+        self._error: BaseException | None = None
+
+    def start(self, driver, timeout: float = 30) -> HarReplayer:
+        """
+        Start intercepting requests of the driver's current window.
+
+        :param driver: Chrome WebDriver.
+        :param timeout: Seconds to wait for the interception to be active.
+        """
+        self._thread = threading.Thread(
+            target=self._run, args=(driver,), name="har-replay", daemon=True
+        )
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"HAR replay did not start after {timeout} seconds")
+        if self._error is not None:
+            raise RuntimeError("HAR replay failed to start") from self._error
+        return self
+
+    def stop(self) -> None:
+        """Stop intercepting and wait for the background thread."""
+        if self._token is not None and self._scope is not None:
+            with contextlib.suppress(trio.RunFinishedError):
+                trio.from_thread.run_sync(self._scope.cancel, trio_token=self._token)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _run(self, driver) -> None:
+        try:
+            trio.run(self._serve, driver)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self._ready.set()
+
+    async def _serve(self, driver) -> None:
+        self._token = trio.lowlevel.current_trio_token()
+        with trio.CancelScope() as scope:
+            self._scope = scope
+            async with driver.bidi_connection() as connection:
+                session, devtools = connection.session, connection.devtools
+                events = session.listen(devtools.fetch.RequestPaused, buffer_size=1024)
+                await session.execute(
+                    devtools.fetch.enable(patterns=[devtools.fetch.RequestPattern(url_pattern="*")])
+                )
+                self._ready.set()
+                async with trio.open_nursery() as nursery:
+                    async for event in events:
+                        nursery.start_soon(self._respond, session, devtools, event)
+
+    async def _respond(self, session, devtools, event) -> None:
+        fetch = devtools.fetch
+        entry = self.archive.match(event.request.method, event.request.url)
+        if entry is None:
+            self.misses.append(event.request.url)
+            if self.passthrough:
+                await session.execute(fetch.continue_request(request_id=event.request_id))
+            else:
+                await session.execute(
+                    fetch.fail_request(
+                        request_id=event.request_id,
+                        error_reason=devtools.network.ErrorReason.INTERNET_DISCONNECTED,
+                    )
+                )
+            return
+
+        delay = entry.get("time", 0) / 1000 * self.latency_scale + self.extra_latency
+        if delay > 0:
+            await trio.sleep(delay)
+        response = entry["response"]
+        content = response.get("content", {})
+        text = content.get("text", "")
+        if content.get("encoding") == "base64":
+            body = text
+        else:
+            body = base64.b64encode(text.encode("utf-8")).decode("ascii")
+        headers = [
+            fetch.HeaderEntry(name=h["name"], value=h["value"])
+            for h in response.get("headers", [])
+            if h["name"].lower() not in HOP_BY_HOP_HEADERS
+        ]
+        await session.execute(
+            fetch.fulfill_request(
+                request_id=event.request_id,
+                response_code=response.get("status") or 200,
+                response_headers=headers,
+                body=body,
+            )
+        )
+        self.served += 1
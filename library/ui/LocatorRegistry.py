@@ -0,0 +1,336 @@
+"""
+Central locator registry with element caching and per-locator timing.
+
+Page objects keep their ``Locators`` classes; decorating one with
+``@REGISTRY.register_class("<Page>")`` turns its ``(by, value)`` tuples into named
+:class:`Locator` objects. Parameterized locators are formatted once per value and reused.
+:class:`ElementCache` resolves locators for one driver: single elements are cached per page
+state (a generation bumped on navigation) and reused without a round trip, a handle that turns
+out stale when used being resolved again, and every DOM query is timed against its locator so the
+slowest ones can be reported.
+"""
+
+from __future__ import annotations
+
+import time
+import weakref
+from collections.abc import Callable
+from typing import TypeVar
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.remote.webelement import WebElement
+
+T = TypeVar("T")
+
+FORMAT_CACHE_SIZE = 256
+# Query shapes that force a full-document scan; shown as hints in the slow-locator report.
+SLOW_PATTERNS = {
+    "contains(@class": "class substring match; prefer a stable attribute or a CSS selector",
+    "contains(text()": "text search over every node; scope it to an element or tag",
+    "//*[": "wildcard descendant scan; name the tag",
+}
+
+
+class Locator(tuple):
+    """
+    ``(by, value)`` tuple with a registry name, usable wherever selenium expects a locator.
+
+    :param by: Selenium ``By`` strategy.
+    :param value: Selector, possibly with ``{}`` placeholders.
+    :param name: Registry name, e.g. ``BrowsePage.STREAM_LIST``.
+    """
+
+    def __new__(cls, by: str, value: str, name: str = ""):
+        locator = super().__new__(cls, (by, value))
+        locator.name = name
+        locator._formatted = {}
+        return locator
+
+    @property
+    def by(self) -> str:
+        return self[0]
+
+    @property
+    def value(self) -> str:
+        return self[1]
+
+    def format(self, *values) -> Locator:
+        """
+        Fill the placeholders; the result is cached per value and keeps this locator's name.
+
+        :param values: Values for the ``{}`` placeholders.
+        :return: Formatted locator.
+        """
+        formatted = self._formatted.get(values)
+        if formatted is None:
+            formatted = Locator(self.by, self.value.format(*values), self.name)
+            if len(self._formatted) >= FORMAT_CACHE_SIZE:
+                self._formatted.clear()
+            self._formatted[values] = formatted
+        return formatted
+
+    def __getnewargs__(self):
+        return (self.by, self.value, self.name)
+
+
+class LocatorStats:
+    """Resolution timings of one registered locator (formatted variants included)."""
+
+    def __init__(self, name: str, value: str):
+        self.name = name
+        self.value = value
+        self.queries = 0
+        self.misses = 0
+        self.cache_hits = 0
+        self.stale = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total / self.queries * 1000 if self.queries else 0.0
+
+    def hint(self) -> str:
+        return "; ".join(text for pattern, text in SLOW_PATTERNS.items() if pattern in self.value)
+
+    def merge(self, other: dict) -> None:
+        """
+        Add counters exported by another process (see :meth:`LocatorRegistry.export`).
+
+        :param other: Exported counters of the same locator.
+        """
+        for counter in ("queries", "misses", "cache_hits", "stale", "total"):
+            setattr(self, counter, getattr(self, counter) + other[counter])
+        self.max = max(self.max, other["max"])
+
+
+class LocatorRegistry:
+    """Named locators of all page objects plus their resolution statistics."""
+
+    def __init__(self):
+        self.locators: dict[str, Locator] = {}
+        self.stats: dict[str, LocatorStats] = {}
+
+    def register(self, name: str, by: str, value: str) -> Locator:
+        """
+        Register a locator under a unique name.
+
+        :param name: Registry name.
+        :param by: Selenium ``By`` strategy.
+        :param value: Selector.
+        :return: The registered locator.
+        """
+        locator = Locator(by, value, name)
+        self.locators[name] = locator
+        return locator
+
+    def register_class(self, page: str):
+        """
+        Class decorator registering every ``(by, value)`` attribute of a ``Locators`` class.
+
+        :param page: Prefix of the registry names, usually the page object's class name.
+        """
+
+        def decorate(cls):
+            for attr, value in list(vars(cls).items()):
+                if isinstance(value, tuple) and len(value) == 2 and not attr.startswith("_"):
+                    setattr(cls, attr, self.register(f"{page}.{attr}", *value))
+            return cls
+
+        return decorate
+
+    def record(self, locator: tuple, seconds: float, found: bool) -> None:
+        """
+        Record one DOM query for a locator.
+
+        :param locator: Locator that was resolved.
+        :param seconds: Wall time of the query.
+        :param found: Whether it matched anything.
+        """
+        stats = self.stats_for(locator)
+        stats.queries += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        if not found:
+            stats.misses += 1
+
+    def slow_locators(self, threshold_ms: float = 250.0) -> list[LocatorStats]:
+        """
+        Locators whose mean resolution time is at or above the threshold, slowest first.
+
+        :param threshold_ms: Mean milliseconds per query.
+        """
+        ranked = sorted(self.stats.values(), key=lambda s: s.mean_ms, reverse=True)
+        return [s for s in ranked if s.queries and s.mean_ms >= threshold_ms]
+
+    def report(self, threshold_ms: float = 250.0) -> list[str]:
+        """
+        Per-locator timing table; slow locators are marked and get a hint.
+
+        :param threshold_ms: Mean milliseconds per query from which a locator counts as slow.
+        :return: Report lines.
+        """
+        slow = {s.name for s in self.slow_locators(threshold_ms)}
+        lines = [
+            f"{'mean ms':>8} {'max ms':>8} {'queries':>7} {'misses':>6} {'hits':>5} "
+            f"{'stale':>5}  locator"
+        ]
+        for s in sorted(self.stats.values(), key=lambda s: s.total, reverse=True):
+            flag = " SLOW" if s.name in slow else ""
+            lines.append(
+                f"{s.mean_ms:>8.1f} {s.max * 1000:>8.1f} {s.queries:>7} {s.misses:>6} "
+                f"{s.cache_hits:>5} {s.stale:>5}  {s.name}{flag}"
+            )
+            if flag and s.hint():
+                lines.append(f"{'':>45}  -> {s.hint()}")
+        return lines
+
+    def reset_stats(self) -> None:
+        self.stats.clear()
+
+    def export(self) -> dict[str, dict]:
+        """Statistics as plain data, to be sent to another process (e.g. an xdist controller)."""
+        return {name: dict(vars(stats)) for name, stats in self.stats.items()}
+
+    def merge(self, exported: dict[str, dict]) -> None:
+        """
+        Add statistics exported by another process.
+
+        :param exported: Result of :meth:`export`.
+        """
+        for name, counters in exported.items():
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = LocatorStats(name, counters["value"])
+            stats.merge(counters)
+
+    def stats_for(self, locator: tuple) -> LocatorStats:
+        """
+        Statistics entry of a locator; unnamed tuples are tracked by their selector.
+
+        :param locator: ``(by, value)`` locator.
+        """
+        name = getattr(locator, "name", "") or f"{locator[0]}={locator[1]}"
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = LocatorStats(name, locator[1])
+        return stats
+
+
+REGISTRY = LocatorRegistry()
+
+_CACHES: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class ElementCache:
+    """
+    Timed locator resolution with per-page-state caching of single elements.
+
+    :param driver: Web driver instance
+    :param registry: Registry collecting the timings.
+    """
+
+    def __init__(self, driver, registry: LocatorRegistry = REGISTRY):
+        self.driver = driver
+        self.registry = registry
+        self.generation = 0
+        self._elements: dict[tuple, WebElement] = {}
+
+    @classmethod
+    def of(cls, driver) -> ElementCache:
+        """
+        Return the cache shared by all page objects of a driver.
+
+        :param driver: Web driver instance
+        """
+        cache = _CACHES.get(driver)
+        if cache is None:
+            cache = _CACHES[driver] = cls(driver)
+        return cache
+
+    def invalidate(self) -> None:
+        """Start a new page state: every cached handle is dropped."""
+        self.generation += 1
+        self._elements.clear()
+
+    def find(self, locator: tuple, *, revalidate: bool = False) -> WebElement:
+        """
+        Resolve a single element, reusing the handle cached for the current page state.
+
+        The cached handle is not checked against the browser unless ``revalidate`` is set; use
+        that (or :meth:`use`) where the handle is handed out and may have gone stale because the
+        DOM was replaced without a navigation.
+
+        :param locator: ``(by, value)`` locator.
+        :param revalidate: Probe a cached handle with one cheap call and resolve again if stale.
+        :return: The element.
+        :raise: NoSuchElementException
+        """
+        key = tuple(locator)
+        element = self._elements.get(key)
+        if element is not None and revalidate and not self._alive(element):
+            self.registry.stats_for(locator).stale += 1
+            del self._elements[key]
+            element = None
+        if element is not None:
+            self.registry.stats_for(locator).cache_hits += 1
+            return element
+        start = time.perf_counter()
+        try:
+            element = self.driver.find_element(*locator)
+        except NoSuchElementException:
+            self.registry.record(locator, time.perf_counter() - start, found=False)
+            raise
+        self.registry.record(locator, time.perf_counter() - start, found=True)
+        self._elements[key] = element
+        return element
+
+    def use(self, locator: tuple, action: Callable[[WebElement], T]) -> T:
+        """
+        Resolve a single element and apply ``action`` to it, resolving once more if the cached
+        handle turns out stale.
+
+        :param locator: ``(by, value)`` locator.
+        :param action: Callable receiving the element, e.g. an ``expected_conditions`` check.
+        :return: What ``action`` returned.
+        :raise: NoSuchElementException
+        """
+        key = tuple(locator)
+        cached = key in self._elements
+        element = self.find(locator)
+        try:
+            return action(element)
+        # A handle from a closed page or browser context is unknown rather than stale
+        except (StaleElementReferenceException, NoSuchElementException):
+            if not cached or self._elements.get(key) is not element:
+                raise
+            self.registry.stats_for(locator).stale += 1
+            del self._elements[key]
+        return action(self.find(locator))
+
+    def find_all(self, locator: tuple) -> list[WebElement]:
+        """
+        Resolve all matching elements. Lists are not cached: scrolling or lazy rendering changes
+        them without a navigation.
+
+        :param locator: ``(by, value)`` locator.
+        :return: Matching elements, possibly empty.
+        """
+        start = time.perf_counter()
+        elements = self.driver.find_elements(*locator)
+        self.registry.record(locator, time.perf_counter() - start, found=bool(elements))
+        return elements
+
+    ####################
+    # Internal methods #
+    ####################
+
+    @staticmethod
+    def _alive(element: WebElement) -> bool:
+        """Whether the handle still refers to an element of the current document."""
+        try:
+            element.is_enabled()
+        # A handle from a closed page or browser context is unknown rather than stale
+        except (StaleElementReferenceException, NoSuchElementException):
+            return False
+        return True
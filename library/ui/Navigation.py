@@ -6,8 +6,10 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 
 from library.ui.BasePage import BasePage
+from library.ui.LocatorRegistry import REGISTRY
 
 
+@REGISTRY.register_class("Navigation")
 class Locators:
     """Locators for the Navigation page."""
 
@@ -30,6 +32,7 @@ class Navigation(BasePage):
         """
         Open the base URL from environment variables."""
         base_url = os.getenv(key="UI_URL")
+        self.elements.invalidate()
         self.driver.get(base_url)
 
     def scroll_bottom_of_page(self, times_to_scroll: int = 1) -> None:
@@ -56,11 +59,10 @@ class Navigation(BasePage):
         actions = ActionChains(self.driver)
         actions.send_keys(Keys.ESCAPE).perform()
 
-    def locate_and_close_app_use_popup(self, timeout: int = 5) -> None:
+    def locate_and_close_app_use_popup(self, timeout: int = 10) -> None:
         """
         Locate and close the app uses popup if it appears.
         """
-        self.explicit_wait(5)
         try:
             popup = self.get_present_element(Locators.APP_USE_POPUP, timeout=timeout)
             if popup.is_displayed():
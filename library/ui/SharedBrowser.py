@@ -0,0 +1,363 @@
+"""
+Shared headless Chrome handing out isolated browser contexts.
+
+One host session launches headless Chrome with a fixed DevTools port. Every test process attaches
+its own chromedriver to it (``debuggerAddress``) and each test gets a fresh browser context with
+its own cookies, storage and cache, created through CDP ``Target.createBrowserContext``. Pixel 2
+emulation is applied per context, so page objects work unchanged while many flows share a single
+browser process.
+
+The browser is started lazily by :class:`SharedChromeRun`: the first process of a test run that
+needs it spawns a small host process (``python -m library.ui.SharedBrowser RUN_DIR``) owning
+Chrome, and every process of the run reads its address from the shared run directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import websocket
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+PIXEL_2_METRICS = {
+    "width": 411,
+    "height": 731,
+    "deviceScaleFactor": 2.625,
+    "mobile": True,
+    "screenWidth": 411,
+    "screenHeight": 731,
+}
+PIXEL_2_USER_AGENT = (
+    "Mozilla/5.0 (Linux; Android 8.0.0; Pixel 2 Build/OPD3.170816.012) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{version} Mobile Safari/537.36"
+)
+# Contexts live in separate windows of one headless browser; without these Chrome throttles the
+# ones it considers in the background.
+HOST_ARGUMENTS = [
+    "--headless=new",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+]
+
+
+def chromedriver_path() -> str:
+    """
+    Install (or reuse the cached) chromedriver and make sure it is executable.
+
+    :return: Path to the chromedriver binary.
+    """
+    driver_path = ChromeDriverManager().install()
+    if driver_path and os.name != "nt":
+        st = os.stat(driver_path)
+        os.chmod(driver_path, st.st_mode | stat.S_IEXEC)
+    return driver_path
+
+
+def free_port() -> int:
+    """Ask the OS for a currently unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BrowserCdp:
+    """
+    Minimal browser-level DevTools connection.
+
+    ``driver.execute_cdp_cmd`` talks to the current page, where browser-wide ``Target`` methods
+    such as ``createBrowserContext`` are not allowed, so those go through this socket instead.
+
+    :param address: ``host:port`` of the Chrome DevTools endpoint.
+    """
+
+    def __init__(self, address: str, timeout: float = 30):
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout) as resp:
+            ws_url = json.load(resp)["webSocketDebuggerUrl"]
+        self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, method: str, params: dict | None = None) -> dict:
+        """
+        Send a command and wait for its result.
+
+        :param method: CDP method, e.g. ``Target.createTarget``.
+        :param params: Command parameters.
+        :return: The ``result`` object of the reply.
+        """
+        with self._lock:
+            message_id = next(self._ids)
+            self._ws.send(json.dumps({"id": message_id, "method": method, "params": params or {}}))
+            while True:
+                message = json.loads(self._ws.recv())
+                if message.get("id") == message_id:
+                    break
+        if "error" in message:
+            raise WebDriverException(f"{method} failed: {message['error'].get('message')}")
+        return message.get("result", {})
+
+    def close(self) -> None:
+        self._ws.close()
+
+
+class SharedChrome:
+    """
+    Host session owning the shared Chrome process.
+
+    :param driver_path: Path to chromedriver.
+    :param port: DevTools port, a free one when omitted.
+    """
+
+    def __init__(self, driver_path: str, port: int | None = None):
+        self.port = port or free_port()
+        options = webdriver.ChromeOptions()
+        for argument in HOST_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_argument(f"--remote-debugging-port={self.port}")
+        self.driver = webdriver.Chrome(service=Service(driver_path), options=options)
+
+    @property
+    def address(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def quit(self) -> None:
+        """Shut the browser down."""
+        try:
+            self.driver.quit()
+        except WebDriverException as exc:
+            print(f"Exception during shared browser quit: {exc}")
+
+
+class SharedChromeRun:
+    """
+    One test run's shared Chrome, coordinated through files in a run directory.
+
+    Any number of processes may call :meth:`address`; the first one to claim the directory spawns
+    the host process, the others wait for it to publish the DevTools address. The process that
+    created the directory calls :meth:`stop` once all others are done.
+
+    :param run_dir: Directory private to this test run.
+    """
+
+    LAUNCH, ADDRESS, ERROR, STOP, STOPPED = "launch", "address", "error", "stop", "stopped"
+
+    def __init__(self, run_dir: str | Path):
+        self.run_dir = Path(run_dir)
+        self._host: subprocess.Popen | None = None
+
+    def address(self, timeout: float = 60) -> str:
+        """
+        DevTools address of the shared Chrome, launching it on the first call of the run.
+
+        :param timeout: Seconds to wait for Chrome to come up.
+        :return: ``host:port`` of the DevTools endpoint.
+        :raise: WebDriverException if the host failed or did not start in time.
+        """
+        try:
+            claim = os.open(self.run_dir / self.LAUNCH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            pass
+        else:
+            os.close(claim)
+            self._host = self._launch()
+        deadline = time.monotonic() + timeout
+        while not (self.run_dir / self.ADDRESS).exists():
+            if (self.run_dir / self.ERROR).exists():
+                error = (self.run_dir / self.ERROR).read_text(encoding="utf-8")
+                raise WebDriverException(f"Shared Chrome failed to start: {error}")
+            if self._host is not None and self._host.poll() is not None:
+                raise WebDriverException(f"Shared Chrome host exited with {self._host.returncode}")
+            if time.monotonic() > deadline:
+                raise WebDriverException(f"Shared Chrome did not start after {timeout}s")
+            time.sleep(0.05)
+        return (self.run_dir / self.ADDRESS).read_text(encoding="utf-8")
+
+    def serve(self, port: int | None = None, poll: float = 0.2) -> None:
+        """
+        Host side: run Chrome until :meth:`stop` is called or the run directory disappears.
+
+        :param port: DevTools port, a free one when omitted.
+        :param poll: Seconds between checks for the stop request.
+        """
+        try:
+            host = SharedChrome(chromedriver_path(), port)
+        except Exception as exc:
+            (self.run_dir / self.ERROR).write_text(f"{type(exc).__name__}: {exc}", encoding="utf-8")
+            raise
+        try:
+            pending = self.run_dir / f"{self.ADDRESS}.tmp"
+            pending.write_text(host.address, encoding="utf-8")
+            os.replace(pending, self.run_dir / self.ADDRESS)
+            while self.run_dir.is_dir() and not (self.run_dir / self.STOP).exists():
+                time.sleep(poll)
+        finally:
+            host.quit()
+            with contextlib.suppress(OSError):
+                (self.run_dir / self.STOPPED).touch()
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        Shut the shared Chrome down, if it was ever launched, and wait for the host to finish.
+
+        :param timeout: Seconds to wait for the host.
+        """
+        if (self.run_dir / self.LAUNCH).exists():
+            (self.run_dir / self.STOP).touch()
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline and not any(
+                (self.run_dir / name).exists() for name in (self.STOPPED, self.ERROR)
+            ):
+                time.sleep(0.05)
+            if self._host is not None:
+                with contextlib.suppress(subprocess.TimeoutExpired):
+                    self._host.wait(timeout=max(deadline - time.monotonic(), 0))
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _launch(self) -> subprocess.Popen:
+        project_dir = str(Path(__file__).resolve().parents[2])
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [project_dir, env.get("PYTHONPATH")]))
+        return subprocess.Popen(
+            [sys.executable, "-m", "library.ui.SharedBrowser", str(self.run_dir)], env=env
+        )
+
+
+class BrowserContext:
+    """
+    One isolated browser context with a single page, as handed to a test.
+
+    :param browser: Owning attachment.
+    :param context_id: CDP browser context id.
+    :param target_id: CDP target id of the page, which is also its window handle.
+    """
+
+    def __init__(self, browser: SharedBrowser, context_id: str, target_id: str):
+        self.browser = browser
+        self.context_id = context_id
+        self.target_id = target_id
+
+    def close(self) -> None:
+        """Close the page and dispose the context with everything stored in it."""
+        self.browser.close_context(self)
+
+
+class SharedBrowser:
+    """
+    Attachment of one test process to the shared Chrome.
+
+    :param address: ``host:port`` of the shared Chrome DevTools endpoint.
+    :param driver_path: Path to chromedriver.
+    :param enable_bidi: Open a WebDriver BiDi connection for the session.
+    :param page_load_strategy: ``normal``, ``eager`` or ``none``.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        driver_path: str,
+        *,
+        enable_bidi: bool = False,
+        page_load_strategy: str = "normal",
+    ):
+        options = webdriver.ChromeOptions()
+        options.debugger_address = address
+        options.enable_bidi = enable_bidi
+        options.page_load_strategy = page_load_strategy
+        self.driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        self.cdp = BrowserCdp(address)
+        version = self.driver.capabilities.get("browserVersion", "")
+        self.user_agent = PIXEL_2_USER_AGENT.format(version=version)
+
+    def new_context(self, *, emulate: bool = True, timeout: float = 10) -> BrowserContext:
+        """
+        Create a fresh browser context with one blank page and switch the driver to it.
+
+        :param emulate: Apply Pixel 2 emulation to the page.
+        :param timeout: Seconds to wait for chromedriver to see the new window.
+        :return: The context, to be closed by the caller.
+        """
+        # disposeOnDetach drops the context even if this process dies without cleaning up
+        context_id = self.cdp.send("Target.createBrowserContext", {"disposeOnDetach": True})[
+            "browserContextId"
+        ]
+        target_id = self.cdp.send(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+        )["targetId"]
+        self._switch_to(target_id, timeout)
+        if emulate:
+            self._emulate_pixel_2()
+        return BrowserContext(self, context_id, target_id)
+
+    def close_context(self, context: BrowserContext) -> None:
+        """
+        Close a context's page and dispose the context.
+
+        :param context: Context returned by :meth:`new_context`.
+        """
+        try:
+            self.cdp.send("Target.closeTarget", {"targetId": context.target_id})
+        finally:
+            self.cdp.send("Target.disposeBrowserContext", {"browserContextId": context.context_id})
+
+    def quit(self) -> None:
+        """Detach from the shared browser; the browser itself keeps running."""
+        self.cdp.close()
+        try:
+            self.driver.quit()
+        except WebDriverException as exc:
+            print(f"Exception during driver quit: {exc}")
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _switch_to(self, target_id: str, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while target_id not in self.driver.window_handles:
+            if time.monotonic() > deadline:
+                raise WebDriverException(f"Window {target_id} did not appear after {timeout}s")
+            time.sleep(0.05)
+        self.driver.switch_to.window(target_id)
+
+    def _emulate_pixel_2(self) -> None:
+        """Same device as the ``mobileEmulation: Pixel 2`` option, applied to the current page."""
+        self.driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", PIXEL_2_METRICS)
+        self.driver.execute_cdp_cmd(
+            "Emulation.setUserAgentOverride",
+            {"userAgent": self.user_agent, "platform": "Linux armv8l"},
+        )
+        self.driver.execute_cdp_cmd(
+            "Emulation.setTouchEmulationEnabled", {"enabled": True, "maxTouchPoints": 5}
+        )
+        self.driver.execute_cdp_cmd("Emulation.setFocusEmulationEnabled", {"enabled": True})
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Shared headless Chrome host for one test run")
+    parser.add_argument("run_dir")
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args(argv)
+    SharedChromeRun(args.run_dir).serve(args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Deadline-based explicit waits with adaptive polling.
+
+Every wait runs inside a deadline budget kept in a context variable. A nested wait can never
+outlive the step that started it: ``menu_click`` waiting up to 30 seconds for the menu and then
+for the DOM shares one 30-second budget instead of stacking two. Polling starts fast (50 ms) and
+backs off by 1.5x up to one second, so conditions that hold quickly return quickly while long
+waits do not hammer the driver. Implicit waits must stay at zero; they would stretch every
+``find_elements`` poll.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TypeVar
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+T = TypeVar("T")
+
+_DEADLINE: ContextVar[float | None] = ContextVar("wait_deadline", default=None)
+
+
+class WaitEngine:
+    """
+    Explicit waits sharing a per-step deadline.
+
+    :param driver: Web driver instance
+    :param initial_poll: First poll interval in seconds.
+    :param backoff: Factor applied to the poll interval after every miss.
+    :param max_poll: Upper bound of the poll interval in seconds.
+    :param ignored_exceptions: Exceptions raised by a condition that count as "not yet".
+    """
+
+    def __init__(
+        self,
+        driver,
+        *,
+        initial_poll: float = 0.05,
+        backoff: float = 1.5,
+        max_poll: float = 1.0,
+        ignored_exceptions: tuple[type[Exception], ...] = (
+            NoSuchElementException,
+            StaleElementReferenceException,
+        ),
+    ):
+        self.driver = driver
+        self.initial_poll = initial_poll
+        self.backoff = backoff
+        self.max_poll = max_poll
+        self.ignored_exceptions = ignored_exceptions
+
+    @staticmethod
+    @contextmanager
+    def budget(seconds: float) -> Iterator[float]:
+        """
+        Open a step budget; waits inside it end at the earlier of their own and the step deadline.
+
+        :param seconds: Budget of the step.
+        :return: Context manager yielding the effective monotonic deadline.
+        """
+        deadline = time.monotonic() + seconds
+        outer = _DEADLINE.get()
+        if outer is not None:
+            deadline = min(deadline, outer)
+        token = _DEADLINE.set(deadline)
+        try:
+            yield deadline
+        finally:
+            _DEADLINE.reset(token)
+
+    @staticmethod
+    def remaining(timeout: float) -> float:
+        """
+        Seconds a wait of ``timeout`` may take within the current budget.
+
+        :param timeout: Wait's own timeout.
+        """
+        outer = _DEADLINE.get()
+        if outer is None:
+            return timeout
+        return max(0.0, min(timeout, outer - time.monotonic()))
+
+    def until(self, condition: Callable[..., T], timeout: float = 30, message: str = "") -> T:
+        """
+        Poll ``condition(driver)`` until it returns a truthy value.
+
+        :param condition: Callable taking the driver, e.g. an ``expected_conditions`` predicate.
+        :param timeout: Maximum seconds, further limited by the enclosing budget.
+        :param message: Message of the TimeoutException.
+        :return: The condition's truthy value.
+        :raise: TimeoutException
+        """
+        last_error: Exception | None = None
+        poll = self.initial_poll
+        with self.budget(timeout) as deadline:
+            while True:
+                try:
+                    value = condition(self.driver)
+                    if value:
+                        return value
+                except self.ignored_exceptions as exc:
+                    last_error = exc
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise TimeoutException(message) from last_error
+                time.sleep(min(poll, left))
+                poll = min(poll * self.backoff, self.max_poll)
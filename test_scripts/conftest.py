@@ -1,20 +1,54 @@
 import os
 import os.path
-import stat
+import re
 from collections.abc import Generator
 
 import pytest
 from selenium import webdriver
 from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
+from library.api.TailLatency import TailLatencyGuard
+from library.ui.BrowserEvents import BrowserEventStream
+from library.ui.HarArchive import HarArchive, HarRecorder, HarReplayer
+from library.ui.SharedBrowser import chromedriver_path
 from test_scripts.main_api import Api
 from test_scripts.main_ui import Ui
 
+pytest_plugins = [
+    "test_scripts.plugins.incremental",
+    "test_scripts.plugins.locator_report",
+    "test_scripts.plugins.payload_report",
+    "test_scripts.plugins.profiling",
+    "test_scripts.plugins.run_metrics",
+    "test_scripts.plugins.shared_browser",
+]
+
+
+@pytest.fixture(scope="session", name="tail_latency_guard")
+def tf_tail_latency_guard() -> Generator[TailLatencyGuard | None, None, None]:
+    """
+    Fixture to provide one TailLatencyGuard for the session when IPSTACK_TAIL_LATENCY=1.
+
+    The latency histogram only warms up (and hedging only starts) across many requests, so all
+    Api instances share it; its threads are released at session teardown.
+
+    :return: Generator yielding the guard, or None when the mode is off
+    """
+    if os.getenv(key="IPSTACK_TAIL_LATENCY", default="0") != "1":
+        yield None
+        return
+    guard = TailLatencyGuard()
+    try:
+        yield guard
+    finally:
+        guard.close()
+
 
 @pytest.fixture(scope="function", name="api")
-def tf_api() -> Generator[Api, None, None]:
+def tf_api(
+    request: pytest.FixtureRequest, tail_latency_guard: TailLatencyGuard | None
+) -> Generator[Api, None, None]:
     """
     Fixture to provide an Api instance for tests.
 
@@ -22,47 +56,141 @@ def tf_api() -> Generator[Api, None, None]:
     """
     api_base_url = os.getenv(key="API_URL")
     api_access_key = os.getenv(key="IPSTACK_API_KEY")
-    yield Api(api_base_url, api_access_key)
+    coalesce = os.getenv(key="IPSTACK_COALESCE", default="0") == "1"
+    project_fields = os.getenv(key="IPSTACK_PROJECT_FIELDS", default="0") == "1"
+    hedges_before = tail_latency_guard.stats.hedges_fired if tail_latency_guard else 0
+    api = Api(
+        api_base_url,
+        api_access_key,
+        coalesce=coalesce,
+        project_fields=project_fields,
+        tail_latency=tail_latency_guard or False,
+    )
+    yield api
+    # Request logs travel with the test report (junitxml, xdist), so only attach what a report uses
+    plugins = request.config.pluginmanager
+    records = [record.as_dict() for record in api.ip_stack.request_log]
+    if plugins.has_plugin("ipstack-payload-report"):
+        request.node.user_properties.append(("ipstack_requests", records))
+    if plugins.has_plugin("run-metrics"):
+        # Imported here: importing a plugin before pytest_plugins registers it skips assert rewriting
+        from test_scripts.plugins.run_metrics import ipstack_summary
 
+        hedges = tail_latency_guard.stats.hedges_fired - hedges_before if tail_latency_guard else 0
+        request.node.user_properties.append(("ipstack_summary", ipstack_summary(records, hedges)))
 
-@pytest.fixture(scope="function", name="ui")
-def tf_ui() -> Generator[Ui, None, None]:
+
+HAR_DIR = os.path.join(os.path.dirname(__file__), "test_data", "har")
+
+
+def har_path(test_name: str) -> str:
     """
-    Fixture to provide an Ui instance for tests.
+    HAR cassette of a UI test.
 
-    :return: Generator yielding an Ui instance
+    :param test_name: Test item name.
+    :return: Path inside UI_HAR_DIR.
     """
-    driver_options = webdriver.ChromeOptions()
+    return os.path.join(
+        os.getenv(key="UI_HAR_DIR", default=HAR_DIR), re.sub(r"[^\w.\-]+", "_", test_name) + ".har"
+    )
 
-    driver_options.add_argument("--headless=new")
-    mobile_emulation = {"deviceName": "Pixel 2"}
-    driver_options.add_experimental_option("mobileEmulation", mobile_emulation)
 
-    driver_path = ChromeDriverManager().install()
+def pytest_incremental_inputs(item: pytest.Item) -> list[str]:
+    """Recorded cassettes are inputs of UI tests for ``--incremental`` runs."""
+    return [har_path(item.name)] if "ui" in getattr(item, "fixturenames", ()) else []
 
-    if driver_path and os.name != "nt":
-        st = os.stat(driver_path)
-        os.chmod(driver_path, st.st_mode | stat.S_IEXEC)
 
-    driver = webdriver.Chrome(
-        service=Service(driver_path),
-        options=driver_options,
-    )
+@pytest.fixture(scope="function", name="ui")
+def tf_ui(request: pytest.FixtureRequest) -> Generator[Ui, None, None]:
+    """
+    Fixture to provide an Ui instance for tests.
 
-    driver.implicitly_wait(10)
-    ui = Ui(driver)
+    UI_HAR_MODE=record captures the network traffic of the test into a HAR file per flow,
+    UI_HAR_MODE=replay serves the recorded responses instead of the network
+    (UI_HAR_LATENCY scales the recorded response times, UI_HAR_PASSTHROUGH=1 lets unmatched
+    requests through).
+    UI_SHARED_BROWSER=1 gives the test an isolated browser context in one Chrome shared by all
+    tests and workers instead of launching a browser per test (HAR modes keep their own browser).
+    UI_BIDI_EVENTS=1 streams console, network and navigation events of the test over WebDriver
+    BiDi into a ring buffer of UI_BIDI_BUFFER events that page waits key off.
+    UI_PAGE_LOAD_STRATEGY=eager|none returns from navigation before subresources finish loading.
 
+    :return: Generator yielding an Ui instance
+    """
+    har_mode = os.getenv(key="UI_HAR_MODE", default="")
+    bidi_events = os.getenv(key="UI_BIDI_EVENTS", default="0") == "1"
+    page_load_strategy = os.getenv(key="UI_PAGE_LOAD_STRATEGY", default="normal")
+    cassette = har_path(request.node.name)
+    context = None
+    if os.getenv(key="UI_SHARED_BROWSER", default="0") == "1" and not har_mode:
+        shared_browser = request.getfixturevalue("shared_browser")
+        context = shared_browser.new_context()
+        driver = shared_browser.driver
+    else:
+        driver_options = webdriver.ChromeOptions()
+
+        driver_options.add_argument("--headless=new")
+        mobile_emulation = {"deviceName": "Pixel 2"}
+        driver_options.add_experimental_option("mobileEmulation", mobile_emulation)
+        if har_mode == "record":
+            HarRecorder.enable_logging(driver_options)
+        driver_options.enable_bidi = bidi_events
+        driver_options.page_load_strategy = page_load_strategy
+
+        driver = webdriver.Chrome(
+            service=Service(chromedriver_path()),
+            options=driver_options,
+        )
+
+    events = recorder = replayer = ui = None
+    # Everything that can fail after the browser exists runs under the finally that closes it
     try:
+        # Page objects wait explicitly through WaitEngine; an implicit wait would stretch every poll
+        driver.implicitly_wait(0)
+        if bidi_events:
+            events = BrowserEventStream(
+                driver, capacity=int(os.getenv(key="UI_BIDI_BUFFER", default="5000"))
+            ).start()
+        ui = Ui(driver)
+        if har_mode == "record":
+            recorder = HarRecorder(driver)
+        if har_mode == "replay":
+            replayer = HarReplayer(
+                HarArchive.load(cassette),
+                latency_scale=float(os.getenv(key="UI_HAR_LATENCY", default="0")),
+                passthrough=os.getenv(key="UI_HAR_PASSTHROUGH", default="0") == "1",
+            )
+            replayer.start(driver)
         yield ui
     finally:
-        ui.browse_page.take_screenshot(
-            os.path.join(os.path.dirname(__file__), "test_data", "screenshots", "screenshot.png")
-        )
-        try:
-            driver.close()
-        except WebDriverException as exc:
-            print(f"Exception during driver close: {exc}")
-        try:
-            driver.quit()
-        except WebDriverException as exc:
-            print(f"Exception during driver quit: {exc}")
+        if ui is not None:
+            ui.browse_page.take_screenshot(
+                os.path.join(
+                    os.path.dirname(__file__), "test_data", "screenshots", "screenshot.png"
+                )
+            )
+        if events is not None:
+            events.stop()
+        if recorder is not None:
+            try:
+                recorder.save(cassette, page_title=request.node.nodeid)
+            except WebDriverException as exc:
+                print(f"Exception during HAR capture: {exc}")
+        if replayer is not None:
+            replayer.stop()
+            if replayer.misses:
+                print(f"HAR replay: {len(replayer.misses)} unmatched requests")
+        if context is not None:
+            try:
+                context.close()
+            except WebDriverException as exc:
+                print(f"Exception during browser context close: {exc}")
+        else:
+            try:
+                driver.close()
+            except WebDriverException as exc:
+                print(f"Exception during driver close: {exc}")
+            try:
+                driver.quit()
+            except WebDriverException as exc:
+                print(f"Exception during driver quit: {exc}")
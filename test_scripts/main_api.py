@@ -1,4 +1,5 @@
 from library.api.IpStackPage import IpStackPage
+from library.api.TailLatency import TailLatencyGuard
 
 
 class Api:
@@ -6,10 +7,28 @@ class Api:
     Api class to interact with various API endpoints.
     """
 
-    def __init__(self, api_base_url, api_access_key) -> None:
+    def __init__(
+        self,
+        api_base_url,
+        api_access_key,
+        *,
+        coalesce: bool = False,
+        project_fields: bool = False,
+        tail_latency: TailLatencyGuard | bool = False,
+    ) -> None:
         """
         Initialize the Api class with the base URL and access key for the API.
         :param api_base_url: Base URL of the API.
         :param api_access_key: Access key for the API.
+        :param coalesce: Share in-flight requests between concurrent identical lookups.
+        :param project_fields: Request only the fields the validators declare.
+        :param tail_latency: Use adaptive timeouts and hedged requests; pass a shared guard so its
+            latency histogram warms up across instances.
         """
-        self.ip_stack = IpStackPage(base_url=api_base_url, access_key=api_access_key)
+        self.ip_stack = IpStackPage(
+            base_url=api_base_url,
+            access_key=api_access_key,
+            coalesce=coalesce,
+            project_fields=project_fields,
+            tail_latency=tail_latency,
+        )
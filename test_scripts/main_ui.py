@@ -1,4 +1,5 @@
 from library.ui.BrowsePage import BrowsePage
+from library.ui.BrowserEvents import BrowserEventStream
 from library.ui.Navigation import Navigation
 
 
@@ -14,5 +15,6 @@ class Ui:
         :param driver: Web driver instance
         """
         self.driver = driver
+        self.events = BrowserEventStream.of(driver)
         self.navigation = Navigation(driver)
         self.browse_page = BrowsePage(driver)
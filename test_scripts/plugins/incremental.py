@@ -0,0 +1,505 @@
+"""
+Pytest plugin for fingerprint-based incremental runs.
+
+With ``--incremental`` every collected test gets a fingerprint of its inputs:
+
+* the source of its test module and of every project module reachable from it through imports
+  (``library``, ``test_scripts``; resolved statically from the AST, third-party code excluded);
+* the fixtures it uses that are defined in the project: their source and the modules of the
+  classes and functions they reference (so an API test does not depend on the UI page objects
+  the root conftest also imports);
+* its parameters;
+* the values of the ``schemas.py`` schemas it uses, imported by name or read as ``schemas.NAME``
+  (not the whole file, unless the module object itself is passed around);
+* extra input files reported by ``pytest_incremental_inputs``, e.g. the recorded HAR cassette;
+* the environment: ``API_*``, ``IPSTACK_*`` and ``UI_*`` variables (hashed, never stored), the
+  Python version and the installed versions of the packages in ``requirements.txt``.
+
+A test whose fingerprint matches the one stored after its last passing run is skipped with the
+cached result instead of being executed; failed tests always run again. ``--force-rerun`` runs
+everything and refreshes the cache. Results live in pytest's cache (``.pytest_cache``).
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import os
+import platform
+import re
+import time
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+CACHE_KEY = "incremental/v1"
+FINGERPRINT_PROPERTY = "incremental_fingerprint"
+SKIP_PREFIX = "incremental: unchanged"
+ENV_PREFIXES = ("API_", "IPSTACK_", "UI_")
+# Modules holding data rather than code: only the names a test imports are fingerprinted
+DATA_MODULES = {"schemas"}
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class IncrementalHooks:
+    @pytest.hookspec
+    def pytest_incremental_inputs(self, item: pytest.Item) -> list[str | Path] | None:
+        """
+        Return extra files the result of ``item`` depends on (missing files are fine).
+
+        :param item: Test item being fingerprinted.
+        """
+
+
+def pytest_addhooks(pluginmanager: pytest.PytestPluginManager) -> None:
+    pluginmanager.add_hookspecs(IncrementalHooks)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("incremental")
+    group.addoption(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Skip tests whose inputs are unchanged since their last passing run.",
+    )
+    group.addoption(
+        "--force-rerun",
+        action="store_true",
+        default=False,
+        help="With --incremental: run every test and refresh the cached results.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("incremental") and hasattr(config, "cache"):
+        config.pluginmanager.register(IncrementalRun(config), "incremental-run")
+
+
+def _digest(*parts: str | bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _plain(value):
+    """JSON fallback: objects by type and state, never by their ``id``-based default repr."""
+    if hasattr(value, "__dict__") and not inspect.isroutine(value) and not inspect.isclass(value):
+        return [type(value).__qualname__, vars(value)]
+    return re.sub(r" at 0x[0-9a-f]+", "", repr(value))
+
+
+def _stable(value) -> str:
+    return json.dumps(value, sort_keys=True, default=_plain)
+
+
+def environment_fingerprint(requirements: Path = PROJECT_ROOT / "requirements.txt") -> str:
+    """
+    Fingerprint of everything outside the repository that can change a result.
+
+    :param requirements: Requirements file listing the packages whose versions matter.
+    """
+    env = sorted((k, v) for k, v in os.environ.items() if k.startswith(ENV_PREFIXES))
+    versions = []
+    if requirements.exists():
+        for line in requirements.read_text().splitlines():
+            name = re.split(r"[<>=!~;\[ ]", line.strip(), maxsplit=1)[0]
+            if name and not name.startswith("#"):
+                try:
+                    versions.append((name, importlib.metadata.version(name)))
+                except importlib.metadata.PackageNotFoundError:
+                    versions.append((name, None))
+    return _digest(_stable(env), platform.python_version(), _stable(versions))
+
+
+def _code_names(func) -> set[str]:
+    """Global names referenced by a function, nested functions and comprehensions included."""
+    code = getattr(inspect.unwrap(func), "__code__", None) if func is not None else None
+    names: set[str] = set()
+    codes = [code] if code is not None else []
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(c for c in code.co_consts if inspect.iscode(c))
+    return names
+
+
+def _fixture_name(value) -> str | None:
+    """Name of the fixture a module attribute defines, None for anything else."""
+    # Check the wrapper first: getattr on arbitrary objects (pytest.mark) has side effects
+    if not callable(value) or isinstance(value, type) or inspect.unwrap(value) is value:
+        return None
+    name = getattr(value, "name", None)
+    return name if isinstance(name, str) and inspect.isfunction(inspect.unwrap(value)) else None
+
+
+class ImportGraph:
+    """
+    Static import graph of the project's Python files, memoized per file.
+
+    :param roots: Directories absolute imports are resolved against.
+    """
+
+    def __init__(self, roots: list[Path]):
+        self.roots = roots
+        self._files: dict[Path, tuple[str, list[tuple[Path, tuple[str, ...]]]]] = {}
+
+    def file(self, path: Path) -> tuple[str, list[tuple[Path, tuple[str, ...]]]]:
+        """
+        Content digest and local imports of a file.
+
+        :param path: Python file.
+        :return: ``(digest, [(imported file, names imported from it), ...])``.
+        """
+        path = path.resolve()
+        cached = self._files.get(path)
+        if cached is None:
+            source = path.read_bytes()
+            cached = self._files[path] = (_digest(source), self._imports(path, source))
+        return cached
+
+    def reachable(self, start: list[Path]) -> dict[Path, str]:
+        """
+        All project files reachable from ``start``, with their digests.
+
+        :param start: Entry files.
+        """
+        seen: dict[Path, str] = {}
+        stack = [p.resolve() for p in start]
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            digest, imports = self.file(path)
+            seen[path] = digest
+            stack.extend(target for target, _ in imports if target not in seen)
+        return seen
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _imports(self, path: Path, source: bytes) -> list[tuple[Path, tuple[str, ...]]]:
+        try:
+            tree = ast.parse(source, filename=str(path))
+        except SyntaxError:
+            return []
+        found = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    found.extend((p, ()) for p in self._resolve(alias.name, path))
+            elif isinstance(node, ast.ImportFrom):
+                module = node.module or ""
+                if node.level:
+                    base = path.parent
+                    for _ in range(node.level - 1):
+                        base = base.parent
+                    candidates = [self._locate(base, module)] if module else []
+                    candidates += [
+                        self._locate(base, f"{module}.{a.name}".lstrip(".")) for a in node.names
+                    ]
+                    found.extend((p, ()) for p in candidates if p is not None)
+                    continue
+                names = tuple(a.name for a in node.names)
+                found.extend((p, names) for p in self._resolve(module, path))
+                for name in names:
+                    found.extend(
+                        (p, ()) for p in self._resolve(f"{module}.{name}", path, parents=False)
+                    )
+        return found
+
+    def _resolve(self, module: str, importer: Path, parents: bool = True) -> list[Path]:
+        """Files of ``module`` and, with ``parents``, of its packages' ``__init__``."""
+        parts = module.split(".")
+        names = [".".join(parts[: i + 1]) for i in range(len(parts))] if parents else [module]
+        # Bare sibling imports (``from schemas import ...``) rely on rootdir/conftest sys.path entries
+        for root in [*self.roots, importer.parent]:
+            located = [p for p in (self._locate(root, name) for name in names) if p is not None]
+            if located:
+                return located
+        return []
+
+    @staticmethod
+    def _locate(root: Path, module: str) -> Path | None:
+        base = root.joinpath(*module.split("."))
+        for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+            if candidate.is_file():
+                return candidate.resolve()
+        return None
+
+
+class IncrementalRun:
+    """Fingerprints collected tests, skips unchanged ones and records passing results."""
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.force = config.getoption("force_rerun")
+        self.is_worker = hasattr(config, "workerinput")
+        self.roots = list(dict.fromkeys([PROJECT_ROOT, Path(config.rootpath).resolve()]))
+        self.graph = ImportGraph(self.roots)
+        self.environment = environment_fingerprint()
+        self.cached: dict[str, dict] = config.cache.get(CACHE_KEY, {})
+        # Controller-side bookkeeping: nodeid -> {"fingerprint", "failed", "duration"}
+        self.results: dict[str, dict] = {}
+        self.reused: dict[str, float] = {}
+        self.changed = 0
+        self.uncached = 0
+        self._shared: dict[Path, set[str]] = {}
+        self._data_access: dict[Path, dict[str, tuple[str, set[str]] | None]] = {}
+        self._fixtures: dict[str, dict[str, list]] = {}
+
+    def fingerprint(self, item: pytest.Item) -> str:
+        """
+        Fingerprint of one test's inputs and the environment.
+
+        :param item: Collected test.
+        """
+        module = getattr(item, "module", None)
+        entry = Path(str(item.path))
+        files = self.graph.reachable([entry])
+        data_values = []
+        if module is not None:
+            used = self._shared_names(entry) | _code_names(getattr(item, "function", None))
+            access = self._data_uses(entry)
+            for target, names in self.graph.file(entry)[1]:
+                if target.stem not in DATA_MODULES:
+                    continue
+                namespace = module
+                if not names:
+                    # ``import schemas``: the names are the attributes read through it
+                    if access.get(target.stem) is None:
+                        continue
+                    alias, names = access[target.stem]
+                    namespace = getattr(module, alias, None)
+                elif target.stem in access and access[target.stem] is None:
+                    continue
+                files.pop(target, None)
+                data_values += [
+                    (name, _stable(getattr(namespace, name, None)))
+                    for name in sorted(names)
+                    if name in used
+                ]
+
+        fixtures = []
+        visible = self._fixture_functions(item)
+        for name in sorted(set(item.fixturenames)):
+            for func in visible.get(name, ()):
+                source, referenced = self._fixture_inputs(func)
+                if source is not None:
+                    fixtures.append((name, source))
+                    files.update(self.graph.reachable(referenced))
+
+        extra = []
+        for paths in item.ihook.pytest_incremental_inputs(item=item):
+            for path in paths or ():
+                path = Path(path)
+                extra.append((str(path), _digest(path.read_bytes()) if path.is_file() else None))
+
+        params = getattr(getattr(item, "callspec", None), "params", {})
+        return _digest(
+            self.environment,
+            _stable(sorted((self._relative(p), d) for p, d in files.items())),
+            _stable(sorted(data_values)),
+            _stable(fixtures),
+            _stable(sorted(extra)),
+            _stable(params),
+        )
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, items: list[pytest.Item]) -> None:
+        for item in items:
+            fingerprint = self.fingerprint(item)
+            item.user_properties.append((FINGERPRINT_PROPERTY, fingerprint))
+            cached = self.cached.get(item.nodeid)
+            if cached is None:
+                self.uncached += 1
+            elif cached["fingerprint"] != fingerprint:
+                self.changed += 1
+            elif not self.force:
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(cached["finished"]))
+                item.add_marker(
+                    pytest.mark.skip(
+                        reason=f"{SKIP_PREFIX}, passed {when} in {cached['duration']:.2f}s"
+                    )
+                )
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if self.is_worker:
+            return
+        if (
+            report.when == "setup"
+            and report.skipped
+            and str(report.longrepr[2] if isinstance(report.longrepr, tuple) else "").startswith(
+                f"Skipped: {SKIP_PREFIX}"
+            )
+        ):
+            self.reused[report.nodeid] = self.cached.get(report.nodeid, {}).get("duration", 0.0)
+            return
+        if report.nodeid in self.reused:
+            return
+        result = self.results.setdefault(report.nodeid, {"failed": False, "duration": 0.0})
+        result["fingerprint"] = dict(report.user_properties).get(FINGERPRINT_PROPERTY)
+        result["duration"] += report.duration
+        result["failed"] = result["failed"] or report.failed
+        if report.when == "call":
+            result["passed"] = report.passed
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self.is_worker:
+            return
+        cached = dict(self.cached)
+        for nodeid, result in self.results.items():
+            if result.get("passed") and not result["failed"] and result["fingerprint"]:
+                cached[nodeid] = {
+                    "fingerprint": result["fingerprint"],
+                    "duration": result["duration"],
+                    "finished": time.time(),
+                }
+            elif result["failed"] or result.get("passed") is False:
+                cached.pop(nodeid, None)
+        self.config.cache.set(CACHE_KEY, cached)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if self.is_worker:
+            return
+        terminalreporter.write_sep("-", "incremental run")
+        terminalreporter.write_line(
+            f"{len(self.reused)} reused (~{sum(self.reused.values()):.1f}s saved), "
+            f"{len(self.results)} executed ({self.changed} changed, "
+            f"{self.uncached} without a cached pass)" + (", forced" if self.force else "")
+        )
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _relative(self, path: Path) -> str:
+        for root in self.roots:
+            if root in path.parents:
+                return path.relative_to(root).as_posix()
+        return path.as_posix()
+
+    def _shared_names(self, path: Path) -> set[str]:
+        """Names a test module references outside its test functions (helpers, module code)."""
+        names = self._shared.get(path)
+        if names is None:
+            names = self._shared[path] = set()
+            nodes = list(ast.parse(path.read_bytes()).body)
+            while nodes:
+                node = nodes.pop()
+                if isinstance(
+                    node, ast.FunctionDef | ast.AsyncFunctionDef
+                ) and node.name.startswith("test"):
+                    continue
+                if isinstance(node, ast.ClassDef):
+                    nodes.extend(node.body)
+                    nodes.extend(node.decorator_list)
+                    continue
+                for child in ast.walk(node):
+                    if isinstance(child, ast.Name):
+                        names.add(child.id)
+                    elif isinstance(child, ast.Attribute):
+                        names.add(child.attr)
+        return names
+
+    def _data_uses(self, path: Path) -> dict[str, tuple[str, set[str]] | None]:
+        """
+        ``import <data module>`` statements of a test module: the alias and the attributes read
+        through it, or None where the module object is used as a whole.
+        """
+        uses = self._data_access.get(path)
+        if uses is None:
+            uses = self._data_access[path] = {}
+            tree = ast.parse(path.read_bytes())
+            aliases = {
+                alias.asname or alias.name: alias.name
+                for node in ast.walk(tree)
+                if isinstance(node, ast.Import)
+                for alias in node.names
+                if alias.name in DATA_MODULES
+            }
+            for alias, module in aliases.items():
+                uses[module] = (alias, set())
+            attribute_bases = set()
+            for node in ast.walk(tree):
+                if (
+                    isinstance(node, ast.Attribute)
+                    and isinstance(node.value, ast.Name)
+                    and node.value.id in aliases
+                ):
+                    attribute_bases.add(id(node.value))
+                    access = uses[aliases[node.value.id]]
+                    if access is not None:
+                        access[1].add(node.attr)
+            for node in ast.walk(tree):
+                if (
+                    isinstance(node, ast.Name)
+                    and node.id in aliases
+                    and id(node) not in attribute_bases
+                ):
+                    uses[aliases[node.id]] = None
+        return uses
+
+    def _fixture_functions(self, item: pytest.Item) -> dict[str, list]:
+        """
+        Fixture functions visible to a test, by fixture name: those of its module and class, of
+        the conftest files above it and of registered plugin modules. Overridden definitions
+        are included too, which only makes the fingerprint stricter.
+        """
+        sources: list = [getattr(item, "module", None), getattr(item, "cls", None)]
+        for plugin in item.config.pluginmanager.get_plugins():
+            if not isinstance(plugin, ModuleType) or not getattr(plugin, "__file__", None):
+                continue
+            path = Path(plugin.__file__).resolve()
+            if path.name == "conftest.py" and path.parent not in Path(str(item.path)).parents:
+                continue
+            sources.append(plugin)
+        found: dict[str, list] = {}
+        for source in sources:
+            if source is None:
+                continue
+            key = f"{getattr(source, '__module__', '')}.{source.__name__}"
+            defined = self._fixtures.get(key)
+            if defined is None:
+                defined = self._fixtures[key] = {}
+                for value in vars(source).values():
+                    name = _fixture_name(value)
+                    if name is not None:
+                        defined.setdefault(name, []).append(value)
+            for name, funcs in defined.items():
+                found.setdefault(name, []).extend(funcs)
+        return found
+
+    def _is_local(self, path: Path) -> bool:
+        return any(root in path.parents for root in self.roots)
+
+    def _fixture_inputs(self, func) -> tuple[str | None, list[Path]]:
+        """Source of a project fixture and the project files of the globals it references."""
+        func = inspect.unwrap(func)
+        try:
+            path = Path(inspect.getsourcefile(func)).resolve()
+        except TypeError:
+            return None, []
+        if not self._is_local(path):
+            return None, []
+        referenced = []
+        constants = []
+        for name in sorted(_code_names(func)):
+            value = func.__globals__.get(name)
+            if isinstance(value, str | int | float | bool | tuple):
+                constants.append((name, repr(value)))
+                continue
+            try:
+                source = inspect.getsourcefile(value)
+            except TypeError:
+                continue
+            if source and self._is_local(Path(source).resolve()):
+                referenced.append(Path(source))
+        return _stable([inspect.getsource(func), constants]), referenced
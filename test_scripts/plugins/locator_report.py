@@ -0,0 +1,68 @@
+"""
+Pytest plugin reporting UI locator resolution times.
+
+Page objects resolve their locators through ``ElementCache``, which times every DOM query in
+the shared ``LocatorRegistry``. With ``--locator-report`` the per-locator table is printed after
+the run; locators averaging at least ``--slow-locator-ms`` are flagged with a hint on what makes
+them slow. Under pytest-xdist every worker sends its statistics back in ``workeroutput`` and the
+controller reports the merged table.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from library.ui.LocatorRegistry import REGISTRY
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("ui")
+    group.addoption(
+        "--locator-report",
+        action="store_true",
+        default=False,
+        help="Print per-locator resolution times and flag slow locators.",
+    )
+    group.addoption(
+        "--slow-locator-ms",
+        type=float,
+        default=250.0,
+        help="Mean resolution time from which a locator is reported as slow.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("locator_report"):
+        config.pluginmanager.register(
+            LocatorReport(config.getoption("slow_locator_ms")), "ui-locator-report"
+        )
+
+
+WORKEROUTPUT_KEY = "locator_stats"
+
+
+class LocatorReport:
+    """Print the registry's timing table at the end of the run."""
+
+    def __init__(self, threshold_ms: float) -> None:
+        self.threshold_ms = threshold_ms
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        # xdist workers carry ``workeroutput``; it travels back to the controller
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput[WORKEROUTPUT_KEY] = REGISTRY.export()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error) -> None:
+        REGISTRY.merge(getattr(node, "workeroutput", {}).get(WORKEROUTPUT_KEY, {}))
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not REGISTRY.stats:
+            return
+        tr = terminalreporter
+        tr.write_sep("-", "UI locator report")
+        for line in REGISTRY.report(self.threshold_ms):
+            tr.write_line(line)
+        slow = REGISTRY.slow_locators(self.threshold_ms)
+        tr.write_line(f"{len(slow)} locator(s) at or above {self.threshold_ms:g} ms mean")
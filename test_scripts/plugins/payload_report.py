@@ -0,0 +1,89 @@
+"""
+Pytest plugin reporting ipstack payload sizes per test.
+
+With ``--payload-report`` the ``api`` fixture stores the request log of its ``IpStackPage`` in
+the test's ``user_properties`` under ``ipstack_requests``; this plugin aggregates them and prints
+how many bytes field projection and compression saved per test.
+"""
+
+from __future__ import annotations
+
+import statistics
+
+import pytest
+
+USER_PROPERTY = "ipstack_requests"
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("ipstack")
+    group.addoption(
+        "--payload-report",
+        action="store_true",
+        default=False,
+        help="Print ipstack payload sizes and bytes saved per test.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("payload_report"):
+        config.pluginmanager.register(PayloadReport(), "ipstack-payload-report")
+
+
+class PayloadReport:
+    """Collect request records from test reports and summarize them at the end of the run."""
+
+    def __init__(self) -> None:
+        self.records: dict[str, list[dict]] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if report.when != "teardown":
+            return
+        for name, value in report.user_properties:
+            if name == USER_PROPERTY and value:
+                self.records.setdefault(report.nodeid, []).extend(value)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        if not self.records:
+            return
+        reference = self._full_payload_reference()
+        tr = terminalreporter
+        tr.write_sep("-", "ipstack payload report")
+        tr.write_line(
+            f"{'test':<70} {'reqs':>4} {'wire':>8} {'body':>8} {'compr.':>8} {'project.':>9}"
+        )
+        total_wire = total_compression = total_projection = 0
+        for nodeid, records in self.records.items():
+            wire = sum(r["wire_bytes"] for r in records)
+            body = sum(r["body_bytes"] for r in records)
+            # Tiny gzip bodies can grow; count only what was actually saved
+            compression = sum(max(r["body_bytes"] - r["wire_bytes"], 0) for r in records)
+            projection = sum(
+                max(reference - r["body_bytes"], 0)
+                for r in records
+                if reference and "fields" in r["params"]
+            )
+            total_wire += wire
+            total_compression += compression
+            total_projection += projection
+            tr.write_line(
+                f"{nodeid[-70:]:<70} {len(records):>4} {wire:>8} {body:>8} "
+                f"{compression:>8} {projection if reference else 'n/a':>9}"
+            )
+        tr.write_line(
+            f"total wire bytes: {total_wire}, saved by compression: {total_compression}, "
+            f"saved by projection: {total_projection if reference else 'n/a'}"
+            + (f" (vs. {reference} B median full payload)" if reference else "")
+        )
+
+    def _full_payload_reference(self) -> int | None:
+        """Median decoded size of unprojected JSON lookups, the baseline for projection savings."""
+        sizes = [
+            r["body_bytes"]
+            for records in self.records.values()
+            for r in records
+            if "fields" not in r["params"]
+            and r["params"].get("output", "json") == "json"
+            and r["status_code"] == 200
+        ]
+        return int(statistics.median(sizes)) if sizes else None
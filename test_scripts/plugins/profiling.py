@@ -0,0 +1,308 @@
+"""
+Pytest plugin profiling the ``library`` package per test.
+
+``--profile-library=cprofile`` runs every test body under :mod:`cProfile` (deterministic),
+``--profile-library=sampling`` samples the test thread's stack every ``--profile-interval``
+milliseconds from a background thread (low overhead). Only frames inside ``library`` are kept;
+time spent below them in other packages (``requests``, ``selenium``, ``jsonschema`` ...) is shown
+as a ``[package]`` leaf named after the first package the library called into, so CPU in our code
+can be told apart from work done elsewhere. Sampling mode also reads the test thread's CPU clock:
+time the thread spent off CPU (``time.sleep``, socket reads, waiting on the browser) gets a
+``[wait]`` leaf instead of counting as self time of the frame that blocked.
+
+The hot-function table lists library functions and the ``[package]`` boundaries; the time of a
+boundary is wall time in cProfile mode (it keeps no CPU clock) and CPU time in sampling mode.
+
+Output in ``--profile-dir`` (default ``artifacts/profiles``):
+
+* ``<test>.collapsed`` and ``library.collapsed`` - collapsed stacks for ``flamegraph.pl`` or
+  speedscope (cProfile mode yields ``caller;callee`` pairs, as cProfile keeps no full stacks);
+* ``<test>.prof`` - raw cProfile data (cProfile mode only);
+* ``hot_functions.txt`` - the top functions across the run, also printed in the summary.
+
+When the option is not given nothing is registered, so the plugin costs nothing.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import library
+
+LIBRARY_DIR = str(Path(library.__file__).resolve().parent)
+PROJECT_DIR = str(Path(LIBRARY_DIR).parent)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("profiling")
+    group.addoption(
+        "--profile-library",
+        choices=["cprofile", "sampling"],
+        default=None,
+        help="Profile the library package per test (deterministic cProfile or sampling).",
+    )
+    group.addoption(
+        "--profile-dir",
+        default=os.path.join("artifacts", "profiles"),
+        help="Directory for collapsed stacks and the hot-function table.",
+    )
+    group.addoption(
+        "--profile-interval",
+        type=float,
+        default=5.0,
+        help="Sampling interval in milliseconds (sampling mode).",
+    )
+    group.addoption(
+        "--profile-top",
+        type=int,
+        default=20,
+        help="Number of hot functions to report.",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    mode = config.getoption("profile_library")
+    if mode:
+        config.pluginmanager.register(
+            LibraryProfiler(
+                mode=mode,
+                out_dir=Path(config.getoption("profile_dir")),
+                interval=config.getoption("profile_interval") / 1000,
+                top=config.getoption("profile_top"),
+            ),
+            "library-profiler",
+        )
+
+
+def in_library(filename: str) -> bool:
+    """Whether a code object's file belongs to the ``library`` package."""
+    return filename.startswith(LIBRARY_DIR)
+
+
+def label(filename: str, name: str) -> str:
+    """Short, stable frame label: project-relative path plus function name."""
+    if filename.startswith(PROJECT_DIR):
+        filename = os.path.relpath(filename, PROJECT_DIR)
+    return f"{filename.replace(os.sep, '/')}:{name}"
+
+
+@functools.cache
+def package_of(filename: str) -> str:
+    """Top-level package of a profiled code file (``builtins`` for C functions)."""
+    if filename == "~":
+        return "builtins"
+    for name, module in list(sys.modules.items()):
+        if getattr(module, "__file__", None) == filename:
+            return name.split(".")[0]
+    return Path(filename).stem
+
+
+def thread_cpu_clock(thread_id: int) -> int | None:
+    """CPU-time clock of a thread, or None where the platform has no per-thread clocks."""
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+class StackSampler:
+    """
+    Background thread collecting library stacks of one target thread.
+
+    Each sample is weighted by the wall time since the previous one and split with the target
+    thread's CPU clock: the on-CPU share goes to the stack, the rest to the same stack plus a
+    ``[wait]`` leaf. Without a per-thread clock every sample counts as CPU.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        # stack -> seconds
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._clock = thread_cpu_clock(thread_id)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="library-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _cpu_time(self) -> float | None:
+        if self._clock is None:
+            return None
+        try:
+            return time.clock_gettime(self._clock)
+        except OSError:  # the thread has exited
+            return None
+
+    def _run(self) -> None:
+        wall, cpu = time.perf_counter(), self._cpu_time()
+        while not self._stop.wait(self.interval):
+            now, now_cpu = time.perf_counter(), self._cpu_time()
+            elapsed = now - wall
+            busy = elapsed if cpu is None or now_cpu is None else min(now_cpu - cpu, elapsed)
+            wall, cpu = now, now_cpu
+            stack = self._sample()
+            if stack is None:
+                continue
+            if busy > 0:
+                self.stacks[stack] += busy
+            if elapsed > busy:
+                self.stacks[(*stack, "[wait]")] += elapsed - busy
+
+    def _sample(self) -> tuple[str, ...] | None:
+        """Library frames of the target thread, root first, plus the package they called into."""
+        frame = sys._current_frames().get(self.thread_id)
+        boundary = None
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            if in_library(code.co_filename):
+                stack.append(label(code.co_filename, code.co_name))
+            elif not stack:
+                boundary = frame
+            frame = frame.f_back
+        if not stack:
+            return None
+        stack.reverse()
+        if boundary is not None:
+            package = str(boundary.f_globals.get("__name__", "?")).split(".")[0]
+            stack.append(f"[{package}]")
+        return tuple(stack)
+
+
+class LibraryProfiler:
+    """Registered only when profiling is requested."""
+
+    def __init__(self, mode: str, out_dir: Path, interval: float, top: int):
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval = interval
+        self.top = top
+        self.worker = os.getenv("PYTEST_XDIST_WORKER", "")
+        # function label -> [calls, self seconds, total seconds]
+        self.hot: dict[str, list[float]] = {}
+        self.collapsed: list[str] = []
+        self.library_self_time = 0.0
+        self.test_time = 0.0
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item):
+        test_id = re.sub(r"[^\w.\-\[\]]+", "_", item.nodeid)
+        start = time.perf_counter()
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self.test_time += time.perf_counter() - start
+                self._collect_cprofile(test_id, profiler)
+        else:
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                self.test_time += time.perf_counter() - start
+                self._collect_samples(test_id, sampler.stacks)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        table = self._hot_table()
+        suffix = f"-{self.worker}" if self.worker else ""
+        (self.out_dir / f"hot_functions{suffix}.txt").write_text("\n".join(table) + "\n")
+        (self.out_dir / f"library{suffix}.collapsed").write_text("\n".join(self.collapsed) + "\n")
+        tr = terminalreporter
+        tr.write_sep("-", f"library profile ({self.mode})")
+        tr.write_line(
+            f"library self time {self.library_self_time:.3f}s of {self.test_time:.3f}s "
+            f"test time; stacks in {self.out_dir}"
+        )
+        for line in table:
+            tr.write_line(line)
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _add_hot(self, name: str, calls: float, self_time: float, total_time: float) -> None:
+        entry = self.hot.setdefault(name, [0, 0.0, 0.0])
+        entry[0] += calls
+        entry[1] += self_time
+        entry[2] += total_time
+
+    def _collect_cprofile(self, test_id: str, profiler: cProfile.Profile) -> None:
+        profiler.dump_stats(str(self.out_dir / f"{test_id}.prof"))
+        lines = []
+        stats = pstats.Stats(profiler).stats
+        for (filename, _, name), (_, calls, tt, ct, callers) in stats.items():
+            if not in_library(filename):
+                self._collect_boundary(test_id, f"[{package_of(filename)}]", callers, lines)
+                continue
+            callee = label(filename, name)
+            self._add_hot(callee, calls, tt, ct)
+            self.library_self_time += tt
+            for (c_file, _, c_name), caller_stats in callers.items():
+                micros = int(caller_stats[2] * 1_000_000)
+                if micros:
+                    lines.append(f"{test_id};{label(c_file, c_name)};{callee} {micros}")
+        self._write_collapsed(test_id, lines)
+
+    def _collect_boundary(self, test_id: str, package: str, callers: dict, lines: list) -> None:
+        """Account the calls a library function made straight into another package."""
+        for (c_file, _, c_name), (_, calls, _, cumulative) in callers.items():
+            if not in_library(c_file):
+                continue
+            self._add_hot(package, calls, cumulative, cumulative)
+            micros = int(cumulative * 1_000_000)
+            if micros:
+                lines.append(f"{test_id};{label(c_file, c_name)};{package} {micros}")
+
+    def _collect_samples(self, test_id: str, stacks: Counter) -> None:
+        lines = []
+        for stack, seconds in stacks.items():
+            lines.append(f"{test_id};{';'.join(stack)} {int(seconds * 1_000_000)}")
+            library_frames = [f for f in stack if not f.startswith("[")]
+            waiting = stack[-1] == "[wait]"
+            if stack[-1] == library_frames[-1]:
+                self._add_hot(stack[-1], 0, seconds, 0.0)
+                self.library_self_time += seconds
+            elif stack[len(library_frames)] != "[wait]":
+                self._add_hot(stack[len(library_frames)], 0, 0.0 if waiting else seconds, seconds)
+            for name in set(library_frames):
+                self._add_hot(name, 0, 0.0, seconds)
+        self._write_collapsed(test_id, lines)
+
+    def _write_collapsed(self, test_id: str, lines: list[str]) -> None:
+        self.collapsed.extend(lines)
+        (self.out_dir / f"{test_id}.collapsed").write_text("\n".join(lines) + "\n")
+
+    def _hot_table(self) -> list[str]:
+        calls_header = "calls" if self.mode == "cprofile" else ""
+        rows = [f"{'self s':>9} {'total s':>9} {calls_header:>8}  function"]
+        ranked = sorted(self.hot.items(), key=lambda kv: kv[1][1], reverse=True)
+        for name, (calls, self_time, total_time) in ranked[: self.top]:
+            calls_col = f"{int(calls):>8}" if self.mode == "cprofile" else f"{'':>8}"
+            rows.append(f"{self_time:>9.4f} {total_time:>9.4f} {calls_col}  {name}")
+        return rows
@@ -0,0 +1,540 @@
+"""
+Pytest plugin exporting test-run performance data as OpenMetrics.
+
+Per test it collects wall time (setup + call + teardown), the ``IpStackPage`` request summary
+stored by the ``api`` fixture (request count, latency, ipstack quota used) and WebDriver command counts
+and durations of the ``ui`` driver. At the end of the run it can
+
+* write an OpenMetrics text file (``--metrics-file``), e.g. into a node_exporter textfile
+  collector directory;
+* push the same text to a Pushgateway (``--metrics-push URL``), for example the local stand-in
+  started with ``python -m test_scripts.plugins.run_metrics serve``;
+* append the run to a JSON-lines history (``--metrics-history``), which
+  ``python -m test_scripts.plugins.run_metrics compare <history>`` checks for regressions.
+
+All samples are gauges describing the last run, so the text parses both as OpenMetrics and as
+the classic Prometheus format. Nothing is registered unless one of the options is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import requests
+
+IPSTACK_PROPERTY = "ipstack_summary"
+WEBDRIVER_PROPERTY = "webdriver_commands"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("metrics")
+    group.addoption("--metrics-file", default=None, help="Write OpenMetrics text to this file.")
+    group.addoption("--metrics-push", default=None, help="Push the metrics to this Pushgateway.")
+    group.addoption("--metrics-job", default="home_test_aqa", help="Pushgateway job name.")
+    group.addoption(
+        "--metrics-history", default=None, help="Append the run to this JSON-lines history."
+    )
+    group.addoption("--metrics-label", default="", help="Free-form label stored with the run.")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if any(config.getoption(name) for name in ("metrics_file", "metrics_push", "metrics_history")):
+        config.pluginmanager.register(RunMetrics(config), "run-metrics")
+
+
+class CommandTimer:
+    """Counts and times ``driver.execute`` calls by WebDriver command name."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        # command -> [count, seconds]
+        self.commands: dict[str, list[float]] = {}
+        self._previous = vars(driver).get("execute")
+
+    def install(self) -> CommandTimer:
+        original = self.driver.execute
+        commands = self.commands
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                entry = commands.setdefault(driver_command, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - start
+
+        self.driver.execute = execute
+        return self
+
+    def remove(self) -> None:
+        if self._previous is None:
+            vars(self.driver).pop("execute", None)
+        else:
+            self.driver.execute = self._previous
+
+
+def ipstack_summary(records: list[dict], hedges: int = 0) -> dict:
+    """
+    Summarize the request log of one test.
+
+    :param records: ``RequestRecord.as_dict()`` entries.
+    :param hedges: Hedged duplicates sent by the tail-latency guard; they cost quota too.
+    :return: Request count, quota used and latency statistics in seconds.
+    """
+    latencies = sorted(r["elapsed"] for r in records)
+    # A bulk lookup costs one request per address
+    quota = sum(len(r["url"].rsplit("/", 1)[-1].split(",")) for r in records) + hedges
+    return {
+        "requests": len(records),
+        "quota": quota,
+        "latency_sum": sum(latencies),
+        "latency_max": latencies[-1] if latencies else 0.0,
+        "latency_p95": latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+        if latencies
+        else 0.0,
+        "buckets": [sum(1 for x in latencies if x <= le) for le in LATENCY_BUCKETS],
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def render_openmetrics(run: dict) -> str:
+    """
+    Render a run record as OpenMetrics text.
+
+    :param run: Record built by :class:`RunMetrics`.
+    :return: Text ending with ``# EOF``.
+    """
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: list[tuple[str, dict, float]]):
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_labels(**labels)} {value!r}")
+
+    tests = run["tests"]
+    family(
+        "aqa_run_timestamp_seconds", "gauge", "Start of the test run.", [("", {}, run["timestamp"])]
+    )
+    family(
+        "aqa_run_duration_seconds",
+        "gauge",
+        "Wall time of the test run.",
+        [("", {}, run["duration"])],
+    )
+    family(
+        "aqa_run_tests",
+        "gauge",
+        "Tests by outcome.",
+        [("", {"outcome": o}, n) for o, n in sorted(run["outcomes"].items())],
+    )
+    family(
+        "aqa_test_duration_seconds",
+        "gauge",
+        "Setup, call and teardown time of a test.",
+        [("", {"test": t, "outcome": d["outcome"]}, d["duration"]) for t, d in tests.items()],
+    )
+
+    api_tests = {t: d["ipstack"] for t, d in tests.items() if d.get("ipstack")}
+    family(
+        "aqa_test_ipstack_requests",
+        "gauge",
+        "ipstack HTTP requests sent by a test.",
+        [("", {"test": t}, s["requests"]) for t, s in api_tests.items()],
+    )
+    family(
+        "aqa_test_ipstack_quota",
+        "gauge",
+        "ipstack lookups charged to a test (bulk addresses and hedges included).",
+        [("", {"test": t}, s["quota"]) for t, s in api_tests.items()],
+    )
+    family(
+        "aqa_test_ipstack_latency_seconds",
+        "gauge",
+        "ipstack request latency of a test.",
+        [
+            ("", {"test": t, "stat": stat}, value)
+            for t, s in api_tests.items()
+            for stat, value in (
+                ("mean", s["latency_sum"] / s["requests"] if s["requests"] else 0.0),
+                ("p95", s["latency_p95"]),
+                ("max", s["latency_max"]),
+            )
+        ],
+    )
+    buckets = [0] * len(LATENCY_BUCKETS)
+    for s in api_tests.values():
+        buckets = [a + b for a, b in zip(buckets, s["buckets"], strict=True)]
+    count = sum(s["requests"] for s in api_tests.values())
+    family(
+        "aqa_ipstack_request_duration_seconds",
+        "histogram",
+        "ipstack request latency over the run.",
+        [("_bucket", {"le": repr(le)}, n) for le, n in zip(LATENCY_BUCKETS, buckets, strict=True)]
+        + [
+            ("_bucket", {"le": "+Inf"}, count),
+            ("_count", {}, count),
+            ("_sum", {}, sum(s["latency_sum"] for s in api_tests.values())),
+        ],
+    )
+
+    ui_tests = {t: d["webdriver"] for t, d in tests.items() if d.get("webdriver")}
+    family(
+        "aqa_test_webdriver_commands",
+        "gauge",
+        "WebDriver commands sent by a test.",
+        [
+            ("", {"test": t, "command": c}, n)
+            for t, cmds in ui_tests.items()
+            for c, (n, _) in cmds.items()
+        ],
+    )
+    family(
+        "aqa_test_webdriver_command_seconds",
+        "gauge",
+        "Time spent in WebDriver commands of a test.",
+        [
+            ("", {"test": t, "command": c}, s)
+            for t, cmds in ui_tests.items()
+            for c, (_, s) in cmds.items()
+        ],
+    )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class RunMetrics:
+    """Collects per-test data (on workers and in-process) and exports it from the controller."""
+
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.is_worker = hasattr(config, "workerinput")
+        self.started = time.time()
+        self.tests: dict[str, dict] = {}
+        self._timers: dict[str, CommandTimer] = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item: pytest.Item):
+        yield
+        ui = getattr(item, "funcargs", {}).get("ui")
+        driver = getattr(ui, "driver", None)
+        if driver is not None:
+            self._timers[item.nodeid] = CommandTimer(driver).install()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item: pytest.Item):
+        yield
+        timer = self._timers.pop(item.nodeid, None)
+        if timer is not None:
+            timer.remove()
+            item.user_properties.append((WEBDRIVER_PROPERTY, timer.commands))
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        if self.is_worker:
+            return
+        test = self.tests.setdefault(
+            report.nodeid, {"outcome": "passed", "duration": 0.0, "ipstack": None}
+        )
+        test["duration"] += report.duration
+        if report.when == "call":
+            test["outcome"] = report.outcome
+        elif report.skipped:
+            test["outcome"] = "skipped"
+        elif report.failed:
+            test["outcome"] = "error"
+        if report.when != "teardown":
+            return
+        props = dict(report.user_properties)
+        if props.get(IPSTACK_PROPERTY) is not None:
+            test["ipstack"] = props[IPSTACK_PROPERTY]
+        if props.get(WEBDRIVER_PROPERTY):
+            test["webdriver"] = props[WEBDRIVER_PROPERTY]
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        if self.is_worker or not self.tests:
+            return
+        run = {
+            "run_id": uuid.uuid4().hex[:12],
+            "timestamp": self.started,
+            "duration": time.time() - self.started,
+            "label": self.config.getoption("metrics_label"),
+            "outcomes": dict(Counter(t["outcome"] for t in self.tests.values())),
+            "tests": self.tests,
+        }
+        text = render_openmetrics(run)
+        if path := self.config.getoption("metrics_file"):
+            write_atomic(Path(path), text)
+        if url := self.config.getoption("metrics_push"):
+            try:
+                push(url, self.config.getoption("metrics_job"), text)
+            except requests.RequestException as exc:
+                session.config.get_terminal_writer().line(f"Metrics push to {url} failed: {exc}")
+        if path := self.config.getoption("metrics_history"):
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(run) + "\n")
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """
+    Write a file via rename so a textfile collector never reads a partial file.
+
+    :param path: Target, e.g. ``<collector dir>/home_test_aqa.prom``.
+    :param text: File content.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def push(url: str, job: str, text: str, timeout: float = 10) -> None:
+    """
+    Replace the metrics of this job and host on a Pushgateway.
+
+    :param url: Pushgateway base URL.
+    :param job: Job name of the grouping key.
+    :param text: OpenMetrics text.
+    :raise: requests.HTTPError
+    """
+    response = requests.put(
+        f"{url.rstrip('/')}/metrics/job/{job}/instance/{socket.gethostname()}",
+        data=text.encode(),
+        headers={"Content-Type": "application/openmetrics-text; version=1.0.0; charset=utf-8"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+
+class LocalPushgateway:
+    """
+    Minimal Pushgateway stand-in: keeps the last text pushed per grouping key and serves them all
+    on ``GET /metrics``. ``PUT``/``POST`` replace a group, ``DELETE`` removes it.
+
+    :param host: Interface to bind.
+    :param port: Port to bind; 0 picks a free one.
+    """
+
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 0):
+        self.groups: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> LocalPushgateway:
+        """Start serving in a daemon thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> LocalPushgateway:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def exposition(self) -> str:
+        """All pushed groups as one OpenMetrics document."""
+        with self._lock:
+            bodies = [text.replace("# EOF\n", "") for text in self.groups.values()]
+        return "".join(bodies) + "# EOF\n"
+
+    ####################
+    # Internal methods #
+    ####################
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self._reply(404)
+                    return
+                self._reply(200, gateway.exposition().encode())
+
+            def do_PUT(self) -> None:
+                if not self.path.startswith("/metrics/job/"):
+                    self._reply(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                text = self.rfile.read(length).decode()
+                with gateway._lock:
+                    gateway.groups[self.path] = text
+                self._reply(200)
+
+            do_POST = do_PUT
+
+            def do_DELETE(self) -> None:
+                with gateway._lock:
+                    gateway.groups.pop(self.path, None)
+                self._reply(202)
+
+            def _reply(self, status: int, data: bytes = b"") -> None:
+                self.send_response(status)
+                self.send_header(
+                    "Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                )
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        return Handler
+
+
+def load_history(path: Path) -> list[dict]:
+    """
+    Read a ``--metrics-history`` file, skipping lines of an interrupted write.
+
+    :param path: JSON-lines history.
+    :return: Runs, oldest first.
+    """
+    runs = []
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                runs.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return runs
+
+
+def run_series(test: dict) -> dict[str, float]:
+    """
+    Comparable values of one test in one run.
+
+    :param test: Entry of ``run["tests"]``.
+    :return: Series name to value in seconds.
+    """
+    series = {"duration": test["duration"]}
+    ipstack = test.get("ipstack")
+    if ipstack and ipstack["requests"]:
+        series["ipstack mean"] = ipstack["latency_sum"] / ipstack["requests"]
+        series["ipstack p95"] = ipstack["latency_p95"]
+    if test.get("webdriver"):
+        series["webdriver"] = sum(seconds for _, seconds in test["webdriver"].values())
+    return series
+
+
+def compare_runs(
+    runs: list[dict], *, window: int = 5, ratio: float = 0.2, min_delta: float = 0.05
+) -> list[tuple[str, str, float, float]]:
+    """
+    Compare the last run with the median of the runs before it.
+
+    Only tests that passed in the last run are compared, against the runs in which they passed.
+
+    :param runs: History, oldest first.
+    :param window: Number of previous runs forming the baseline.
+    :param ratio: Relative increase above which a value counts as a regression.
+    :param min_delta: Absolute increase in seconds below which differences are noise.
+    :return: ``(test, series, baseline, current)`` per regression, largest increase first.
+    """
+    if len(runs) < 2:
+        return []
+    current, previous = runs[-1], runs[-1 - window : -1]
+    regressions = []
+    for name, test in current["tests"].items():
+        if test["outcome"] != "passed":
+            continue
+        history = [
+            run_series(run["tests"][name])
+            for run in previous
+            if run["tests"].get(name, {}).get("outcome") == "passed"
+        ]
+        for series, value in run_series(test).items():
+            values = [h[series] for h in history if series in h]
+            if not values:
+                continue
+            baseline = statistics.median(values)
+            if value - baseline >= min_delta and value > baseline * (1 + ratio):
+                regressions.append((name, series, baseline, value))
+    return sorted(regressions, key=lambda r: r[3] - r[2], reverse=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Test-run metrics tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Run a local Pushgateway stand-in")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=9091)
+    compare = commands.add_parser("compare", help="Show regressions of the last run")
+    compare.add_argument("history", type=Path)
+    compare.add_argument("--window", type=int, default=5, help="Baseline runs (median).")
+    compare.add_argument("--ratio", type=float, default=0.2, help="Relative threshold.")
+    compare.add_argument("--min-delta", type=float, default=0.05, help="Seconds of noise.")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        gateway = LocalPushgateway(host=args.host, port=args.port)
+        print(f"Serving Pushgateway stand-in on {gateway.base_url}")
+        try:
+            gateway._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            gateway._server.server_close()
+        return 0
+
+    runs = load_history(args.history)
+    if len(runs) < 2:
+        print("Need at least two runs in the history.")
+        return 0
+    regressions = compare_runs(runs, window=args.window, ratio=args.ratio, min_delta=args.min_delta)
+    last = runs[-1]
+    baseline_runs = len(runs[-1 - args.window : -1])
+    print(
+        f"Run {last['run_id']} {last['label']} vs. median of {baseline_runs} previous runs: "
+        f"{len(regressions)} regression(s)"
+    )
+    for name, series, baseline, value in regressions:
+        print(
+            f"{value - baseline:>+8.3f}s {baseline:>8.3f}s -> {value:>8.3f}s "
+            f"{value / baseline if baseline else math.inf:>5.1f}x  {series:<13} {name}"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
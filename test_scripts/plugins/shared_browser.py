@@ -0,0 +1,72 @@
+"""
+Pytest plugin sharing one headless Chrome across UI tests.
+
+With ``UI_SHARED_BROWSER=1`` the controlling process creates a run directory and exports it in
+``UI_SHARED_BROWSER_RUN_DIR``; pytest-xdist workers are started afterwards and inherit it. Chrome
+itself is launched lazily, by the first process whose test asks for the ``ui`` fixture (see
+:class:`~library.ui.SharedBrowser.SharedChromeRun`), so runs selecting no UI tests never start a
+browser. Each process attaches once (``shared_browser`` fixture) and the ``ui`` fixture hands
+every test its own browser context. Setting ``UI_SHARED_BROWSER_ADDRESS`` upfront reuses an
+already running Chrome instead of launching one.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from collections.abc import Generator
+
+import pytest
+
+from library.ui.SharedBrowser import SharedBrowser, SharedChromeRun, chromedriver_path
+
+ADDRESS_ENV = "UI_SHARED_BROWSER_ADDRESS"
+RUN_DIR_ENV = "UI_SHARED_BROWSER_RUN_DIR"
+RUN_KEY = pytest.StashKey[SharedChromeRun]()
+
+
+def enabled() -> bool:
+    return os.getenv(key="UI_SHARED_BROWSER", default="0") == "1"
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # xdist workers carry ``workerinput``; only the controller owns the run directory
+    if not enabled() or os.getenv(ADDRESS_ENV) or hasattr(config, "workerinput"):
+        return
+    run = SharedChromeRun(tempfile.mkdtemp(prefix="shared-chrome-"))
+    config.stash[RUN_KEY] = run
+    os.environ[RUN_DIR_ENV] = str(run.run_dir)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    run = config.stash.get(RUN_KEY, None)
+    if run is not None:
+        os.environ.pop(RUN_DIR_ENV, None)
+        run.stop()
+        shutil.rmtree(run.run_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def shared_browser(request: pytest.FixtureRequest) -> Generator[SharedBrowser, None, None]:
+    """
+    Attachment of this test process to the shared Chrome, launching it for the run if needed.
+
+    :return: Generator yielding a SharedBrowser instance
+    """
+    address = os.getenv(ADDRESS_ENV)
+    if not address:
+        if not os.getenv(RUN_DIR_ENV):
+            pytest.skip("UI_SHARED_BROWSER is not enabled")
+        # The controller's own instance also remembers the host process it may launch here
+        run = request.config.stash.get(RUN_KEY, None) or SharedChromeRun(os.environ[RUN_DIR_ENV])
+        address = run.address()
+    enable_bidi = os.getenv(key="UI_BIDI_EVENTS", default="0") == "1"
+    browser = SharedBrowser(
+        address,
+        chromedriver_path(),
+        enable_bidi=enable_bidi,
+        page_load_strategy=os.getenv(key="UI_PAGE_LOAD_STRATEGY", default="normal"),
+    )
+    yield browser
+    browser.quit()
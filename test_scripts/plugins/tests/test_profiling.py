@@ -0,0 +1,68 @@
+import re
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# Only these tests drive nested pytest runs, so the rest of the suite does not load pytester
+pytest_plugins = ["pytester"]
+
+TEST_MODULE = """
+from library.api.IpStackPage import IpStackPage
+from library.api.LocalIpStack import LocalIpStack
+
+
+def test_lookups():
+    # The stand-in answers from its own thread; the test thread mostly waits on the socket
+    with LocalIpStack(latency=0.05) as stand_in:
+        page = IpStackPage(base_url=stand_in.base_url, access_key="key")
+        for _ in range(12):
+            page.standard_lookup("8.8.8.8")
+"""
+
+
+@pytest.fixture(name="project")
+def tf_project(pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch) -> pytest.Pytester:
+    monkeypatch.setenv("PYTHONPATH", str(PROJECT_ROOT))
+    pytester.makepyfile(test_profiled=TEST_MODULE)
+    return pytester
+
+
+def run(project: pytest.Pytester, mode: str) -> pytest.RunResult:
+    result = project.runpytest_subprocess(
+        "-p", "test_scripts.plugins.profiling", f"--profile-library={mode}", "--profile-dir=prof"
+    )
+    result.assert_outcomes(passed=1)
+    return result
+
+
+def test_cprofile_keeps_calls_into_other_packages(project: pytest.Pytester):
+    result = run(project, "cprofile")
+    result.stdout.fnmatch_lines(
+        ["*library profile (cprofile)*", "*library/api/IpStackPage.py:_get"]
+    )
+    out = project.path / "prof"
+    assert (out / "test_profiled.py_test_lookups.prof").exists()
+    hot = (out / "hot_functions.txt").read_text()
+    assert re.search(r"^\s*[\d.]+\s+[\d.]+\s+\d+\s+\[requests\]$", hot, re.MULTILINE)
+    collapsed = (out / "library.collapsed").read_text().splitlines()
+    assert any(";library/api/IpStackPage.py:_get;[requests] " in line for line in collapsed)
+
+
+@pytest.mark.skipif(
+    not hasattr(time, "pthread_getcpuclockid"), reason="needs per-thread CPU clocks"
+)
+def test_sampling_counts_blocked_time_as_wait(project: pytest.Pytester):
+    result = run(project, "sampling")
+    summary = re.search(r"library self time ([\d.]+)s of ([\d.]+)s", result.stdout.str())
+    self_time, test_time = map(float, summary.groups())
+    # The test waits for the stand-in's answers almost all the time; that is not library CPU
+    assert test_time >= 0.5
+    assert self_time < test_time / 4
+    collapsed = (project.path / "prof" / "library.collapsed").read_text().splitlines()
+    waited = sum(
+        int(line.rsplit(" ", 1)[1]) for line in collapsed if line.split(" ")[0].endswith("[wait]")
+    )
+    assert waited / 1_000_000 > test_time / 2
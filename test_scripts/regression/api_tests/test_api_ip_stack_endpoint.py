@@ -1,5 +1,8 @@
+import os
+
 import pytest
 
+from library.api.IpCaseGenerator import IpCaseGenerator, run_cases
 from library.api.ValidatorsPage import (
     ContentContains,
     HeaderStartsWith,
@@ -71,8 +74,34 @@ standard_cases = [
 def test_standard_lookup_param_clean(api: Api, case, validators):
     """Test standard_lookup with various parameters and validate the responses."""
 
-    response = api.ip_stack.standard_lookup(case["ip"], **case["kwargs"])
-    response.check(*validators)
+    api.ip_stack.checked_lookup(case["ip"], *validators, **case["kwargs"])
+
+
+# ---- GENERATED STANDARD LOOKUP CASES ----
+# IPSTACK_GENERATED_CASES=N runs N generated inputs, one test per batch of IPSTACK_GENERATED_BATCH;
+# batches are generated when their test runs, so collection stays cheap for large N.
+GENERATED_CASES = int(os.getenv("IPSTACK_GENERATED_CASES", "0"))
+generated = IpCaseGenerator(
+    seed=int(os.getenv("IPSTACK_GENERATED_SEED", "0")),
+    batch_size=int(os.getenv("IPSTACK_GENERATED_BATCH", "1000")),
+)
+
+
+@pytest.mark.skipif(not GENERATED_CASES, reason="Set IPSTACK_GENERATED_CASES to run.")
+@pytest.mark.parametrize(
+    "batch_index",
+    [pytest.param(i, id=f"batch-{i}") for i in range(generated.batch_count(GENERATED_CASES))]
+    or [pytest.param(0, id="batch-0")],
+)
+def test_standard_lookup_generated(api: Api, batch_index: int):
+    """Test standard_lookup with generated public, reserved and malformed IPs."""
+
+    report = run_cases(
+        api.ip_stack,
+        generated.batch(batch_index, total=GENERATED_CASES),
+        workers=int(os.getenv("IPSTACK_GENERATED_WORKERS", "8")),
+    )
+    assert report.ok, report.summary()
 
 
 # TODO: Commented out as the bulk lookup feature is not available in the current subscription plan.
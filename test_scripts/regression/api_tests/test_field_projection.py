@@ -0,0 +1,57 @@
+import pytest
+
+from library.api.IpStackPage import IpStackPage, projected_fields
+from library.api.LocalIpStack import LocalIpStack, fake_lookup
+from library.api.ValidatorsPage import (
+    ContentContains,
+    IsJSON,
+    JsonExactKeys,
+    JsonFieldEquals,
+    JsonHasKeys,
+    StatusCodeIs,
+)
+
+
+@pytest.mark.parametrize(
+    "validators, expected",
+    [
+        pytest.param(
+            [StatusCodeIs(200), IsJSON(), JsonFieldEquals("ip", "1.1.1.1"), JsonHasKeys(["city"])],
+            "city,ip",
+            id="union-of-declared-fields",
+        ),
+        pytest.param([JsonExactKeys(["zip"])], None, id="exact-keys"),
+        pytest.param(
+            [JsonHasKeys(["ip"]), JsonExactKeys(["zip"])], None, id="exact-keys-with-has-keys"
+        ),
+        pytest.param([StatusCodeIs(200), IsJSON()], None, id="no-fields-read"),
+        pytest.param(
+            [JsonFieldEquals("ip", "1.1.1.1"), ContentContains([b"<ip>"])],
+            None,
+            id="full-payload-required",
+        ),
+    ],
+)
+def test_projected_fields(validators, expected):
+    """The projection is the union of declared fields, or None when it cannot be applied."""
+    assert projected_fields(validators) == expected
+
+
+def test_exact_keys_sees_the_full_payload_next_to_other_key_validators():
+    """Projection must not narrow the payload an exact-keys check compares against."""
+    with LocalIpStack() as stand_in:
+        page = IpStackPage(base_url=stand_in.base_url, access_key="key", project_fields=True)
+        page.checked_lookup(
+            "8.8.8.8", JsonHasKeys(["ip"]), JsonExactKeys(fake_lookup("8.8.8.8").keys())
+        )
+    assert "fields" not in page.request_log[-1].params
+
+
+def test_projected_hostname_is_returned_when_requested():
+    """hostname=1 adds the field before the projection, so asking for it keeps it."""
+    with LocalIpStack() as stand_in:
+        page = IpStackPage(base_url=stand_in.base_url, access_key="key", project_fields=True)
+        page.checked_lookup(
+            "8.8.8.8", JsonExactKeys(["hostname", "ip"]), fields="hostname,ip", hostname=1
+        )
+        page.checked_lookup("8.8.8.8", JsonExactKeys(["ip"]), fields="ip", hostname=1)
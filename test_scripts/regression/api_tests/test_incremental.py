@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from test_scripts.plugins.incremental import PROJECT_ROOT
+
+# Only these tests drive nested pytest runs, so the rest of the suite does not load pytester
+pytest_plugins = ["pytester"]
+
+TEST_MODULE = """
+from helper import answer
+from schemas import SUCCESS_SCHEMA
+
+
+@pytest.mark.parametrize("n", [1, 2])
+def test_answer(n):
+    assert answer() == 42 and SUCCESS_SCHEMA
+
+
+def test_cassette(cassette):
+    assert cassette
+"""
+
+CONFTEST = """
+import pytest
+
+CASSETTE = "cassette.har"
+
+
+@pytest.fixture
+def cassette():
+    return open(CASSETTE).read()
+
+
+def pytest_incremental_inputs(item):
+    return [CASSETTE] if "cassette" in item.fixturenames else []
+"""
+
+
+@pytest.fixture(name="project")
+def tf_project(pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch) -> pytest.Pytester:
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([str(PROJECT_ROOT), str(pytester.path)]))
+    pytester.makepyfile(
+        conftest=CONFTEST,
+        helper="def answer():\n    return 42\n",
+        schemas='SUCCESS_SCHEMA = {"type": "object"}\nERROR_SCHEMA = {"type": "object"}\n',
+        test_project="import pytest\n" + TEST_MODULE,
+    )
+    pytester.path.joinpath("cassette.har").write_text("{}")
+    return pytester
+
+
+def run(project: pytest.Pytester, *args: str) -> pytest.RunResult:
+    return project.runpytest_subprocess("-p", "test_scripts.plugins.incremental", *args)
+
+
+def test_unchanged_tests_are_skipped_with_cached_result(project: pytest.Pytester):
+    run(project, "--incremental").assert_outcomes(passed=3)
+    result = run(project, "--incremental", "-rs")
+    result.assert_outcomes(skipped=3)
+    result.stdout.fnmatch_lines(["3 reused*", "*incremental: unchanged, passed * in *s*"])
+    run(project, "--incremental", "--force-rerun").assert_outcomes(passed=3)
+
+
+def test_changed_inputs_rerun_only_dependent_tests(project: pytest.Pytester):
+    run(project, "--incremental").assert_outcomes(passed=3)
+
+    # An unrelated schema does not count, the imported one does
+    project.makepyfile(
+        schemas='SUCCESS_SCHEMA = {"type": "object"}\nERROR_SCHEMA = {"type": "array"}\n'
+    )
+    run(project, "--incremental").assert_outcomes(skipped=3)
+    project.makepyfile(schemas='SUCCESS_SCHEMA = {"type": "array"}\n')
+    run(project, "--incremental").assert_outcomes(passed=2, skipped=1)
+
+    project.path.joinpath("cassette.har").write_text('{"log": {}}')
+    run(project, "--incremental").assert_outcomes(passed=1, skipped=2)
+
+    # Code is tracked per module: every test of a module importing the helper reruns
+    project.makepyfile(helper="def answer():\n    return 41\n")
+    run(project, "--incremental").assert_outcomes(failed=2, passed=1)
+    # Failures are never cached
+    run(project, "--incremental").assert_outcomes(failed=2, skipped=1)
+
+
+def test_environment_is_part_of_the_fingerprint(
+    project: pytest.Pytester, monkeypatch: pytest.MonkeyPatch
+):
+    run(project, "--incremental").assert_outcomes(passed=3)
+    monkeypatch.setenv("IPSTACK_API_KEY", "other")
+    run(project, "--incremental").assert_outcomes(passed=3)
+
+
+def test_schema_attribute_reads_count_as_schema_inputs(project: pytest.Pytester):
+    project.makepyfile(
+        test_attribute="import schemas\n\n\ndef test_error():\n    assert schemas.ERROR_SCHEMA\n"
+    )
+    run(project, "--incremental").assert_outcomes(passed=4)
+    project.makepyfile(
+        schemas='SUCCESS_SCHEMA = {"type": "object"}\nERROR_SCHEMA = {"type": "array"}\n'
+    )
+    run(project, "--incremental").assert_outcomes(passed=1, skipped=3)
+    project.makepyfile(
+        schemas='SUCCESS_SCHEMA = {"type": "array"}\nERROR_SCHEMA = {"type": "array"}\n'
+    )
+    run(project, "--incremental").assert_outcomes(passed=2, skipped=2)
+
+
+def test_fixture_changes_rerun_only_tests_using_it(project: pytest.Pytester):
+    run(project, "--incremental").assert_outcomes(passed=3)
+    project.makepyfile(conftest=CONFTEST.replace(".read()", ".read().strip()"))
+    run(project, "--incremental").assert_outcomes(passed=1, skipped=2)
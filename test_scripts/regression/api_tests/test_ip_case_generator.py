@@ -0,0 +1,70 @@
+import ipaddress
+import itertools
+import socket
+from collections import Counter
+
+import pytest
+
+from library.api.IpCaseGenerator import IpCaseGenerator, run_cases
+from library.api.IpStackPage import IpStackPage
+from library.api.LocalIpStack import LocalIpStack
+
+
+@pytest.fixture(scope="module")
+def batch():
+    return IpCaseGenerator(seed=42, batch_size=20_000).batch(0)
+
+
+class TestIpCaseGenerator:
+    def test_seeded_and_batches_independent(self):
+        """The same seed gives the same cases; any batch can be regenerated on its own."""
+        generator = IpCaseGenerator(seed=1, batch_size=100)
+        streamed = list(generator.cases(350))
+        assert len(streamed) == 350
+        assert [c.ip for c in streamed[200:300]] == [c.ip for c in generator.batch(2)]
+        assert [c.ip for c in generator.batch(3, total=350)] == [c.ip for c in streamed[300:]]
+        assert [c.ip for c in IpCaseGenerator(seed=2, batch_size=100).batch(0)] != [
+            c.ip for c in streamed[:100]
+        ]
+        assert [c.index for c in streamed] == list(range(350))
+
+    def test_cases_are_generated_lazily(self):
+        """Taking a few cases from a huge stream only generates the first batch."""
+        generator = IpCaseGenerator(seed=3, batch_size=50)
+        first = list(itertools.islice(generator.cases(10**9), 5))
+        assert len(first) == 5
+
+    def test_kinds_match_their_classification(self, batch):
+        """Public draws are global, special ones lie in their range, malformed ones do not parse."""
+        kinds = Counter(c.kind for c in batch)
+        assert kinds["public_v4"] > kinds["public_v6"] > 0
+        assert kinds["special"] > 0 and kinds["malformed"] > 0
+        for case in batch:
+            if case.kind.startswith("public"):
+                assert ipaddress.ip_address(case.ip).is_global, case
+            elif case.kind == "special":
+                assert ipaddress.ip_address(case.ip) in ipaddress.ip_network(case.stratum), case
+            else:
+                with pytest.raises(ValueError):
+                    ipaddress.ip_address(case.ip)
+                # Lenient parsers must reject it too, or the API could rightly answer it
+                if case.stratum.startswith("v4-"):
+                    with pytest.raises(OSError):
+                        socket.inet_aton(case.ip)
+
+    def test_public_v4_is_stratified_over_slash8(self, batch):
+        """Every routable /8 gets an equal share (within one) of the IPv4 draw."""
+        per_block = Counter(c.stratum for c in batch if c.kind == "public_v4")
+        assert len(per_block) == 221
+        assert max(per_block.values()) - min(per_block.values()) <= 1
+
+    def test_run_cases_against_stand_in(self):
+        """The streaming runner checks every case against the local stand-in."""
+        with LocalIpStack(access_key="local") as server:
+            report = run_cases(
+                IpStackPage(server.base_url, "local"),
+                IpCaseGenerator(seed=5, batch_size=100).cases(300),
+                workers=4,
+            )
+        assert report.total == 300
+        assert report.ok, report.summary()
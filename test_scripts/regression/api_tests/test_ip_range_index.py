@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+import requests
+
+from library.api.IpRangeIndex import DriftChecker, IpRangeIndex, IpRangeIndexBuilder
+from library.api.IpStackPage import ResponseWrapper
+from library.api.ValidatorsPage import MatchesIpRangeIndex
+
+US = {
+    "country_code": "US",
+    "country_name": "United States",
+    "continent_code": "NA",
+    "continent_name": "North America",
+    "latitude": 37.751,
+    "longitude": -97.822,
+}
+DE = {
+    "country_code": "DE",
+    "country_name": "Germany",
+    "continent_code": "EU",
+    "continent_name": "Europe",
+    "latitude": 51.2993,
+    "longitude": 9.491,
+}
+
+GEO_CSV = """network,start_ip,end_ip,country_code,country_name,continent_code,continent_name,latitude,longitude
+8.8.8.0/24,,,US,United States,NA,North America,37.751,-97.822
+,134.201.250.0,134.201.250.255,DE,Germany,EU,Europe,51.2993,9.491
+2001:4860::/32,,,US,United States,NA,North America,37.751,-97.822
+"""
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    """Index built from a small CSV dataset and written to disk."""
+    csv_path = tmp_path / "geo.csv"
+    csv_path.write_text(GEO_CSV)
+    return IpRangeIndexBuilder.from_csv(csv_path).write(tmp_path / "geo.idx")
+
+
+class TestIpRangeIndex:
+    def test_memory_mapped_lookups(self, index_file):
+        """IPv4 and IPv6 lookups hit the right range and miss outside of it."""
+        index = IpRangeIndex.open(index_file)
+        assert len(index) == 3
+        assert index.lookup("8.8.8.8")["country_code"] == "US"
+        assert index.lookup("134.201.250.155")["country_name"] == "Germany"
+        assert index.lookup("2001:4860:4860::8888")["continent_code"] == "NA"
+        assert index.lookup("8.8.9.0") is None
+        assert index.lookup("2001:4861::1") is None
+        index.close()
+
+    def test_batch_lookup_matches_single_lookups(self, index_file):
+        """Vectorized lookups agree with bisect lookups, for strings and integer arrays."""
+        index = IpRangeIndex.open(index_file)
+        ips = ["8.8.8.0", "8.8.8.255", "8.8.7.255", "134.201.250.1", "2001:4860::", "::1"]
+        assert index.lookup_many(ips) == [index.lookup(ip) for ip in ips]
+        ids = index.lookup_ids_v4(np.array([0x08080808, 0x08080900], dtype=np.uint32))
+        assert ids.tolist()[1] == -1 and ids.tolist()[0] >= 0
+
+    def test_build_from_recorded_responses(self):
+        """Recorded ipstack payloads become single-address ranges; errors are ignored."""
+        payloads = [
+            {"ip": "1.1.1.1", **US},
+            [{"ip": "2.2.2.2", **DE}],
+            {"success": False, "error": {"code": 101, "type": "invalid_access_key", "info": ""}},
+        ]
+        index = IpRangeIndexBuilder.from_responses(payloads).build()
+        assert index.lookup("1.1.1.1")["country_code"] == "US"
+        assert index.lookup("2.2.2.2")["country_code"] == "DE"
+        assert index.lookup("1.1.1.2") is None
+
+    def test_overlapping_ranges_are_rejected(self):
+        """Overlaps would make binary search ambiguous."""
+        builder = IpRangeIndexBuilder()
+        builder.add_network("10.0.0.0/8", US)
+        builder.add_network("10.1.0.0/16", DE)
+        with pytest.raises(ValueError, match="Overlapping"):
+            builder.build()
+
+
+class TestDriftChecker:
+    def test_batch_flags_country_and_distance_drift(self, index_file):
+        """Mismatching countries and far-away coordinates are reported per IP."""
+        checker = DriftChecker(IpRangeIndex.open(index_file), tolerance_km=50)
+        report = checker.check_batch(
+            [
+                {"ip": "8.8.8.8", **US},
+                {"ip": "134.201.250.155", **US},
+                {"ip": "8.8.8.9", **US, "latitude": 40.0},
+                {"ip": "9.9.9.9", **US},
+            ]
+        )
+        assert report.checked == 4
+        assert report.not_indexed == ["9.9.9.9"]
+        assert set(report.mismatches) == {"134.201.250.155", "8.8.8.9"}
+        assert any("country_code" in r for r in report.mismatches["134.201.250.155"])
+        assert any("km away" in r for r in report.mismatches["8.8.8.9"])
+
+    def test_validator(self, index_file):
+        """MatchesIpRangeIndex plugs the comparison into ResponseWrapper.check."""
+        index = IpRangeIndex.open(index_file)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"ip": "8.8.8.8", **DE}).encode()
+        with pytest.raises(AssertionError, match="drifted"):
+            ResponseWrapper(response).check(MatchesIpRangeIndex(index))
+        response._content = json.dumps({"ip": "8.8.8.8", **US}).encode()
+        ResponseWrapper(response).check(MatchesIpRangeIndex(index))
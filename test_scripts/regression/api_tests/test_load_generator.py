@@ -0,0 +1,64 @@
+import pytest
+
+from library.api.IpStackPage import IpStackPage
+from library.api.LoadGenerator import LoadGenerator, RampProfile, load_ips
+from library.api.LocalIpStack import LocalIpStack
+
+
+@pytest.fixture
+def stand_in():
+    """Local ipstack stand-in with a small fixed latency."""
+    with LocalIpStack(access_key="local", latency=0.005) as server:
+        yield server
+
+
+class TestLoadGenerator:
+    @pytest.mark.parametrize("model", ["closed", "open"])
+    @pytest.mark.parametrize("workers", ["thread", "asyncio"])
+    def test_run_against_stand_in(self, stand_in, model, workers):
+        """Every load model and worker type completes requests without errors."""
+        generator = LoadGenerator(
+            IpStackPage(stand_in.base_url, "local"),
+            ["8.8.8.8", "1.1.1.1", "2001:4860:4860::8888"],
+            model=model,
+            workers=workers,
+            users=4,
+            rate=40,
+            duration=1.0,
+            report_interval=0,
+        )
+        stats = generator.run()
+        assert stats.total > 0
+        assert stats.errors == 0
+        assert stats.percentile(99) is not None
+
+    def test_error_mix_reports_ipstack_error_types(self):
+        """Rate-limited and invalid-key answers are classified by status and error type."""
+        with LocalIpStack(access_key="local", rate_limit=5) as server:
+            limited = LoadGenerator(
+                IpStackPage(server.base_url, "local"),
+                ["8.8.8.8"],
+                users=2,
+                duration=0.5,
+                report_interval=0,
+            ).run()
+            invalid = LoadGenerator(
+                IpStackPage(server.base_url, "wrong"),
+                ["8.8.8.8"],
+                users=1,
+                duration=0.2,
+                report_interval=0,
+            ).run()
+        assert limited.outcomes["http_429"] > 0
+        assert set(invalid.outcomes) == {"invalid_access_key"}
+
+    def test_ramp_profile_and_ip_file(self, tmp_path):
+        """Ramp is linear until ramp_up, IP files skip headers and comments."""
+        profile = RampProfile(target=100, ramp_up=10)
+        assert profile.at(0) == 0
+        assert profile.at(5) == 50
+        assert profile.at(20) == 100
+
+        ips_file = tmp_path / "ips.csv"
+        ips_file.write_text("ip,comment\n# skipped\n8.8.8.8,google\n\n1.1.1.1\n")
+        assert load_ips(ips_file) == ["8.8.8.8", "1.1.1.1"]
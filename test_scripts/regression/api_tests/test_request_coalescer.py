@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from library.api.IpStackPage import IpStackPage
+from library.api.RequestCoalescer import RequestCoalescer
+
+
+class TestRequestCoalescer:
+    def test_concurrent_threads_share_one_call(self):
+        """Identical concurrent calls are executed once and all callers get the same result."""
+        coalescer = RequestCoalescer()
+        executions = []
+        gate = threading.Event()
+
+        def slow():
+            executions.append(1)
+            gate.wait(2)
+            return "payload"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(coalescer.do, "key", slow) for _ in range(8)]
+            time.sleep(0.2)
+            gate.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["payload"] * 8
+        assert len(executions) == 1
+        assert coalescer.stats.as_dict() == {
+            "calls": 8,
+            "executions": 1,
+            "coalesced": 7,
+            "errors": 0,
+        }
+
+    def test_error_is_propagated_to_all_waiters(self):
+        """An exception raised by the leader is re-raised in every waiting caller."""
+        coalescer = RequestCoalescer()
+        gate = threading.Event()
+
+        def failing():
+            gate.wait(2)
+            raise ConnectionError("boom")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(coalescer.do, "key", failing) for _ in range(4)]
+            time.sleep(0.2)
+            gate.set()
+            for f in futures:
+                with pytest.raises(ConnectionError, match="boom"):
+                    f.result()
+
+        assert coalescer.stats.errors == 1
+        assert coalescer.in_flight() == 0
+
+    def test_asyncio_callers_are_coalesced(self):
+        """Concurrent coroutines with the same key share a single execution."""
+        coalescer = RequestCoalescer()
+        executions = []
+
+        def slow():
+            executions.append(1)
+            time.sleep(0.2)
+            return 42
+
+        async def main():
+            return await asyncio.gather(*(coalescer.do_async("key", slow) for _ in range(5)))
+
+        assert asyncio.run(main()) == [42] * 5
+        assert len(executions) == 1
+        assert coalescer.stats.coalesced == 4
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        """Followers still get the shared result when the first caller is cancelled."""
+        coalescer = RequestCoalescer()
+        executions = []
+
+        def slow():
+            executions.append(1)
+            time.sleep(0.2)
+            return 42
+
+        async def main():
+            leader = asyncio.ensure_future(coalescer.do_async("key", slow))
+            await asyncio.sleep(0.05)
+            followers = [asyncio.ensure_future(coalescer.do_async("key", slow)) for _ in range(3)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return results
+
+        assert asyncio.run(main()) == [42] * 3
+        assert len(executions) == 1
+        assert coalescer.stats.coalesced == 3
+
+    def test_ip_stack_coalesces_identical_lookups_only(self, monkeypatch):
+        """IpStackPage coalesces lookups with identical parameters, not different ones."""
+        client = IpStackPage("http://localhost", "key", coalesce=True)
+        sent = []
+
+        def fake_get(url, params=None, **kwargs):
+            sent.append((url, dict(params or {})))
+            time.sleep(0.2)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b"{}"
+            return response
+
+        monkeypatch.setattr(client.session, "get", fake_get)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            same = [pool.submit(client.standard_lookup, "8.8.8.8") for _ in range(4)]
+            other = pool.submit(client.standard_lookup, "8.8.8.8", language="ru")
+            responses = [f.result() for f in same]
+            other.result()
+
+        assert len({id(r) for r in responses}) == 1
+        assert len(sent) == 2
@@ -0,0 +1,97 @@
+import requests
+
+from test_scripts.plugins.run_metrics import (
+    CommandTimer,
+    LocalPushgateway,
+    compare_runs,
+    ipstack_summary,
+    push,
+    render_openmetrics,
+)
+
+
+def record(ips: str, elapsed: float) -> dict:
+    return {"url": f"http://api.ipstack.com/{ips}", "elapsed": elapsed}
+
+
+def make_run(duration: float, latency: float = 0.1, outcome: str = "passed") -> dict:
+    return {
+        "run_id": "r",
+        "timestamp": 1_700_000_000.0,
+        "duration": duration,
+        "label": "",
+        "outcomes": {outcome: 2},
+        "tests": {
+            "test_api.py::test_lookup": {
+                "outcome": outcome,
+                "duration": duration,
+                "ipstack": ipstack_summary([record("1.1.1.1", latency)]),
+            },
+            'test_ui.py::test_menu[a "b"]': {
+                "outcome": outcome,
+                "duration": 2.0,
+                "ipstack": None,
+                "webdriver": {"findElement": [3, 0.3]},
+            },
+        },
+    }
+
+
+def test_ipstack_summary_counts_bulk_addresses_and_hedges():
+    summary = ipstack_summary([record("1.1.1.1,8.8.8.8", 0.2), record("9.9.9.9", 0.6)], hedges=1)
+    assert summary["requests"] == 2
+    assert summary["quota"] == 4
+    assert summary["latency_max"] == summary["latency_p95"] == 0.6
+    assert summary["buckets"][:4] == [0, 0, 1, 1]
+
+
+def test_openmetrics_text():
+    text = render_openmetrics(make_run(1.5))
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF"
+    assert 'aqa_test_ipstack_quota{test="test_api.py::test_lookup"} 1' in lines
+    assert 'aqa_ipstack_request_duration_seconds_bucket{le="+Inf"} 1' in lines
+    assert (
+        'aqa_test_webdriver_commands{test="test_ui.py::test_menu[a \\"b\\"]",'
+        'command="findElement"} 3'
+    ) in lines
+    # Every sample belongs to the family declared above it
+    families = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(families) == len(set(families))
+
+
+def test_compare_flags_only_real_regressions():
+    runs = [make_run(d) for d in (1.0, 1.1, 0.9, 1.0)]
+    assert compare_runs([*runs, make_run(1.1)]) == []
+    assert compare_runs([*runs, make_run(1.0, outcome="failed")]) == []
+    regressions = compare_runs([*runs, make_run(1.6, latency=0.3)])
+    assert [(name, series) for name, series, *_ in regressions] == [
+        ("test_api.py::test_lookup", "duration"),
+        ("test_api.py::test_lookup", "ipstack mean"),
+        ("test_api.py::test_lookup", "ipstack p95"),
+    ]
+
+
+def test_command_timer_restores_driver():
+    class Driver:
+        def execute(self, driver_command, params=None):
+            return {"value": driver_command}
+
+    driver = Driver()
+    timer = CommandTimer(driver).install()
+    driver.execute("findElement", {})
+    driver.execute("findElement", {})
+    driver.execute("getTitle")
+    timer.remove()
+    assert "execute" not in vars(driver)
+    assert {c: n for c, (n, _) in timer.commands.items()} == {"findElement": 2, "getTitle": 1}
+
+
+def test_push_to_local_pushgateway():
+    with LocalPushgateway() as gateway:
+        push(gateway.base_url, "aqa", render_openmetrics(make_run(1.0)))
+        push(gateway.base_url, "aqa", render_openmetrics(make_run(2.0)))
+        text = requests.get(f"{gateway.base_url}/metrics", timeout=5).text
+    assert len(gateway.groups) == 1
+    assert 'aqa_test_duration_seconds{test="test_api.py::test_lookup",outcome="passed"} 2' in text
+    assert text.count("# EOF") == 1
@@ -0,0 +1,137 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from library.api.TailLatency import LatencyHistogram, TailLatencyGuard
+
+
+def warmed_guard(latency: float = 0.01, **kwargs) -> TailLatencyGuard:
+    """Guard whose histogram already holds enough fast samples to enable hedging."""
+    guard = TailLatencyGuard(min_samples=10, **kwargs)
+    for _ in range(10):
+        guard.histogram.record(latency)
+    return guard
+
+
+class TestTailLatency:
+    def test_histogram_percentiles(self):
+        """Nearest-rank percentiles over the rolling window."""
+        histogram = LatencyHistogram(window=100)
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+        assert histogram.percentile(50) == 0.05
+        assert histogram.percentile(95) == 0.095
+        assert LatencyHistogram().percentile(95) is None
+
+    def test_adaptive_timeout_is_clamped(self):
+        """The timeout follows p99 x multiplier within the configured bounds."""
+        assert TailLatencyGuard(default_timeout=7).timeout() == 7
+        assert warmed_guard(0.01, min_timeout=0.5).timeout() == 0.5
+        assert warmed_guard(20, max_timeout=30).timeout() == 30
+
+    def test_slow_primary_is_hedged_and_hedge_wins(self):
+        """A primary slower than p95 triggers a hedge whose answer is returned."""
+        guard = warmed_guard(hedge_budget=1.0)
+        attempts = []
+
+        def attempt(timeout):
+            attempts.append(timeout)
+            if len(attempts) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "fast"
+
+        start = time.perf_counter()
+        assert guard.call(attempt) == "fast"
+        # The caller returns with the hedge instead of waiting for the slow primary
+        assert time.perf_counter() - start < 0.3
+        assert guard.stats.hedges_fired == 1
+        assert guard.stats.hedges_won == 1
+        guard.close()
+
+    def test_hedges_are_capped_by_budget(self):
+        """Without budget left, slow calls simply wait for the primary attempt."""
+        guard = warmed_guard(hedge_budget=0.0)
+
+        def attempt(timeout):
+            time.sleep(0.05)
+            return "ok"
+
+        assert guard.call(attempt) == "ok"
+        assert guard.stats.hedges_fired == 0
+        assert guard.stats.hedges_skipped_budget == 1
+        guard.close()
+
+    def test_warming_up_runs_inline_and_records_attempt_time(self):
+        """Without a hedge mark the attempt runs on the caller's thread; latency is its own."""
+        guard = TailLatencyGuard(min_samples=10)
+        threads = []
+
+        def attempt(timeout):
+            threads.append(threading.current_thread())
+            time.sleep(0.01)
+            return "ok"
+
+        assert guard.call(attempt) == "ok"
+        assert threads == [threading.current_thread()]
+        assert guard.stats.hedges_fired == 0
+
+        guard = warmed_guard(hedge_budget=0.0)
+        assert guard.call(attempt) == "ok"
+        assert guard.histogram.percentile(100) < 0.01 + 0.005
+        guard.close()
+
+    def test_failed_primary_falls_back_to_hedge_and_loser_is_closed(self):
+        """A primary failing after the hedge was sent returns the hedge's answer."""
+        guard = warmed_guard(hedge_budget=1.0)
+
+        class Response:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        responses = []
+        attempts = itertools.count()
+
+        def attempt(timeout):
+            if next(attempts) == 0:
+                time.sleep(0.2)
+                raise TimeoutError("primary")
+            responses.append(Response())
+            return responses[-1]
+
+        assert guard.call(attempt) is responses[0]
+        assert guard.stats.hedges_won == 1
+
+        attempts = itertools.count()
+
+        def slow_hedge(timeout):
+            if next(attempts) == 0:
+                time.sleep(0.05)
+                return "primary"
+            time.sleep(0.2)
+            responses.append(Response())
+            return responses[-1]
+
+        assert guard.call(slow_hedge) == "primary"
+        assert guard.stats.hedges_won == 1
+        time.sleep(0.3)
+        assert responses[-1].closed
+        guard.close()
+
+    def test_all_attempts_failing_raises_the_last_error(self):
+        """When neither attempt succeeds the caller sees the error of the one that failed last."""
+        guard = warmed_guard(hedge_budget=1.0)
+        attempts = itertools.count()
+
+        def attempt(timeout):
+            number = next(attempts)
+            time.sleep(0.1 if number == 0 else 0.2)
+            raise TimeoutError(f"attempt {number}")
+
+        with pytest.raises(TimeoutError, match="attempt 1"):
+            guard.call(attempt)
+        guard.close()
@@ -34,6 +34,10 @@ def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo):
     png_bytes = driver.get_screenshot_as_png()
     filepath.write_bytes(png_bytes)
 
+    events = getattr(ui, "events", None)
+    if events is not None:
+        events.dump(screenshots_dir / f"{item.name}-{ts}.events.jsonl")
+
     png_b64 = base64.b64encode(png_bytes).decode("ascii")
     extra = getattr(rep, "extra", [])
     extra.append(extras.image(png_b64, mime_type="image/png"))
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from library.ui.BasePage import BasePage
+from library.ui.BrowserEvents import BrowserEventStream
+
+
+class FakeConnection:
+    """Stands in for selenium's BiDi WebSocketConnection."""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.commands = []
+
+    def add_callback(self, event, callback):
+        self.callbacks.setdefault(event.event_class, []).append(callback)
+        return id(callback)
+
+    def remove_callback(self, event, callback_id):
+        self.callbacks[event.event_class] = [
+            cb for cb in self.callbacks[event.event_class] if id(cb) != callback_id
+        ]
+
+    def execute(self, command):
+        self.commands.append(next(command))
+        try:
+            command.send({"script": "preload-1"})
+        except StopIteration as stop:
+            return stop.value
+
+    def emit(self, method, params):
+        for callback in self.callbacks.get(method, []):
+            callback(params)
+
+
+class FakeScript:
+    def __init__(self, conn):
+        self.conn = conn
+
+
+class FakeDriver:
+    current_window_handle = "CTX"
+
+    def __init__(self):
+        self.capabilities = {"pageLoadStrategy": "normal"}
+        self.script = FakeScript(FakeConnection())
+
+    def execute_script(self, script):
+        return False
+
+
+def emit_later(conn, method, params, delay=0.05):
+    timer = threading.Timer(delay, conn.emit, args=(method, params))
+    timer.start()
+    return timer
+
+
+@pytest.fixture(name="stream")
+def tf_stream():
+    stream = BrowserEventStream(FakeDriver(), capacity=3).start()
+    yield stream
+    stream.stop()
+
+
+def test_subscribes_to_the_test_context_only(stream: BrowserEventStream):
+    conn = stream.driver.script.conn
+    subscribe, preload = conn.commands
+    assert subscribe["method"] == "session.subscribe"
+    assert subscribe["params"]["contexts"] == ["CTX"]
+    assert preload["method"] == "script.addPreloadScript"
+    assert BrowserEventStream.of(stream.driver) is stream
+
+    stream.stop()
+    assert BrowserEventStream.of(stream.driver) is None
+    assert [c["method"] for c in conn.commands[2:]] == [
+        "script.removePreloadScript",
+        "session.unsubscribe",
+    ]
+
+
+def test_ring_buffer_drops_oldest(stream: BrowserEventStream):
+    conn = stream.driver.script.conn
+    for i in range(5):
+        conn.emit("log.entryAdded", {"type": "console", "level": "info", "text": str(i)})
+    assert [e.params["text"] for e in stream.events()] == ["2", "3", "4"]
+    assert stream.dropped == 2
+
+
+def test_wait_for_load_waits_for_the_pending_navigation(stream: BrowserEventStream):
+    conn = stream.driver.script.conn
+    stream.wait_for_load(timeout=0.1)  # nothing in flight
+
+    conn.emit("browsingContext.navigationStarted", {"context": "CTX", "navigation": "n1"})
+    conn.emit("browsingContext.load", {"context": "OTHER", "navigation": "n9"})
+    with pytest.raises(TimeoutException):
+        stream.wait_for_load(timeout=0.1)
+
+    emit_later(conn, "browsingContext.load", {"context": "CTX", "navigation": "n1"})
+    stream.wait_for_load(timeout=2)
+    assert stream.pending_navigation() is None
+
+
+def test_stream_wait_keys_off_preload_message(stream: BrowserEventStream):
+    page = BasePage(stream.driver)
+    assert page.events is stream
+    message = {
+        "channel": "aqa-page-events",
+        "source": {"context": "CTX"},
+        "data": {
+            "type": "object",
+            "value": [
+                ["kind", {"type": "string", "value": "canplaythrough"}],
+                ["tag", {"type": "string", "value": "VIDEO"}],
+                ["readyState", {"type": "number", "value": 4}],
+            ],
+        },
+    }
+    emit_later(stream.driver.script.conn, "script.message", message)
+    page.wait_for_stream_to_load(timeout=2)
+    assert stream.events("script.message")[0].data["readyState"] == 4
+
+
+def test_wait_for_load_after_an_action_waits_for_the_navigation_it_starts(
+    stream: BrowserEventStream,
+):
+    conn = stream.driver.script.conn
+    since = stream.mark()
+    started = emit_later(
+        conn, "browsingContext.navigationStarted", {"context": "CTX", "navigation": "n2"}, 0.1
+    )
+    loaded = emit_later(conn, "browsingContext.load", {"context": "CTX", "navigation": "n2"}, 0.2)
+    stream.wait_for_load(timeout=0.05)  # without a mark the click looks like no navigation
+    stream.wait_for_load(timeout=2, since=since)
+    assert [e.method for e in stream.events(since=since)][-1] == "browsingContext.load"
+    started.join()
+    loaded.join()
+
+    start = time.monotonic()
+    stream.wait_for_load(timeout=2, since=stream.mark(), start_timeout=0.1)  # did not navigate
+    assert time.monotonic() - start < 1
+
+
+def test_stream_wait_ignores_foreign_and_malformed_messages(stream: BrowserEventStream):
+    conn = stream.driver.script.conn
+    page = BasePage(stream.driver)
+    ready = {
+        "type": "object",
+        "value": [
+            ["kind", {"type": "string", "value": "canplaythrough"}],
+            ["tag", {"type": "string", "value": "VIDEO"}],
+        ],
+    }
+    emit_later(conn, "script.message", {"channel": "other-extension", "data": ready}, 0.02)
+    emit_later(conn, "script.message", {"channel": "aqa-page-events", "data": {"type": "null"}})
+    with pytest.raises(TimeoutException):
+        page.wait_for_stream_to_load(timeout=0.3)
+    assert len(stream.events("script.message")) == 2
+    emit_later(conn, "script.message", {"channel": "aqa-page-events", "data": ready})
+    page.wait_for_stream_to_load(timeout=2)
+
+
+def test_wait_for_load_returns_on_a_same_document_navigation(stream: BrowserEventStream):
+    conn = stream.driver.script.conn
+    since = stream.mark()
+    routed = emit_later(
+        conn, "browsingContext.historyUpdated", {"context": "CTX", "url": "https://x/b"}
+    )
+    start = time.monotonic()
+    stream.wait_for_load(timeout=5, since=since, start_timeout=2)
+    assert time.monotonic() - start < 1
+    routed.join()
@@ -0,0 +1,229 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+import trio
+from selenium.common import WebDriverException
+
+from library.ui.HarArchive import HarArchive, HarRecorder, HarReplayer, normalize_url
+
+
+def entry(url: str, text: str, method: str = "GET", status: int = 200) -> dict:
+    return {
+        "request": {"method": method, "url": url},
+        "response": {"status": status, "headers": [], "content": {"text": text}},
+        "time": 10,
+    }
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM/a?b=2&a=1#top", "https://example.com/a?a=1&b=2"),
+        ("https://example.com?_=123&cb=x&q=1", "https://example.com/?q=1"),
+        ("https://example.com/app.js?v=9f1c2e", "https://example.com/app.js?v=9f1c2e"),
+        ("https://example.com/a?ts=1&T=2", "https://example.com/a"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_loose_drops_query():
+    assert normalize_url("https://example.com/a?v=1", keep_query=False) == "https://example.com/a"
+
+
+def test_match_serves_repeats_in_order_then_repeats_the_last():
+    archive = HarArchive(
+        [entry("https://example.com/a", "one"), entry("https://example.com/a", "two")]
+    )
+    served = [archive.match("get", "https://example.com/a?_=1")["response"] for _ in range(3)]
+    assert [r["content"]["text"] for r in served] == ["one", "two", "two"]
+
+
+def test_match_falls_back_to_loose_and_ignores_missing_bodies():
+    archive = HarArchive(
+        [
+            entry("https://example.com/app.js?v=old", "old"),
+            {**entry("https://example.com/gone", ""), "_bodyMissing": True},
+        ]
+    )
+    assert archive.match("GET", "https://example.com/app.js?v=new")["response"]["content"] == {
+        "text": "old"
+    }
+    assert archive.match("POST", "https://example.com/app.js?v=old") is None
+    assert archive.match("GET", "https://example.com/gone") is None
+
+
+class FakeFetch:
+    """Builds CDP Fetch commands as plain tuples."""
+
+    HeaderEntry = staticmethod(lambda name, value: (name, value))
+
+    @staticmethod
+    def continue_request(request_id):
+        return ("continue", request_id)
+
+    @staticmethod
+    def fail_request(request_id, error_reason):
+        return ("fail", request_id, error_reason)
+
+    @staticmethod
+    def fulfill_request(request_id, response_code, response_headers, body):
+        return ("fulfill", request_id, response_code, response_headers, body)
+
+
+class FakeSession:
+    def __init__(self):
+        self.commands = []
+
+    async def execute(self, command):
+        self.commands.append(command)
+
+
+DEVTOOLS = SimpleNamespace(
+    fetch=FakeFetch, network=SimpleNamespace(ErrorReason=SimpleNamespace(INTERNET_DISCONNECTED="x"))
+)
+
+
+def paused(url: str, request_id: str = "r1"):
+    return SimpleNamespace(request_id=request_id, request=SimpleNamespace(method="GET", url=url))
+
+
+@pytest.mark.parametrize("passthrough, command", [(True, "continue"), (False, "fail")])
+def test_replayer_unmatched_requests(passthrough, command):
+    replayer = HarReplayer(HarArchive(), passthrough=passthrough)
+    session = FakeSession()
+    trio.run(replayer._respond, session, DEVTOOLS, paused("https://example.com/new"))
+    assert session.commands[0][0] == command
+    assert replayer.misses == ["https://example.com/new"]
+    assert replayer.served == 0
+
+
+def test_replayer_fulfills_from_archive_without_hop_by_hop_headers():
+    recorded = entry("https://example.com/a", "hello")
+    recorded["response"]["headers"] = [
+        {"name": "Content-Type", "value": "text/plain"},
+        {"name": "Content-Encoding", "value": "gzip"},
+    ]
+    replayer = HarReplayer(HarArchive([recorded]))
+    session = FakeSession()
+    trio.run(replayer._respond, session, DEVTOOLS, paused("https://example.com/a"))
+    kind, _, status, headers, body = session.commands[0]
+    assert (kind, status, headers) == ("fulfill", 200, [("Content-Type", "text/plain")])
+    assert base64.b64decode(body) == b"hello"
+    assert replayer.served == 1
+
+
+class FakeDriver:
+    """Feeds canned performance-log records and response bodies to the recorder."""
+
+    def __init__(self, messages: list[tuple[str, dict]], bodies: dict[str, dict]):
+        self.log = [
+            {"message": json.dumps({"message": {"method": method, "params": params}})}
+            for method, params in messages
+        ]
+        self.bodies = bodies
+
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        log, self.log = self.log, []
+        return log
+
+    def execute_cdp_cmd(self, cmd, args):
+        if cmd == "Network.getResponseBody":
+            if args["requestId"] not in self.bodies:
+                raise WebDriverException("No resource with given identifier found")
+            return self.bodies[args["requestId"]]
+        return {}
+
+
+def sent(request_id, url, timestamp, **extra):
+    request = {"method": "GET", "url": url, "headers": {"Accept": "*/*"}}
+    return (
+        "Network.requestWillBeSent",
+        {
+            "requestId": request_id,
+            "request": request,
+            "timestamp": timestamp,
+            "wallTime": 1_700_000_000 + timestamp,
+            **extra,
+        },
+    )
+
+
+def received(request_id, status=200, headers=None):
+    response = {
+        "status": status,
+        "statusText": "OK",
+        "protocol": "h2",
+        "mimeType": "text/html",
+        "headers": headers or {"Set-Cookie": "a=1\nb=2"},
+        "timing": {"sendEnd": 5, "receiveHeadersEnd": 105},
+    }
+    return ("Network.responseReceived", {"requestId": request_id, "response": response})
+
+
+def finished(request_id, timestamp):
+    return (
+        "Network.loadingFinished",
+        {"requestId": request_id, "timestamp": timestamp, "encodedDataLength": 42},
+    )
+
+
+def test_recorder_builds_entries_from_performance_log():
+    driver = FakeDriver(
+        [
+            sent("1", "https://example.com/?q=1", 1.0),
+            received("1"),
+            finished("1", 1.5),
+            sent("2", "data:image/png;base64,AA", 1.0),
+            sent("3", "https://example.com/img", 1.0),
+            received("3"),
+            finished("3", 1.2),
+        ],
+        bodies={"1": {"body": "<html/>", "base64Encoded": False}},
+    )
+    recorder = HarRecorder(driver)
+    assert HarRecorder.of(driver) is recorder
+    recorder.collect()
+    page, image = recorder.archive.entries
+    assert page["time"] == 500
+    assert page["timings"] == {"send": 0, "wait": 100, "receive": 400}
+    assert page["startedDateTime"] == "2023-11-14T22:13:21Z"
+    assert page["request"]["queryString"] == [{"name": "q", "value": "1"}]
+    assert page["response"]["headers"] == [
+        {"name": "Set-Cookie", "value": "a=1"},
+        {"name": "Set-Cookie", "value": "b=2"},
+    ]
+    assert page["response"]["content"] == {"size": 7, "mimeType": "text/html", "text": "<html/>"}
+    assert page["response"]["bodySize"] == 42
+    assert "_bodyMissing" not in page
+    assert image["_bodyMissing"] is True
+    assert recorder.archive.match("GET", "https://example.com/img") is None
+
+
+def test_recorder_turns_redirect_hop_into_its_own_entry():
+    driver = FakeDriver(
+        [
+            sent("1", "https://example.com/old", 1.0),
+            sent(
+                "1",
+                "https://example.com/new",
+                1.1,
+                redirectResponse={"status": 301, "headers": {"Location": "/new"}},
+            ),
+            received("1"),
+            finished("1", 1.3),
+        ],
+        bodies={"1": {"body": "aGk=", "base64Encoded": True}},
+    )
+    recorder = HarRecorder(driver)
+    recorder.collect()
+    redirect, target = recorder.archive.entries
+    assert redirect["response"]["status"] == 301
+    assert redirect["response"]["redirectURL"] == "/new"
+    assert "_bodyMissing" not in redirect
+    assert target["request"]["url"] == "https://example.com/new"
+    assert target["response"]["content"]["encoding"] == "base64"
@@ -0,0 +1,163 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+from library.ui.BasePage import BasePage
+from library.ui.LocatorRegistry import ElementCache, LocatorRegistry
+from test_scripts.plugins import locator_report
+
+
+class FakeElement:
+    def __init__(self):
+        self.stale = False
+        self.checks = 0
+
+    def is_enabled(self):
+        self.checks += 1
+        if self.stale:
+            raise StaleElementReferenceException("stale")
+        return True
+
+
+class FakeDriver:
+    def __init__(self):
+        self.queries = 0
+        self.present = True
+
+    def find_element(self, by, value):
+        self.queries += 1
+        if not self.present:
+            raise NoSuchElementException(value)
+        return FakeElement()
+
+    def find_elements(self, by, value):
+        self.queries += 1
+        return [FakeElement()] if self.present else []
+
+
+@pytest.fixture(name="registry")
+def tf_registry():
+    registry = LocatorRegistry()
+
+    @registry.register_class("Page")
+    class Locators:
+        BUTTON = (By.XPATH, "//button[@title='{}']")
+        CARDS = (By.XPATH, "//div[contains(@class,'Layout-sc-')]//article")
+
+    registry.page = Locators
+    return registry
+
+
+def test_register_class_names_and_formats_once(registry: LocatorRegistry):
+    button = registry.page.BUTTON
+    assert button.name == "Page.BUTTON"
+    assert registry.locators["Page.BUTTON"] is button
+    assert button.format("Go") == (By.XPATH, "//button[@title='Go']")
+    assert button.format("Go") is button.format("Go")
+    assert button.format("Go").name == "Page.BUTTON"
+
+
+def test_cache_reuses_handle_and_re_resolves_stale(registry: LocatorRegistry):
+    driver = FakeDriver()
+    cache = ElementCache(driver, registry)
+    locator = registry.page.BUTTON.format("Go")
+
+    first = cache.find(locator)
+    assert cache.find(locator) is first
+    assert driver.queries == 1
+    # A cache hit costs no browser round trip
+    assert first.checks == 0
+
+    first.stale = True
+    assert cache.use(locator, FakeElement.is_enabled) is True
+    second = cache.find(locator)
+    assert second is not first
+    assert driver.queries == 2
+    cache.invalidate()
+    assert cache.find(locator) is not second
+
+    stats = registry.stats["Page.BUTTON"]
+    assert (stats.queries, stats.cache_hits, stats.stale) == (3, 3, 1)
+
+
+def test_find_element_resolves_again_after_the_dom_is_replaced():
+    driver = FakeDriver()
+    page = BasePage(driver)
+    locator = (By.XPATH, "//button[@title='Go']")
+
+    first = page.find_element_by_xpath(locator)
+    assert page.find_element_by_xpath(locator) is first
+    # A client-side render swaps the node without a navigation, so the cache is not invalidated
+    first.stale = True
+    second = page.find_element_by_xpath(locator)
+    assert second is not first
+    assert not second.stale
+    assert driver.queries == 2
+
+
+def test_fresh_handle_errors_are_not_retried(registry: LocatorRegistry):
+    driver = FakeDriver()
+    cache = ElementCache(driver, registry)
+    locator = registry.page.BUTTON.format("Go")
+
+    def detach(element):
+        element.stale = True
+        return element.is_enabled()
+
+    with pytest.raises(StaleElementReferenceException):
+        cache.use(locator, detach)
+    assert driver.queries == 1
+    assert registry.stats["Page.BUTTON"].stale == 0
+
+
+def test_misses_are_timed_and_lists_not_cached(registry: LocatorRegistry):
+    driver = FakeDriver()
+    cache = ElementCache(driver, registry)
+    cache.find_all(registry.page.CARDS)
+    cache.find_all(registry.page.CARDS)
+    driver.present = False
+    assert cache.find_all(registry.page.CARDS) == []
+    with pytest.raises(NoSuchElementException):
+        cache.find(registry.page.BUTTON.format("Missing"))
+
+    cards = registry.stats["Page.CARDS"]
+    assert (cards.queries, cards.misses) == (3, 1)
+    assert registry.stats["Page.BUTTON"].misses == 1
+
+
+def test_report_flags_slow_locators_with_hint(registry: LocatorRegistry):
+    registry.record(registry.page.CARDS, 0.4, found=True)
+    registry.record(registry.page.BUTTON, 0.01, found=True)
+
+    assert [s.name for s in registry.slow_locators(250)] == ["Page.CARDS"]
+    report = "\n".join(registry.report(250))
+    assert "Page.CARDS SLOW" in report
+    assert "class substring" in report
+    assert "Page.BUTTON SLOW" not in report
+
+
+def test_worker_stats_are_merged_on_the_controller(registry: LocatorRegistry, monkeypatch):
+    worker = LocatorRegistry()
+    registry.record(registry.page.CARDS, 0.1, found=True)
+    worker.record(registry.page.CARDS, 0.5, found=False)
+    worker.stats_for(registry.page.CARDS).cache_hits += 2
+    worker.record(registry.page.BUTTON, 0.2, found=True)
+
+    monkeypatch.setattr(locator_report, "REGISTRY", worker)
+    plugin = locator_report.LocatorReport(250)
+    session = SimpleNamespace(config=SimpleNamespace(workeroutput={}))
+    plugin.pytest_sessionfinish(session)
+    # execnet only carries plain data
+    exported = json.loads(json.dumps(session.config.workeroutput))
+
+    monkeypatch.setattr(locator_report, "REGISTRY", registry)
+    plugin.pytest_testnodedown(SimpleNamespace(workeroutput=exported), None)
+    cards = registry.stats["Page.CARDS"]
+    assert (cards.queries, cards.misses, cards.cache_hits) == (2, 1, 2)
+    assert cards.total == pytest.approx(0.6)
+    assert cards.max == 0.5
+    assert registry.stats["Page.BUTTON"].queries == 1
+    assert [s.name for s in registry.slow_locators(250)] == ["Page.CARDS"]
@@ -0,0 +1,184 @@
+import contextlib
+import threading
+from types import SimpleNamespace
+from typing import ClassVar
+
+import pytest
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+import library.ui.SharedBrowser as shared
+from library.ui.SharedBrowser import SharedBrowser, SharedChromeRun
+
+
+class FakeDriver:
+    """Chrome attached over debuggerAddress: window handles and CDP commands only."""
+
+    def __init__(self, service=None, options=None):
+        self.options = options
+        self.capabilities = {"browserVersion": "140.0.1"}
+        self.window_handles = []
+        self.current = None
+        self.cdp_commands = []
+        self.quitted = False
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    def _switch(self, handle):
+        self.current = handle
+
+    def execute_cdp_cmd(self, cmd, args):
+        self.cdp_commands.append((cmd, self.current))
+        return {}
+
+    def quit(self):
+        self.quitted = True
+
+
+class FakeCdp:
+    """Browser-level DevTools socket creating targets the fake driver then sees as windows."""
+
+    driver: FakeDriver
+
+    def __init__(self, address):
+        self.address = address
+        self.sent = []
+        self.contexts = set()
+        self.fail_close = False
+        self.closed = False
+
+    def send(self, method, params=None):
+        self.sent.append(method)
+        if method == "Target.createBrowserContext":
+            context_id = f"ctx{len(self.sent)}"
+            self.contexts.add(context_id)
+            return {"browserContextId": context_id}
+        if method == "Target.createTarget":
+            target_id = f"page-{params['browserContextId']}"
+            self.driver.window_handles.append(target_id)
+            return {"targetId": target_id}
+        if method == "Target.closeTarget":
+            if self.fail_close:
+                raise WebDriverException("No target with given id found")
+            self.driver.window_handles.remove(params["targetId"])
+        if method == "Target.disposeBrowserContext":
+            self.contexts.remove(params["browserContextId"])
+        return {}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(name="browser")
+def tf_browser(monkeypatch: pytest.MonkeyPatch) -> SharedBrowser:
+    monkeypatch.setattr(
+        shared,
+        "webdriver",
+        SimpleNamespace(ChromeOptions=webdriver.ChromeOptions, Chrome=FakeDriver),
+    )
+    monkeypatch.setattr(shared, "Service", lambda path: path)
+    monkeypatch.setattr(shared, "BrowserCdp", FakeCdp)
+    browser = SharedBrowser("127.0.0.1:9222", "chromedriver", page_load_strategy="eager")
+    browser.cdp.driver = browser.driver
+    return browser
+
+
+def test_context_lifecycle(browser: SharedBrowser):
+    assert browser.driver.options.debugger_address == "127.0.0.1:9222"
+    assert "Chrome/140.0.1 Mobile" in browser.user_agent
+    first = browser.new_context()
+    second = browser.new_context(emulate=False)
+    assert browser.driver.current == second.target_id
+    assert browser.cdp.contexts == {first.context_id, second.context_id}
+    emulated = {cmd for cmd, target in browser.driver.cdp_commands if target == first.target_id}
+    assert "Emulation.setDeviceMetricsOverride" in emulated
+    assert not [cmd for cmd, target in browser.driver.cdp_commands if target == second.target_id]
+
+    first.close()
+    second.close()
+    assert browser.cdp.contexts == set()
+    assert browser.driver.window_handles == []
+    browser.quit()
+    assert browser.cdp.closed and browser.driver.quitted
+
+
+def test_context_is_disposed_even_if_its_page_is_gone(browser: SharedBrowser):
+    context = browser.new_context()
+    browser.cdp.fail_close = True
+    with pytest.raises(WebDriverException, match="No target"):
+        context.close()
+    assert browser.cdp.contexts == set()
+
+
+def test_new_context_times_out_when_window_never_appears(browser: SharedBrowser):
+    browser.cdp.driver = FakeDriver()
+    with pytest.raises(WebDriverException, match="did not appear"):
+        browser.new_context(timeout=0.1)
+
+
+class FakeChrome:
+    started: ClassVar[list["FakeChrome"]] = []
+    fail = False
+
+    def __init__(self, driver_path, port=None):
+        if self.fail:
+            raise WebDriverException("chrome not reachable")
+        self.address = f"127.0.0.1:{9000 + len(self.started)}"
+        self.quitted = False
+        self.started.append(self)
+
+    def quit(self):
+        self.quitted = True
+
+
+class ThreadedRun(SharedChromeRun):
+    """Runs the host in a thread of this process instead of a child process."""
+
+    def _launch(self):
+        thread = threading.Thread(target=self._serve_quietly, daemon=True)
+        thread.start()
+        return SimpleNamespace(
+            poll=lambda: None if thread.is_alive() else 0,
+            returncode=0,
+            wait=lambda timeout: thread.join(timeout),
+        )
+
+    def _serve_quietly(self):
+        with contextlib.suppress(WebDriverException):
+            self.serve(poll=0.01)
+
+
+@pytest.fixture(name="chrome")
+def tf_chrome(monkeypatch: pytest.MonkeyPatch) -> type[FakeChrome]:
+    monkeypatch.setattr(FakeChrome, "started", [])
+    monkeypatch.setattr(shared, "SharedChrome", FakeChrome)
+    monkeypatch.setattr(shared, "chromedriver_path", lambda: "chromedriver")
+    return FakeChrome
+
+
+def test_run_launches_one_chrome_on_first_use_and_stops_it(tmp_path, chrome):
+    run = ThreadedRun(tmp_path)
+    run.stop(timeout=1)
+    assert chrome.started == []
+
+    addresses = []
+    workers = [threading.Thread(target=lambda: addresses.append(run.address())) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(chrome.started) == 1
+    assert addresses == [chrome.started[0].address] * 4
+    # Another process of the same run only reads the published address
+    assert SharedChromeRun(tmp_path).address(timeout=1) == chrome.started[0].address
+
+    run.stop(timeout=5)
+    assert chrome.started[0].quitted
+    assert (tmp_path / SharedChromeRun.STOPPED).exists()
+
+
+def test_run_reports_a_host_that_failed_to_start(tmp_path, chrome, monkeypatch):
+    monkeypatch.setattr(chrome, "fail", True)
+    with pytest.raises(WebDriverException, match="chrome not reachable"):
+        ThreadedRun(tmp_path).address(timeout=5)
+    with pytest.raises(WebDriverException, match="chrome not reachable"):
+        SharedChromeRun(tmp_path).address(timeout=1)
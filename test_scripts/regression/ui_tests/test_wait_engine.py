@@ -0,0 +1,76 @@
+import itertools
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from library.ui.BasePage import BasePage
+from library.ui.WaitEngine import WaitEngine
+
+
+class FakeDriver:
+    def __init__(self, ready_after=None, ready_state="complete"):
+        self.capabilities = {"pageLoadStrategy": "normal"}
+        self.ready_after = ready_after
+        self.ready_state = ready_state
+        self.calls = []
+
+    def find_elements(self, by, value):
+        self.calls.append(time.monotonic())
+        if self.ready_after is not None and len(self.calls) > self.ready_after:
+            return ["element"]
+        return []
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+    def execute_script(self, script):
+        return self.ready_state
+
+
+def test_poll_interval_backs_off():
+    driver = FakeDriver(ready_after=6)
+    engine = WaitEngine(driver, initial_poll=0.01, backoff=2, max_poll=0.04)
+    assert engine.until(lambda d: d.find_elements("xpath", "//a"), timeout=5) == ["element"]
+    gaps = [b - a for a, b in itertools.pairwise(driver.calls)]
+    assert gaps[0] < gaps[2]
+    assert max(gaps) < 0.04 + 0.03
+
+
+def test_nested_waits_share_the_step_budget():
+    engine = WaitEngine(FakeDriver(), initial_poll=0.01)
+    start = time.monotonic()
+    with pytest.raises(TimeoutException), engine.budget(0.2):
+        with pytest.raises(TimeoutException):
+            engine.until(lambda d: False, timeout=0.15)
+        assert engine.remaining(30) < 0.1
+        engine.until(lambda d: False, timeout=30)
+    assert time.monotonic() - start < 0.5
+    assert engine.remaining(30) == 30
+
+
+def test_find_elements_returns_as_soon_as_present_or_empty_after_timeout():
+    page = BasePage(FakeDriver(ready_after=2))
+    assert page.find_elements_by_xpath(("xpath", "//a"), timeout=5) == ["element"]
+
+    driver = FakeDriver()
+    page = BasePage(driver)
+    start = time.monotonic()
+    # Without an explicit wait an empty result comes back from a single lookup
+    assert page.find_elements_by_xpath(("xpath", "//a")) == []
+    assert len(driver.calls) == 1
+    assert page.find_elements_by_xpath(("xpath", "//a"), timeout=0.2) == []
+    with pytest.raises(NoSuchElementException):
+        page.find_element_by_xpath(("xpath", "//a"), timeout=0.2)
+    assert time.monotonic() - start < 1
+
+
+def test_eager_strategy_accepts_interactive_document():
+    driver = FakeDriver(ready_state="interactive")
+    with pytest.raises(TimeoutException):
+        BasePage(driver).wait_dome_to_load(timeout=0.1)
+    driver.capabilities["pageLoadStrategy"] = "eager"
+    BasePage(driver).wait_dome_to_load(timeout=0.1)